@@ -0,0 +1,169 @@
+"""
+Offline end-to-end latency benchmark.
+
+Starts benchmarks/stub_server.py in a background thread, points the backend's
+Gemini and ElevenLabs clients at it, and drives /segment, /control and
+/meetings/demo under concurrency. Reports throughput and p50/p95/p99 latency
+per stage.
+
+Run from backend/:
+    python -m benchmarks.bench_e2e --meetings 50 --segments 40 --concurrency 32
+"""
+import argparse
+import asyncio
+import os
+import random
+import socket
+import threading
+import time
+from typing import Dict, List
+
+import uvicorn
+
+from benchmarks.stub_server import StubConfig, create_app
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_stub(config: StubConfig) -> str:
+    """Run the stub server in a daemon thread and return its base URL."""
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(create_app(config), host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    deadline = time.monotonic() + 10
+    while not server.started:
+        if time.monotonic() > deadline:
+            raise RuntimeError("Stub server did not start")
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}"
+
+
+def percentile(samples: List[float], p: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(p / 100.0 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class StageStats:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.wall: Dict[str, float] = {}
+
+    def record(self, stage: str, seconds: float, ok: bool):
+        self.latencies.setdefault(stage, []).append(seconds)
+        if not ok:
+            self.errors[stage] = self.errors.get(stage, 0) + 1
+
+    def report(self):
+        print(f"{'stage':<16} {'requests':>9} {'errors':>7} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+        for stage, samples in self.latencies.items():
+            wall = self.wall.get(stage) or 1e-9
+            print(
+                f"{stage:<16} {len(samples):>9} {self.errors.get(stage, 0):>7} "
+                f"{len(samples) / wall:>9.1f} "
+                f"{percentile(samples, 50) * 1000:>9.1f} "
+                f"{percentile(samples, 95) * 1000:>9.1f} "
+                f"{percentile(samples, 99) * 1000:>9.1f}"
+            )
+
+
+async def timed(stats: StageStats, stage: str, semaphore: asyncio.Semaphore, request):
+    async with semaphore:
+        start = time.perf_counter()
+        try:
+            response = await request()
+            ok = response.status_code < 400
+        except Exception:
+            ok = False
+        stats.record(stage, time.perf_counter() - start, ok)
+
+
+async def run_stage(stats: StageStats, stage: str, concurrency: int, requests):
+    semaphore = asyncio.Semaphore(concurrency)
+    start = time.perf_counter()
+    await asyncio.gather(*(timed(stats, stage, semaphore, r) for r in requests))
+    stats.wall[stage] = time.perf_counter() - start
+
+
+async def run(args):
+    import httpx
+
+    from src.main import app
+
+    rng = random.Random(0)
+    stats = StageStats()
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://backend", timeout=120) as client:
+        segment_requests = []
+        for m in range(args.meetings):
+            t = 0
+            for _ in range(args.segments):
+                duration = rng.randint(500, 8000)
+                payload = {
+                    "meeting_id": f"bench-{m}",
+                    "speaker": f"spk_{rng.randrange(4)}",
+                    "start_ms": t,
+                    "end_ms": t + duration,
+                    "text": "we should ship the roadmap next quarter",
+                    "is_final": True,
+                }
+                segment_requests.append(lambda p=payload: client.post("/segment", json=p))
+                t += duration
+        await run_stage(stats, "/segment", args.concurrency, segment_requests)
+
+        control_requests = [
+            (lambda m=m: client.post("/control", json={"type": "flush", "meeting_id": f"bench-{m}"}))
+            for m in range(args.meetings)
+        ]
+        await run_stage(stats, "/control flush", args.concurrency, control_requests)
+
+        audio = os.urandom(args.audio_kb * 1024)
+        demo_requests = [
+            (lambda: client.post("/meetings/demo", files={"meeting_audio": ("bench.webm", audio, "audio/webm")}))
+            for _ in range(args.uploads)
+        ]
+        await run_stage(stats, "/meetings/demo", args.concurrency, demo_requests)
+
+    stats.report()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--meetings", type=int, default=50)
+    parser.add_argument("--segments", type=int, default=40, help="segments per meeting")
+    parser.add_argument("--uploads", type=int, default=20, help="number of /meetings/demo uploads")
+    parser.add_argument("--audio-kb", type=int, default=256, help="size of each uploaded file")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--gemini-latency-ms", type=float, default=300.0)
+    parser.add_argument("--elevenlabs-latency-ms", type=float, default=500.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--transcript-words", type=int, default=2000)
+    args = parser.parse_args()
+
+    base_url = start_stub(StubConfig(
+        gemini_latency_ms=args.gemini_latency_ms,
+        elevenlabs_latency_ms=args.elevenlabs_latency_ms,
+        error_rate=args.error_rate,
+        transcript_words=args.transcript_words,
+    ))
+
+    # Must be set before the backend modules read their settings
+    os.environ["GEMINI_BASE_URL"] = base_url
+    os.environ["ELEVENLABS_BASE_URL"] = base_url
+    os.environ.setdefault("GEMINI_API_KEY", "stub")
+    os.environ.setdefault("ELEVENLABS_API_KEY", "stub")
+
+    print(f"Stub server at {base_url}")
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Memory and response size of a meeting's Gemini output history.
+
+Compares keeping every TimestampedGeminiOutput (the previous list) with the
+delta-backed OutputHistory over a synthetic 2-hour meeting with one analysis
+per minute, in two shapes:
+
+- windowed:   each analysis covers only the minute since the previous one
+- cumulative: each analysis covers the meeting so far (repeated flushes)
+
+Reports memory held, the JSON size of the full history against the delta
+stream served by GET /meeting/{id}/outputs, and the time to rebuild an
+arbitrary historical snapshot from a cold (zstd-compressed) block.
+
+Run from backend/:
+    python -m benchmarks.bench_output_history --minutes 120
+"""
+import argparse
+import os
+import random
+import time
+import tracemalloc
+
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+
+import pydantic_core
+
+from benchmarks.bench_serialization import make_output, make_segments
+from src.services.output_history import OutputHistory
+
+
+def traced(build):
+    tracemalloc.start()
+    result = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current
+
+
+def windows(segments, cumulative: bool):
+    by_minute = {}
+    for seg in segments:
+        by_minute.setdefault(seg.start_ms // 60_000, []).append(seg)
+    seen = []
+    for window in by_minute.values():
+        seen.extend(window)
+        yield list(seen) if cumulative else window
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--minutes", type=int, default=120)
+    args = parser.parse_args()
+
+    segments = make_segments(random.Random(0), args.minutes)
+
+    print(f"Output history benchmark: {args.minutes} analyses over {len(segments)} segments")
+    print(f"{'shape':<11} {'layout':<14} {'memory (MB)':>12} {'history JSON (MB)':>18} {'snapshot (ms)':>14}")
+    for shape in ("windowed", "cumulative"):
+        def outputs():
+            rng = random.Random(1)
+            return (make_output(rng, window) for window in windows(segments, shape == "cumulative"))
+
+        as_list, list_bytes = traced(lambda: list(outputs()))
+
+        def build_history():
+            history = OutputHistory()
+            for output in outputs():
+                history.append(output)
+            return history
+
+        history, history_bytes = traced(build_history)
+
+        list_json = len(pydantic_core.to_json(as_list))
+        delta_json = len(pydantic_core.to_json(history.deltas()))
+
+        middle = len(history) // 2 + 7
+        history._decoded.clear()
+        start = time.perf_counter()
+        snapshot = history[middle]
+        snapshot_time = time.perf_counter() - start
+        assert snapshot == as_list[middle]
+
+        print(f"{shape:<11} {'list':<14} {list_bytes / 1e6:>12.1f} {list_json / 1e6:>18.2f} {'-':>14}")
+        print(f"{shape:<11} {'OutputHistory':<14} {history_bytes / 1e6:>12.1f} {delta_json / 1e6:>18.2f} {snapshot_time * 1000:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
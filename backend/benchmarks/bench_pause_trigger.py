@@ -0,0 +1,105 @@
+"""
+Cost of re-arming pause triggers across many live meetings.
+
+Compares the previous approach (cancel the meeting's sleeping asyncio.Task
+and create a new one on every segment) with the central DeadlineScheduler.
+Each round delivers one segment to every meeting; deadlines are far enough
+out that nothing fires, so only the re-arming churn is measured. Reports CPU
+time per round and the memory allocated while re-arming.
+
+Run from backend/:
+    python -m benchmarks.bench_pause_trigger --meetings 10000 --rounds 20
+"""
+import argparse
+import asyncio
+import os
+import time
+import tracemalloc
+
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+
+from src.services.scheduler import DeadlineScheduler
+
+DEBOUNCE_SECONDS = 60.0
+
+
+async def noop(key: str):
+    pass
+
+
+class TaskPerMeeting:
+    """The previous schedule_pause_trigger: one sleeping task per meeting."""
+
+    def __init__(self):
+        self.tasks = {}
+
+    def schedule(self, key: str, delay: float):
+        task = self.tasks.get(key)
+        if task:
+            task.cancel()
+
+        async def run():
+            await asyncio.sleep(delay)
+            await noop(key)
+
+        self.tasks[key] = asyncio.create_task(run())
+
+    def close(self):
+        for task in self.tasks.values():
+            task.cancel()
+
+
+async def run_rounds(trigger, keys, rounds: int) -> float:
+    """CPU seconds spent re-arming every key once per round."""
+    cpu = 0.0
+    for _ in range(rounds):
+        start = time.process_time()
+        for key in keys:
+            trigger.schedule(key, DEBOUNCE_SECONDS)
+        # Let the loop process cancellations, as it would between segments
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        cpu += time.process_time() - start
+    return cpu
+
+
+async def measure(make, keys, rounds: int):
+    # Warm up, then time without tracing, then trace allocations on a fresh run
+    trigger = make()
+    await run_rounds(trigger, keys, 1)
+    cpu = await run_rounds(trigger, keys, rounds)
+    trigger.close()
+    await asyncio.sleep(0)
+
+    trigger = make()
+    tracemalloc.start()
+    await run_rounds(trigger, keys, rounds)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    trigger.close()
+    await asyncio.sleep(0)
+    return cpu, current, peak
+
+
+async def main_async(args):
+    keys = [f"meeting-{i:05d}" for i in range(args.meetings)]
+    rows = [
+        ("task per meeting", await measure(TaskPerMeeting, keys, args.rounds)),
+        ("DeadlineScheduler", await measure(lambda: DeadlineScheduler(noop), keys, args.rounds)),
+    ]
+
+    print(f"Pause trigger benchmark: {args.meetings} meetings, {args.rounds} segments each")
+    print(f"{'approach':<20} {'CPU/round (ms)':>15} {'held (MB)':>10} {'peak (MB)':>10}")
+    for name, (cpu, current, peak) in rows:
+        print(f"{name:<20} {cpu / args.rounds * 1000:>15.1f} {current / 1e6:>10.1f} {peak / 1e6:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--meetings", type=int, default=10_000)
+    parser.add_argument("--rounds", type=int, default=20)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
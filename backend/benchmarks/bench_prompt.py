@@ -0,0 +1,91 @@
+"""
+Benchmark prompt construction on a long synthetic transcript.
+
+Compares the previous prompt builder (per-call f-string over the full
+instructions with the transcript rendered twice) against the precompiled
+instructions plus compact transcript encoding.
+
+Run from backend/:
+    python -m benchmarks.bench_prompt --segments 5000
+"""
+import argparse
+import os
+import random
+import time
+
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+
+from src.services.gemini_client import SYSTEM_INSTRUCTIONS, build_prompt
+from src.services.prompt_budget import estimate_tokens
+
+WORDS = "we should ship the roadmap next quarter because scalability matters to customers".split()
+
+
+def make_segments(count: int, speakers: int = 6, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    segments = []
+    t = 0
+    for _ in range(count):
+        duration = rng.randint(800, 12000)
+        segments.append({
+            "speaker": f"spk_{rng.randrange(speakers)}",
+            "start_ms": t,
+            "end_ms": t + duration,
+            "text": " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 40))),
+        })
+        t += duration + rng.randint(0, 1500)
+    return segments
+
+
+def legacy_build_prompt(segments_with_timestamps: list) -> str:
+    """The previous build_prompt: two per-segment renderings inside one large f-string."""
+    transcript_lines = []
+    for seg in segments_with_timestamps:
+        start_sec = seg['start_ms'] / 1000.0
+        end_sec = seg['end_ms'] / 1000.0
+        transcript_lines.append(
+            f"[{start_sec:.2f}s-{end_sec:.2f}s] {seg['speaker']}: {seg['text']}"
+        )
+    transcript_text = "\n".join(transcript_lines)
+    diarized_text = "\n".join([f"[{s['speaker']}] {s['text']}" for s in segments_with_timestamps])
+    instructions = "\n".join("    " + line for line in SYSTEM_INSTRUCTIONS.splitlines())
+    return f"""
+{instructions}
+
+    INPUT DATA:
+
+    Full transcript:
+    {transcript_text}
+
+    Diarized transcript:
+    {diarized_text}
+    """
+
+
+def time_builder(builder, segments: list, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        builder(segments)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--segments", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    segments = make_segments(args.segments)
+
+    print(f"Prompt build benchmark: {args.segments} segments, best of {args.repeat}")
+    print(f"{'builder':<10} {'time (ms)':>10} {'chars':>10} {'~tokens':>10}")
+    for name, builder in (("legacy", legacy_build_prompt), ("compact", build_prompt)):
+        seconds = time_builder(builder, segments, args.repeat)
+        prompt = builder(segments)
+        print(f"{name:<10} {seconds * 1000:>10.2f} {len(prompt):>10} {estimate_tokens(prompt):>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Memory and read cost of a meeting's segment buffer.
+
+Compares a list of DiarizedSegment models (the previous MeetingState.buffer
+layout) with the columnar SegmentStore and the hot/cold TieredSegmentStore
+(hot tier of 300 segments) for a long meeting.
+
+Run from backend/:
+    python -m benchmarks.bench_segment_store --segments 100000
+"""
+import argparse
+import os
+import random
+import time
+import tracemalloc
+
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+
+from src.models.schemas import DiarizedSegment
+from src.services.segment_store import SegmentStore, TieredSegmentStore
+
+WORDS = "we should ship the roadmap next quarter because scalability matters to customers".split()
+
+
+def make_segments(count: int, speakers: int = 8, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    segments = []
+    t = 0
+    for _ in range(count):
+        duration = rng.randint(1000, 8000)
+        segments.append(DiarizedSegment(
+            meeting_id="bench-meeting-0001",
+            speaker=f"spk_{rng.randrange(speakers)}",
+            start_ms=t,
+            end_ms=t + duration,
+            text=" ".join(rng.choice(WORDS) for _ in range(rng.randint(4, 24))),
+            confidence=0.98,
+        ))
+        t += duration + rng.randint(0, 500)
+    return segments
+
+
+def measure(build):
+    """(result, bytes still allocated after build, build seconds without tracing)"""
+    start = time.perf_counter()
+    build()
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    result = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--segments", type=int, default=100_000)
+    args = parser.parse_args()
+
+    # Build from plain tuples so the source models are not counted
+    rows = [
+        (s.speaker, s.start_ms, s.end_ms, s.text, s.confidence)
+        for s in make_segments(args.segments)
+    ]
+
+    def build_models():
+        return [
+            DiarizedSegment(meeting_id="bench-meeting-0001", speaker=speaker, start_ms=start,
+                            end_ms=end, text=text, confidence=confidence)
+            for speaker, start, end, text, confidence in rows
+        ]
+
+    def build_store(store=None):
+        # Ingested segments are validated models; each is appended and then released
+        store = SegmentStore("bench-meeting-0001") if store is None else store
+        for speaker, start, end, text, confidence in rows:
+            store.append(DiarizedSegment(
+                meeting_id="bench-meeting-0001", speaker=speaker, start_ms=start,
+                end_ms=end, text=text, confidence=confidence,
+            ))
+        return store
+
+    models, models_bytes, models_build = measure(build_models)
+    store, store_bytes, store_build = measure(build_store)
+    tiered, tiered_bytes, tiered_build = measure(
+        lambda: build_store(TieredSegmentStore("bench-meeting-0001", hot_limit=300))
+    )
+
+    cutoff = rows[len(rows) // 2][2]
+
+    start = time.perf_counter()
+    recent = [{"speaker": s.speaker, "start_ms": s.start_ms, "end_ms": s.end_ms, "text": s.text}
+              for s in models if s.end_ms > cutoff]
+    models_read = time.perf_counter() - start
+
+    start = time.perf_counter()
+    recent_store = store.gemini_segments(store.ending_after(cutoff))
+    store_read = time.perf_counter() - start
+    assert recent == recent_store
+
+    start = time.perf_counter()
+    recent_tiered = tiered.ending_after(cutoff).gemini_segments()
+    tiered_read = time.perf_counter() - start
+    assert recent == recent_tiered
+
+    print(f"Segment buffer benchmark: {args.segments} segments")
+    print(f"{'layout':<22} {'memory (MB)':>12} {'build (ms)':>11} {'recent half (ms)':>17}")
+    print(f"{'list of models':<22} {models_bytes / 1e6:>12.1f} {models_build * 1000:>11.1f} {models_read * 1000:>17.1f}")
+    print(f"{'SegmentStore':<22} {store_bytes / 1e6:>12.1f} {store_build * 1000:>11.1f} {store_read * 1000:>17.1f}")
+    print(f"{'TieredSegmentStore':<22} {tiered_bytes / 1e6:>12.1f} {tiered_build * 1000:>11.1f} {tiered_read * 1000:>17.1f}")
+    print(f"store buffers (nbytes) {store.nbytes() / 1e6:.1f} MB, tiered {tiered.nbytes() / 1e6:.1f} MB "
+          f"({tiered.cold_count} segments in {len(tiered._cold)} cold chunks)")
+
+
+if __name__ == "__main__":
+    main()
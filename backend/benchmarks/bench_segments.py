@@ -0,0 +1,149 @@
+"""
+Benchmark ElevenLabs word-to-segment conversion on a synthetic transcript.
+
+Compares the previous per-word Python loop with the columnar path in
+src/services/segmentation.py and checks both produce the same segments.
+The columnar time is also split into extraction (reading fields out of
+word dicts) and segmentation (boundaries, reductions, segment objects).
+
+A second table compares ways of decoding a full speech-to-text response:
+building the SDK response model and round-tripping it through model_dump(),
+reading words straight from the SDK model, and parsing the raw JSON body.
+Building SDK models is slow, so this uses a smaller transcript.
+
+Run from backend/:
+    python -m benchmarks.bench_segments --words 500000 --response-words 20000
+"""
+import argparse
+import json
+import os
+import random
+import time
+
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+
+from elevenlabs.core.unchecked_base_model import construct_type
+from elevenlabs.types import SpeechToTextChunkResponseModel
+
+from src.models.schemas import DiarizedSegment
+from src.services.elevenlabs_service import transform_elevenlabs_transcription_to_segments
+from src.services.segmentation import SegmentationPolicy, columns_from_word_dicts, normalize_speaker_id, segment_words
+
+WORDS = "we should ship the roadmap next quarter because scalability matters to customers".split()
+
+
+def make_transcription(word_count: int, speakers: int = 6, seed: int = 0) -> dict:
+    rng = random.Random(seed)
+    words = []
+    t = 0.0
+    speaker = 0
+    for _ in range(word_count):
+        if rng.random() < 0.03:
+            speaker = rng.randrange(speakers)
+        duration = rng.uniform(0.1, 0.5)
+        words.append({"text": rng.choice(WORDS), "start": t, "end": t + duration,
+                      "type": "word", "speaker_id": f"speaker_{speaker}", "logprob": 0.0})
+        words.append({"text": " ", "start": t + duration, "end": t + duration,
+                      "type": "spacing", "speaker_id": f"speaker_{speaker}", "logprob": 0.0})
+        t += duration + rng.uniform(0.0, 0.3)
+    return {"language_code": "eng", "language_probability": 0.98, "words": words}
+
+
+def legacy_transform(transcription_data: dict, meeting_id: str, is_final: bool = True) -> list:
+    """The previous implementation: one Python iteration per word."""
+    def create(words, speaker_id, confidence):
+        content_words = [w for w in words if w.get("type") == "word"]
+        if not content_words:
+            return None
+        speaker = normalize_speaker_id(speaker_id or content_words[0].get("speaker_id") or "spk_0")
+        start_ms = int(min(w.get("start", 0) for w in content_words) * 1000)
+        end_ms = int(max(w.get("end", 0) for w in content_words) * 1000)
+        text = "".join(w.get("text", "") for w in words).strip()
+        if not text:
+            return None
+        return DiarizedSegment(meeting_id=meeting_id, speaker=speaker, start_ms=start_ms,
+                               end_ms=end_ms, text=text, is_final=is_final, confidence=confidence)
+
+    confidence = transcription_data.get("language_probability")
+    segments, current, current_speaker = [], [], None
+    for word in transcription_data["words"]:
+        if word.get("type") == "spacing":
+            if current:
+                current.append(word)
+            continue
+        speaker = word.get("speaker_id")
+        if current_speaker is not None and speaker != current_speaker:
+            segment = create(current, current_speaker, confidence)
+            if segment:
+                segments.append(segment)
+            current, current_speaker = [word], speaker
+        else:
+            if current_speaker is None:
+                current_speaker = speaker
+            current.append(word)
+    if current:
+        segment = create(current, current_speaker, confidence)
+        if segment:
+            segments.append(segment)
+    return segments
+
+
+def best_of(fn, repeat: int):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--words", type=int, default=500_000)
+    parser.add_argument("--response-words", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    data = make_transcription(args.words)
+    # Speaker-change splitting only, to match the legacy loop
+    speaker_only = SegmentationPolicy()
+
+    legacy_time, legacy = best_of(lambda: legacy_transform(data, "bench"), args.repeat)
+    columnar_time, columnar = best_of(
+        lambda: transform_elevenlabs_transcription_to_segments(data, "bench", policy=speaker_only), args.repeat
+    )
+
+    columns = columns_from_word_dicts(data["words"])
+    extract_time, _ = best_of(lambda: columns_from_word_dicts(data["words"]), args.repeat)
+    segment_time, _ = best_of(lambda: segment_words(columns, "bench", policy=speaker_only), args.repeat)
+
+    assert [s.model_dump() for s in legacy] == [s.model_dump() for s in columnar], "outputs differ"
+
+    print(f"Segment transform benchmark: {args.words} words, {len(columnar)} segments, best of {args.repeat}")
+    print(f"{'implementation':<16} {'time (ms)':>10}")
+    print(f"{'legacy loop':<16} {legacy_time * 1000:>10.1f}")
+    print(f"{'columnar':<16} {columnar_time * 1000:>10.1f}")
+    print(f"{'  extract':<16} {extract_time * 1000:>10.1f}")
+    print(f"{'  segment':<16} {segment_time * 1000:>10.1f}")
+
+    response = make_transcription(args.response_words)
+    body = json.dumps(response).encode()
+
+    def sdk_model():
+        return construct_type(type_=SpeechToTextChunkResponseModel, object_=json.loads(body))
+
+    paths = {
+        "sdk + model_dump": lambda: legacy_transform(sdk_model().model_dump(), "bench"),
+        "sdk objects": lambda: transform_elevenlabs_transcription_to_segments(sdk_model(), "bench"),
+        "raw json": lambda: transform_elevenlabs_transcription_to_segments(body, "bench"),
+    }
+    print()
+    print(f"Response decoding: {args.response_words} words ({len(body) / 1e6:.1f} MB JSON), best of {args.repeat}")
+    print(f"{'path':<18} {'time (ms)':>10}")
+    for name, fn in paths.items():
+        elapsed, _ = best_of(fn, args.repeat)
+        print(f"{name:<18} {elapsed * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Serialization cost of large meeting responses.
+
+Builds a synthetic 2-hour meeting (a segment every ~5 s, one analysis per
+minute with its full and amplified transcript) and compares, for the
+GET /meeting/{id} and POST /meetings/demo payloads:
+
+- the previous path: model_dump()/jsonable_encoder, then JSONResponse's json.dumps
+- PydanticJSONResponse: pydantic-core writing JSON bytes directly
+
+Also reports the gzip size and time of the result (GZipMiddleware, level 6),
+and the same for the slim responses (GET /meeting?view=summary and the demo
+fields MeetingView.tsx requests) against the previous full response.
+
+Run from backend/:
+    python -m benchmarks.bench_serialization --minutes 120
+"""
+import argparse
+import gzip
+import os
+import random
+import time
+
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from src.api.responses import TRANSCRIPT_FIELDS, PydanticJSONResponse, field_spec
+from src.models.schemas import DemoResponse, DiarizedSegment, MeetingStateResponse, TimestampedGeminiOutput
+
+WORDS = "we should ship the roadmap next quarter because scalability matters to customers".split()
+SPEAKERS = [f"spk_{i}" for i in range(6)]
+
+
+def sentence(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def make_segments(rng, minutes: int) -> list:
+    segments, t = [], 0
+    while t < minutes * 60_000:
+        duration = rng.randint(2000, 8000)
+        segments.append(DiarizedSegment(
+            meeting_id="bench-meeting", speaker=rng.choice(SPEAKERS),
+            start_ms=t, end_ms=t + duration, text=sentence(rng, rng.randint(6, 30)), confidence=0.97,
+        ))
+        t += duration
+    return segments
+
+
+def make_output(rng, segments: list) -> TimestampedGeminiOutput:
+    return TimestampedGeminiOutput(
+        timestamp_ms=segments[-1].end_ms,
+        start_ms=segments[0].start_ms,
+        end_ms=segments[-1].end_ms,
+        summary=sentence(rng, 80),
+        action_items=[{"owner": {"speaker_id": "spk_0"}, "item": sentence(rng, 8)}],
+        important_points=[sentence(rng, 12) for _ in range(3)],
+        meeting_statistics={
+            "total_duration_seconds": (segments[-1].end_ms - segments[0].start_ms) / 1000,
+            "total_speakers": len(SPEAKERS),
+            "speaking_time_by_speaker": {s: 10.0 for s in SPEAKERS},
+            "total_words": 1000,
+            "words_by_speaker": {s: 100 for s in SPEAKERS},
+            "interruptions_count": 2,
+            "average_turn_length_seconds": 5.0,
+        },
+        inequalities=[],
+        full_transcript=[
+            {"speaker_id": s.speaker, "start_ms": s.start_ms, "end_ms": s.end_ms, "text": s.text}
+            for s in segments
+        ],
+        amplified_transcript=[
+            {"speaker_id": s.speaker, "start_ms": s.start_ms, "end_ms": s.end_ms,
+             "original_text": s.text, "highlighted_text": s.text}
+            for s in segments
+        ],
+        suggestions=[{
+            "action": "invite_quiet_people", "reason": sentence(rng, 12), "priority": "medium",
+            "suggested_message": sentence(rng, 15),
+        }],
+    )
+
+
+def best_of(fn, repeat: int = 5):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return result, min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--minutes", type=int, default=120)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    segments = make_segments(rng, args.minutes)
+    minute_windows = {}
+    for seg in segments:
+        minute_windows.setdefault(seg.start_ms // 60_000, []).append(seg)
+    outputs = [make_output(rng, window) for window in minute_windows.values()]
+
+    state = MeetingStateResponse(meeting_id="bench-meeting", segments=segments, gemini_outputs=outputs)
+    demo_output = make_output(rng, segments)
+
+    demo = DemoResponse(meeting_id="demo", segments_processed=len(segments), segments=segments, gemini_output=demo_output)
+    payloads = {
+        "GET /meeting": (
+            lambda: JSONResponse(jsonable_encoder(state)).body,
+            lambda: PydanticJSONResponse(state).body,
+        ),
+        "POST /meetings/demo": (
+            lambda: JSONResponse(jsonable_encoder({
+                "ok": True, "meeting_id": "demo", "segments_processed": len(segments),
+                "segments": [s.model_dump() for s in segments],
+                "gemini_output": demo_output.model_dump(),
+            })).body,
+            lambda: PydanticJSONResponse(demo).body,
+        ),
+        "GET ?view=summary": (
+            lambda: JSONResponse(jsonable_encoder(state)).body,
+            lambda: PydanticJSONResponse(state, exclude={"gemini_outputs": {"__all__": TRANSCRIPT_FIELDS}}).body,
+        ),
+        "demo ?fields=...": (
+            lambda: JSONResponse(jsonable_encoder(demo)).body,
+            lambda: PydanticJSONResponse(demo, include=field_spec(DemoResponse, "meeting_id,gemini_output")).body,
+        ),
+    }
+
+    print(f"Serialization benchmark: {args.minutes} min meeting, {len(segments)} segments, {len(outputs)} analyses")
+    print(f"{'payload':<20} {'default (ms)':>12} {'pydantic (ms)':>14} {'full bytes':>11} {'bytes':>11} {'gzip bytes':>11} {'gzip (ms)':>10}")
+    for name, (default, fast) in payloads.items():
+        default_body, default_time = best_of(default)
+        fast_body, fast_time = best_of(fast)
+        compressed, gzip_time = best_of(lambda: gzip.compress(fast_body, compresslevel=6))
+        print(
+            f"{name:<20} {default_time * 1000:>12.1f} {fast_time * 1000:>14.1f} "
+            f"{len(default_body):>11,} {len(fast_body):>11,} {len(compressed):>11,} {gzip_time * 1000:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
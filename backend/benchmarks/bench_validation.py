@@ -0,0 +1,117 @@
+"""
+Pydantic validation cost per request.
+
+Compares the previous paths, which rebuilt models from data the backend had
+already validated, with the trusted paths that validate only at the Gemini
+boundary (TimestampedGeminiOutput.from_gemini):
+
+- GET /meeting:         rebuild and re-validate every stored output, wrap them in
+                        MeetingStateResponse, serialize; against serializing the
+                        stored snapshots as they are
+- demo output (build):  the demo route's extra normalization pass, validation and
+                        DemoResponse(...); against from_gemini and model_construct.
+                        Gemini's output is still validated once, so this only
+                        drops the duplicate work around it
+- stream segment:       model_dump() then send_json's json.dumps; against
+                        pydantic-core writing the message directly
+
+Histories are a synthetic 2-hour meeting with one analysis per minute, both
+windowed and cumulative (see bench_output_history). Reports CPU time per request.
+
+Run from backend/:
+    python -m benchmarks.bench_validation --minutes 120
+"""
+import argparse
+import json
+import os
+import random
+import time
+import timeit
+
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+
+import pydantic_core
+
+from benchmarks.bench_output_history import windows
+from benchmarks.bench_serialization import make_output, make_segments
+from src.models.schemas import DemoResponse, MeetingStateResponse, TimestampedGeminiOutput
+from src.services.output_history import OutputHistory
+
+
+def cpu_per_call(fn, repeat: int = 5) -> float:
+    """Best CPU seconds per call of fn over repeat rounds of at least 0.2 s."""
+    timer = timeit.Timer(fn, timer=time.process_time)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat, number)) / number
+
+
+def previous_demo(output: dict, segments: list) -> DemoResponse:
+    for suggestion in output["suggestions"]:
+        if "suggested_message" not in suggestion:
+            suggestion["suggested_message"] = ""
+    if "amplified_transcript" not in output:
+        output["amplified_transcript"] = []
+    for entry in output["full_transcript"]:
+        if isinstance(entry, dict) and "speaker" not in entry:
+            entry["speaker"] = entry.get("speaker_id", "unknown")
+    timestamped = TimestampedGeminiOutput(timestamp_ms=0, start_ms=0, end_ms=0, **output)
+    return DemoResponse(
+        meeting_id="demo", segments_processed=len(segments), segments=segments, gemini_output=timestamped,
+    )
+
+
+def trusted_demo(output: dict, segments: list) -> DemoResponse:
+    timestamped = TimestampedGeminiOutput.from_gemini(output, 0, 0)
+    return DemoResponse.model_construct(
+        meeting_id="demo", segments_processed=len(segments), segments=segments, gemini_output=timestamped,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--minutes", type=int, default=120)
+    args = parser.parse_args()
+
+    segments = make_segments(random.Random(0), args.minutes)
+    rows = []
+    for shape in ("windowed", "cumulative"):
+        rng = random.Random(1)
+        history = OutputHistory()
+        for window in windows(segments, shape == "cumulative"):
+            history.append(make_output(rng, window))
+
+        rows.append((
+            f"GET /meeting ({shape})",
+            lambda history=history: pydantic_core.to_json(MeetingStateResponse(
+                meeting_id="bench-meeting", segments=segments, gemini_outputs=list(history),
+            )),
+            lambda history=history: pydantic_core.to_json({
+                "meeting_id": "bench-meeting", "segments": segments, "gemini_outputs": list(history.snapshots()),
+            }),
+        ))
+
+    demo_output = make_output(random.Random(2), segments).model_dump(exclude={"timestamp_ms", "start_ms", "end_ms"})
+    rows.append((
+        "demo output (build)",
+        lambda: previous_demo(demo_output, segments),
+        lambda: trusted_demo(demo_output, segments),
+    ))
+
+    segment = segments[0]
+    rows.append((
+        "stream segment",
+        lambda: json.dumps({"type": "final", "segment": segment.model_dump()}, separators=(",", ":")),
+        lambda: pydantic_core.to_json({"type": "final", "segment": segment}).decode(),
+    ))
+
+    print(f"Validation benchmark: {args.minutes} min meeting, {len(segments)} segments, {len(history)} analyses")
+    print(f"{'request':<26} {'previous (ms)':>14} {'trusted (ms)':>13} {'saved (ms)':>11}")
+    for name, previous, trusted in rows:
+        if name.startswith("GET"):
+            assert previous() == trusted()
+        before, after = cpu_per_call(previous), cpu_per_call(trusted)
+        print(f"{name:<26} {before * 1000:>14.3f} {after * 1000:>13.3f} {(before - after) * 1000:>11.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""
+Local stand-in for the Gemini and ElevenLabs HTTP APIs.
+
+Implements just enough of both APIs for the backend's SDK clients:
+    POST  /v1beta/models/{model}:generateContent
+    GET   /v1beta/models
+    POST  /v1beta/cachedContents
+    PATCH /v1beta/cachedContents/{cache_id}
+    POST  /v1/speech-to-text
+
+Latency, error rate and response sizes are configurable so benchmarks can run
+offline and reproducibly. Point the backend at it with:
+    GEMINI_BASE_URL=http://127.0.0.1:8765 ELEVENLABS_BASE_URL=http://127.0.0.1:8765
+
+Run standalone from backend/:
+    python -m benchmarks.stub_server --port 8765 --latency-ms 300 --error-rate 0.01
+"""
+import argparse
+import asyncio
+import json
+import random
+import uuid
+from dataclasses import dataclass
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+WORDS = "we should ship the roadmap next quarter because scalability matters to customers".split()
+
+
+@dataclass
+class StubConfig:
+    # Mean and jitter of the simulated upstream latency, per API
+    gemini_latency_ms: float = 300.0
+    elevenlabs_latency_ms: float = 500.0
+    jitter_ms: float = 50.0
+    # Fraction of requests answered with a 503
+    error_rate: float = 0.0
+    # Response sizes
+    transcript_words: int = 2000
+    speakers: int = 4
+    gemini_items: int = 20
+    seed: int = 0
+
+
+def _gemini_result(config: StubConfig, rng: random.Random) -> dict:
+    """A GeminiOutput-shaped analysis with gemini_items entries per list."""
+    speakers = [f"spk_{i}" for i in range(config.speakers)]
+    n = config.gemini_items
+    return {
+        "summary": "Synthetic meeting summary.",
+        "action_items": [
+            {"owner": rng.choice(speakers), "item": f"Follow up {i}", "due": None} for i in range(n)
+        ],
+        "important_points": [f"Point {i}" for i in range(n)],
+        "meeting_statistics": {
+            "total_duration_seconds": 600.0,
+            "total_speakers": config.speakers,
+            "speaking_time_by_speaker": {s: 600.0 / config.speakers for s in speakers},
+            "total_words": config.transcript_words,
+            "words_by_speaker": {s: config.transcript_words // config.speakers for s in speakers},
+            "interruptions_count": n,
+            "average_turn_length_seconds": 12.5,
+        },
+        "inequalities": [
+            {
+                "type": "interruption",
+                "description": f"Interruption {i}",
+                "speaker_affected": rng.choice(speakers),
+                "timestamp_ms": i * 1000,
+                "context": "...",
+            }
+            for i in range(n)
+        ],
+        "full_transcript": [
+            {"speaker": rng.choice(speakers), "start_ms": i * 1000, "end_ms": i * 1000 + 900,
+             "text": " ".join(rng.choice(WORDS) for _ in range(12))}
+            for i in range(n)
+        ],
+        "amplified_transcript": [
+            {"speaker": rng.choice(speakers), "start_ms": i * 1000, "end_ms": i * 1000 + 900,
+             "original_text": "idea", "highlighted_text": "**idea**"}
+            for i in range(n)
+        ],
+        "suggestions": [
+            {"action": "encourage_input", "reason": "Quiet speaker", "priority": "medium",
+             "target_speaker": rng.choice(speakers), "suggested_message": "Would you like to add anything?"}
+            for i in range(n)
+        ],
+    }
+
+
+def _transcription(config: StubConfig, rng: random.Random) -> dict:
+    """An ElevenLabs speech-to-text response with transcript_words words."""
+    words = []
+    t = 0.0
+    speaker = 0
+    for i in range(config.transcript_words):
+        if rng.random() < 0.05:
+            speaker = rng.randrange(config.speakers)
+        duration = rng.uniform(0.15, 0.5)
+        words.append({
+            "text": rng.choice(WORDS), "start": round(t, 3), "end": round(t + duration, 3),
+            "type": "word", "speaker_id": f"speaker_{speaker}", "logprob": 0.0,
+        })
+        words.append({
+            "text": " ", "start": round(t + duration, 3), "end": round(t + duration, 3),
+            "type": "spacing", "speaker_id": f"speaker_{speaker}", "logprob": 0.0,
+        })
+        t += duration + rng.uniform(0.0, 0.2)
+    return {
+        "language_code": "eng",
+        "language_probability": 0.99,
+        "text": "".join(w["text"] for w in words),
+        "words": words,
+    }
+
+
+def create_app(config: StubConfig) -> FastAPI:
+    app = FastAPI()
+    rng = random.Random(config.seed)
+    # Responses are built once; the stub should not be the bottleneck
+    gemini_body = {
+        "candidates": [{
+            "content": {"role": "model", "parts": [{"text": json.dumps(_gemini_result(config, rng))}]},
+            "finishReason": "STOP",
+        }],
+        "usageMetadata": {"promptTokenCount": 0, "candidatesTokenCount": 0},
+    }
+    transcription_body = _transcription(config, rng)
+
+    async def simulate(latency_ms: float):
+        delay = max(0.0, rng.gauss(latency_ms, config.jitter_ms)) / 1000.0
+        await asyncio.sleep(delay)
+        if rng.random() < config.error_rate:
+            return JSONResponse(
+                status_code=503,
+                content={"error": {"code": 503, "message": "stub: injected failure", "status": "UNAVAILABLE"}},
+            )
+        return None
+
+    @app.post("/v1beta/models/{model}:generateContent")
+    async def generate_content(model: str, request: Request):
+        await request.body()
+        error = await simulate(config.gemini_latency_ms)
+        return error or gemini_body
+
+    @app.get("/v1beta/models")
+    async def list_models():
+        return {"models": [{"name": "models/gemini-2.5-flash"}, {"name": "models/gemini-2.5-pro"}]}
+
+    @app.post("/v1beta/cachedContents")
+    async def create_cache(request: Request):
+        body = await request.json()
+        return {"name": f"cachedContents/{uuid.uuid4().hex[:12]}", "model": body.get("model")}
+
+    @app.patch("/v1beta/cachedContents/{cache_id}")
+    async def update_cache(cache_id: str):
+        return {"name": f"cachedContents/{cache_id}"}
+
+    @app.post("/v1/speech-to-text")
+    async def speech_to_text(request: Request):
+        await request.body()
+        error = await simulate(config.elevenlabs_latency_ms)
+        return error or transcription_body
+
+    return app
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--gemini-latency-ms", type=float, default=StubConfig.gemini_latency_ms)
+    parser.add_argument("--elevenlabs-latency-ms", type=float, default=StubConfig.elevenlabs_latency_ms)
+    parser.add_argument("--jitter-ms", type=float, default=StubConfig.jitter_ms)
+    parser.add_argument("--error-rate", type=float, default=StubConfig.error_rate)
+    parser.add_argument("--transcript-words", type=int, default=StubConfig.transcript_words)
+    parser.add_argument("--gemini-items", type=int, default=StubConfig.gemini_items)
+    args = parser.parse_args()
+
+    config = StubConfig(
+        gemini_latency_ms=args.gemini_latency_ms,
+        elevenlabs_latency_ms=args.elevenlabs_latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        transcript_words=args.transcript_words,
+        gemini_items=args.gemini_items,
+    )
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
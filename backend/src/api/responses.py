@@ -0,0 +1,81 @@
+"""
+JSON responses serialized by pydantic-core.
+
+FastAPI's default path runs return values through jsonable_encoder, which
+rebuilds every nested model as dicts and lists before json.dumps walks them
+again. PydanticJSONResponse hands models (or dicts and lists containing them)
+straight to pydantic-core, which writes the JSON bytes in one pass.
+
+Meeting routes also accept sparse fieldsets: fields=segments,gemini_outputs.summary
+is turned into a pydantic include spec, so unrequested parts of the response
+are never serialized. Include and exclude specs apply to models and plain
+dicts alike, so trusted data can be served without building models first.
+"""
+import types
+import typing
+from typing import Any, Optional, Tuple, Type
+
+import pydantic_core
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+# Per-analysis copies of the transcript, left out of view=summary responses
+TRANSCRIPT_FIELDS = {"full_transcript": True, "amplified_transcript": True}
+
+
+class PydanticJSONResponse(JSONResponse):
+    def __init__(self, content: Any, *, include: Optional[dict] = None, exclude: Optional[dict] = None, **kwargs):
+        # Set before super().__init__, which renders the body
+        self.include = include
+        self.exclude = exclude
+        super().__init__(content, **kwargs)
+
+    def render(self, content: Any) -> bytes:
+        return pydantic_core.to_json(content, include=self.include, exclude=self.exclude)
+
+
+def _nested_model(annotation) -> Tuple[Optional[Type[BaseModel]], bool]:
+    """The model inside an annotation (through Optional and list), and whether it is a list."""
+    is_list = False
+    while True:
+        origin = typing.get_origin(annotation)
+        if origin in (typing.Union, types.UnionType):
+            args = [a for a in typing.get_args(annotation) if a is not type(None)]
+            if len(args) != 1:
+                return None, is_list
+            annotation = args[0]
+        elif origin is list:
+            is_list = True
+            annotation = typing.get_args(annotation)[0]
+        else:
+            break
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation, is_list
+    return None, is_list
+
+
+def field_spec(model: Type[BaseModel], fields: str) -> dict:
+    """
+    Pydantic include spec for a comma-separated list of (dotted) field paths.
+
+    "segments,gemini_outputs.summary" becomes
+    {"segments": True, "gemini_outputs": {"__all__": {"summary": True}}}.
+    Raises ValueError for a path that does not exist on model.
+    """
+    spec: dict = {}
+    for path in filter(None, (p.strip() for p in fields.split(","))):
+        node, current = spec, model
+        names = path.split(".")
+        for depth, name in enumerate(names):
+            if current is None or name not in current.model_fields:
+                raise ValueError(f"Unknown field: {path}")
+            current, is_list = _nested_model(current.model_fields[name].annotation)
+            if depth == len(names) - 1:
+                node[name] = True
+                break
+            if node.get(name) is True:
+                break  # the whole field is already included
+            node = node.setdefault(name, {})
+            if is_list:
+                node = node.setdefault("__all__", {})
+    return spec
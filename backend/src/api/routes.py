@@ -1,14 +1,26 @@
+import json
+import logging
 import uuid
-from fastapi import APIRouter, UploadFile, File, Form
+from typing import List, Literal, Optional
+
+import pydantic_core
+from fastapi import APIRouter, UploadFile, File, Form, WebSocket, WebSocketDisconnect
 from fastapi.responses import JSONResponse
 
-from src.models.schemas import DiarizedSegment, ControlMessage, MeetingStateResponse, TimestampedGeminiOutput
+from src.api.responses import TRANSCRIPT_FIELDS, PydanticJSONResponse, field_spec
+from src.models.schemas import DiarizedSegment, ControlMessage, DemoResponse, MeetingStateResponse, TimestampedGeminiOutput
 from src.services.meeting import (
+    analyze,
     get_meeting,
-    schedule_pause_trigger,
-    run_gemini,
+    ingest,
 )
 from src.services.elevenlabs_service import transcribe_audio_file
+from src.services.gemini_client import call_gemini
+from src.services.log import bind_context, sample_payload
+from src.services.metrics import ERRORS, timed
+from src.services.streaming import create_transcriber
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
@@ -18,34 +30,89 @@ async def ok():
     return {"ok": True}
 
 @router.get("/meeting/{meeting_id}", response_model=MeetingStateResponse)
-async def get_meeting_state(meeting_id: str):
-    """Get the current state of a meeting including all segments and Gemini outputs chronologically."""
+async def get_meeting_state(
+    meeting_id: str,
+    start_ms: Optional[int] = None,
+    end_ms: Optional[int] = None,
+    view: Literal["summary", "full"] = "full",
+    fields: Optional[str] = None,
+):
+    """
+    Get the current state of a meeting including all segments and Gemini outputs chronologically.
+
+    start_ms/end_ms limit the segments to those overlapping that range.
+    view=summary leaves the transcript copies out of each Gemini output;
+    fields=a,b.c returns only the listed (dotted) fields.
+    """
+    try:
+        include = field_spec(MeetingStateResponse, fields) if fields else None
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+    exclude = {"gemini_outputs": {"__all__": TRANSCRIPT_FIELDS}} if view == "summary" else None
+
     state = get_meeting(meeting_id)
     
-    # Convert deque to list and sort segments by start_ms
-    segments = sorted(list(state.buffer), key=lambda s: s.start_ms)
+    # Rebuild the output snapshots only when they are part of the response; they
+    # are served as the dicts they were stored as, without re-validating them
+    if include is not None and "gemini_outputs" not in include:
+        outputs = []
+    else:
+        outputs = list(state.gemini_outputs.snapshots())
+
+    # Materialize segments from the hot and cold tiers, sorted by start_ms
+    if include is not None and "segments" not in include:
+        segments = []
+    elif start_ms is None and end_ms is None:
+        rows = state.buffer.history()
+        segments = rows.to_models(rows.by_start())
+    else:
+        rows = state.buffer.between(start_ms or 0, end_ms if end_ms is not None else 2**62)
+        segments = rows.to_models(rows.by_start())
     
-    return MeetingStateResponse(
-        meeting_id=meeting_id,
-        segments=segments,
-        gemini_outputs=state.gemini_outputs
-    )
+    with timed("response_serialization"):
+        return PydanticJSONResponse(
+            {
+                "meeting_id": meeting_id,
+                "segments": segments,
+                "gemini_outputs": outputs,
+            },
+            include=include,
+            exclude=exclude,
+        )
 
 
-@router.post("/segment")
-async def ingest_segment(seg: DiarizedSegment):
-    state = get_meeting(seg.meeting_id)
+@router.get("/meeting/{meeting_id}/outputs")
+async def get_meeting_output_deltas(meeting_id: str, since: int = 0):
+    """
+    Gemini outputs as deltas, for clients that already hold earlier outputs.
+
+    Returns the deltas of outputs since..count-1. Applying them in order to
+    output since-1 (or to {} when since is 0) yields each later output; see
+    src/services/output_history.py for the format.
+    """
+    state = get_meeting(meeting_id)
+    history = state.gemini_outputs
+    since = min(max(since, 0), len(history))
+    return PydanticJSONResponse({
+        "meeting_id": meeting_id,
+        "count": len(history),
+        "since": since,
+        "deltas": history.deltas(since),
+    })
 
-    if seg.is_final and seg.text.strip():
-        state.append(seg)
-        await schedule_pause_trigger(state, 1.5)
 
+@router.post("/segment")
+async def ingest_segment(seg: DiarizedSegment):
+    bind_context(meeting_id=seg.meeting_id)
+    await ingest(seg)
     return {"ok": True}
 
 
 @router.post("/meetings/demo")
 async def transcribe_audio(
     meeting_audio: UploadFile = File(..., description="Audio file to transcribe"),
+    view: Literal["summary", "full"] = "full",
+    fields: Optional[str] = None,
 ):
     """
     Transcribe audio file using 11 Labs and automatically process through Gemini workflow.
@@ -57,11 +124,20 @@ async def transcribe_audio(
     4. Processes all segments through Gemini immediately
     5. Returns Gemini output in the response
     
-    Returns the segments and Gemini output.
+    Returns the segments and Gemini output. view=summary leaves the transcript
+    copies out of the Gemini output; fields=a,b.c returns only the listed fields.
     """
+    bind_context(meeting_id='demo', job_id=uuid.uuid4().hex[:12])
+    try:
+        include = field_spec(DemoResponse, fields) if fields else None
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+    exclude = {"gemini_output": TRANSCRIPT_FIELDS} if view == "summary" else None
+
     try:
         # Read audio file
-        audio_data = await meeting_audio.read()
+        with timed("upload_read"):
+            audio_data = await meeting_audio.read()
         
         
         if not audio_data:
@@ -69,7 +145,7 @@ async def transcribe_audio(
                 status_code=400,
                 content={"error": "Empty audio file"}
             )
-        print("HELLO3")
+        logger.info("Received audio upload", extra={"audio_bytes": len(audio_data)})
         
         # Transcribe using 11 Labs (diarization happens once at the end)
         segments = await transcribe_audio_file(
@@ -78,7 +154,7 @@ async def transcribe_audio(
             is_final=True  # Always final since diarization happens at end
         )
         
-        print("HELLO1")
+        logger.info("Transcription completed", extra={"segments": len(segments)})
         if not segments:
             return JSONResponse(
                 status_code=400,
@@ -88,7 +164,6 @@ async def transcribe_audio(
         # Add all segments to meeting state
         state = get_meeting('demo')
         valid_segments = []
-        print("HELLO2")
         
         for seg in segments:
             if seg.text.strip():
@@ -100,7 +175,8 @@ async def transcribe_audio(
                 status_code=400,
                 content={"error": "No valid segments to process"}
             )
-        print(valid_segments)
+        if logger.isEnabledFor(logging.DEBUG) and sample_payload():
+            logger.debug("Valid segments", extra={"payload": [s.model_dump() for s in valid_segments]})
         
         # Process all segments through Gemini immediately (no pause trigger needed)
         # Prepare segments with timestamps for Gemini
@@ -119,42 +195,16 @@ async def transcribe_audio(
         end_ms = max(s.end_ms for s in valid_segments)
         
         # Call Gemini directly with segments
-        from src.services.gemini_client import call_gemini
-        import time
-        import traceback
-        
         try:
-            print("Calling Gemini...")
+            logger.info("Calling Gemini", extra={"segments": len(segments_for_gemini)})
             gemini_output = await call_gemini(segments_for_gemini)
-            print("Gemini call completed")
-            
-            # Validate and fix the output before creating the model
-            # Ensure all required fields are present
-            if "suggestions" in gemini_output:
-                for suggestion in gemini_output["suggestions"]:
-                    if "suggested_message" not in suggestion:
-                        suggestion["suggested_message"] = ""
-            
-            if "amplified_transcript" not in gemini_output:
-                gemini_output["amplified_transcript"] = []
+            logger.info("Gemini call completed")
             
-            # Add "speaker" field to full_transcript items for frontend compatibility
-            if "full_transcript" in gemini_output and isinstance(gemini_output["full_transcript"], list):
-                for entry in gemini_output["full_transcript"]:
-                    if isinstance(entry, dict) and "speaker" not in entry:
-                        entry["speaker"] = entry.get("speaker_id", "unknown")
-            
-            # Create timestamped output with validation
-            timestamped_output = TimestampedGeminiOutput(
-                timestamp_ms=int(time.time() * 1000),
-                start_ms=start_ms,
-                end_ms=end_ms,
-                **gemini_output
-            )
+            # call_gemini already fills defaults; validate its output once here
+            with timed("pydantic_validation"):
+                timestamped_output = TimestampedGeminiOutput.from_gemini(gemini_output, start_ms, end_ms)
         except Exception as gemini_error:
-            error_details = traceback.format_exc()
-            print(f"Gemini processing error: {gemini_error}")
-            print(f"Error details: {error_details}")
+            logger.exception("Gemini processing error: %s", gemini_error)
             return JSONResponse(
                 status_code=500,
                 content={
@@ -168,13 +218,17 @@ async def transcribe_audio(
         state.gemini_outputs.append(timestamped_output)
         state.advance_cutoff()  # Mark all segments as processed
         
-        return {
-            "ok": True,
-            "meeting_id": 'demo',
-            "segments_processed": len(valid_segments),
-            "segments": [seg.model_dump() for seg in valid_segments],
-            "gemini_output": timestamped_output.model_dump()
-        }
+        with timed("response_serialization"):
+            return PydanticJSONResponse(
+                DemoResponse.model_construct(
+                    meeting_id='demo',
+                    segments_processed=len(valid_segments),
+                    segments=valid_segments,
+                    gemini_output=timestamped_output,
+                ),
+                include=include,
+                exclude=exclude,
+            )
         
     except ValueError as e:
         return JSONResponse(
@@ -182,7 +236,8 @@ async def transcribe_audio(
             content={"error": str(e)}
         )
     except Exception as e:
-        print(e)
+        ERRORS.labels("transcription").inc()
+        logger.exception("Transcription failed: %s", e)
         return JSONResponse(
             status_code=500,
             content={"error": f"Transcription failed: {str(e)}"}
@@ -191,15 +246,77 @@ async def transcribe_audio(
 
 @router.post("/control")
 async def control(msg: ControlMessage):
+    bind_context(meeting_id=msg.meeting_id)
     state = get_meeting(msg.meeting_id)
 
     if msg.type == "reset":
         state.clear()
 
     if msg.type == "flush":
-        await run_gemini(state)
+        await analyze(state, supersede=True)
 
     return {"ok": True}
 
 
-# WebSocket endpoint removed - not needed since entire recording is processed at once via API
+@router.websocket("/meetings/{meeting_id}/stream")
+async def stream_audio(websocket: WebSocket, meeting_id: str):
+    """
+    Live transcription over a WebSocket.
+
+    Client -> server:
+        binary frames                      audio (16 kHz mono s16le PCM; with
+                                           STREAM_TRANSCRIBER=chunks, the current
+                                           chunk's recording)
+        {"type": "commit", "end_ms": int}  transcribe the audio sent so far
+        {"type": "end"}                    end of stream
+    Server -> client:
+        {"type": "partial" | "final", "segment": {...}}
+        {"type": "error", "error": "..."}
+
+    Final segments go through the same ingestion as POST /segment.
+    """
+    await websocket.accept()
+    bind_context(meeting_id=meeting_id, job_id=uuid.uuid4().hex[:12])
+    transcriber = create_transcriber(meeting_id)
+
+    async def forward(segments: List[DiarizedSegment], send: bool = True):
+        for seg in segments:
+            await ingest(seg)
+            if send:
+                await websocket.send_text(pydantic_core.to_json({
+                    "type": "final" if seg.is_final else "partial",
+                    "segment": seg,
+                }).decode())
+
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+
+            try:
+                if message.get("bytes") is not None:
+                    await forward(await transcriber.feed(message["bytes"]))
+                    continue
+
+                control = json.loads(message.get("text") or "{}")
+                if control.get("type") == "commit":
+                    await forward(await transcriber.commit(control.get("end_ms")))
+                elif control.get("type") == "end":
+                    await forward(await transcriber.close())
+                    await websocket.close()
+                    return
+            except WebSocketDisconnect:
+                raise
+            except Exception as e:
+                ERRORS.labels("stream").inc()
+                logger.exception("Stream transcription failed: %s", e)
+                await websocket.send_json({"type": "error", "error": str(e)})
+
+    except WebSocketDisconnect:
+        # Keep whatever the client already sent
+        try:
+            await forward(await transcriber.close(), send=False)
+        except Exception as e:
+            ERRORS.labels("stream").inc()
+            logger.exception("Stream flush failed: %s", e)
@@ -1,14 +1,64 @@
 from dotenv import load_dotenv
 load_dotenv()
 
-from fastapi import FastAPI
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request, Response
+from fastapi.middleware.gzip import GZipMiddleware
+from src.services.log import setup_logging
+
+setup_logging()
+
 from src.api.routes import router
+from src.services.config import validate_settings
+from src.services.elevenlabs_service import close_client, start_client
+from src.services.gemini_client import warm_sdk
+from src.services.meeting import pause_triggers
+from src.services.metrics import HTTP_REQUEST_SECONDS, render_metrics
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    validate_settings()
+    start_client()
+    # Import the Gemini SDK in a thread now, so the first analysis doesn't block the loop on it
+    sdk_import = asyncio.create_task(asyncio.to_thread(warm_sdk))
+    yield
+    await sdk_import
+    pause_triggers.close()
+    close_client()
+
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
+
+# Meeting payloads repeat transcript text in every analysis and compress well
+app.add_middleware(GZipMiddleware, minimum_size=1000, compresslevel=6)
 
 app.include_router(router)
 
 
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    start = time.perf_counter()
+    response = await call_next(request)
+    # Label by route template (e.g. /meeting/{meeting_id}) to keep cardinality bounded
+    route = request.scope.get("route")
+    HTTP_REQUEST_SECONDS.labels(
+        request.method,
+        getattr(route, "path", "unmatched"),
+        str(response.status_code),
+    ).observe(time.perf_counter() - start)
+    return response
+
+
 @app.get("/health")
 def health():
     return {"ok": True}
+
+
+@app.get("/metrics")
+def metrics():
+    payload, content_type = render_metrics()
+    return Response(content=payload, media_type=content_type)
@@ -1,3 +1,15 @@
+"""
+API and Gemini output models.
+
+Validation happens once, where data enters the backend: request bodies
+(FastAPI), and Gemini's normalized JSON (TimestampedGeminiOutput.from_gemini).
+Data built from already-validated values skips it: segments from the
+segment store use model_construct, responses wrap existing models with
+model_construct, and stored output snapshots are served as the dicts they
+were dumped to.
+"""
+import time
+
 from pydantic import BaseModel, Field
 from typing import Optional, Literal, Any, Dict
 
@@ -130,6 +142,16 @@ class TimestampedGeminiOutput(GeminiOutput):
     start_ms: int  # Start time of segments processed
     end_ms: int    # End time of segments processed
 
+    @classmethod
+    def from_gemini(cls, output: Dict[str, Any], start_ms: int, end_ms: int) -> "TimestampedGeminiOutput":
+        """Validate a call_gemini result and stamp it with the analyzed segment range."""
+        return cls.model_validate({
+            **output,
+            "timestamp_ms": int(time.time() * 1000),
+            "start_ms": start_ms,
+            "end_ms": end_ms,
+        })
+
 class ControlMessage(BaseModel):
     type: Literal["flush", "reset"]  # flush => force Gemini now; reset => clear buffer
     meeting_id: str
@@ -138,3 +160,10 @@ class MeetingStateResponse(BaseModel):
     meeting_id: str
     segments: list[DiarizedSegment]
     gemini_outputs: list[TimestampedGeminiOutput]
+
+class DemoResponse(BaseModel):
+    ok: bool = True
+    meeting_id: str
+    segments_processed: int
+    segments: list[DiarizedSegment]
+    gemini_output: TimestampedGeminiOutput
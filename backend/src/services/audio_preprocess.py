@@ -0,0 +1,275 @@
+"""
+Audio pre-processing before transcription.
+
+Uploaded recordings (often large webm/wav from the browser) are decoded to
+mono 16 kHz PCM with ffmpeg, an energy VAD (src/services/vad.py) finds the
+speech regions, and only those are encoded as Opus and sent on. The kept
+regions are recorded in a SpeechTimeline so word timestamps returned by
+ElevenLabs can be mapped back onto the original recording. If
+TRANSCRIPTION_CHUNK_SECONDS is set, long recordings are split into chunks of
+at most that length, cut at the quietest moment near each limit, so they can
+be transcribed and retried piecewise.
+
+ffmpeg runs as a child process; a small thread pool bounds how many run at
+once. Without ffmpeg, 16-bit PCM WAV uploads still get silence removal and
+anything else is sent unchanged.
+"""
+import asyncio
+import io
+import logging
+import shutil
+import subprocess
+import wave
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from src.services.config import settings
+from src.services.metrics import FALLBACKS, timed
+from src.services.vad import FRAME_SECONDS, frame_levels_db, speech_regions
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+FFMPEG_TIMEOUT_SECONDS = 600
+# Silence kept on each side of a cut so word onsets and tails are not clipped
+SILENCE_PADDING_SECONDS = 0.25
+# How far before a chunk limit to look for a quiet place to cut
+CHUNK_SEARCH_SECONDS = 10.0
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+@dataclass
+class SpeechTimeline:
+    """
+    Regions of the original recording kept in the processed audio, in seconds.
+
+    The processed audio is the kept regions back to back.
+    """
+    starts: np.ndarray  # original start of each kept region
+    ends: np.ndarray    # original end of each kept region
+
+    def __post_init__(self):
+        # Where each kept region begins in the processed audio
+        self.offsets = np.concatenate(([0.0], np.cumsum(self.ends - self.starts)[:-1]))
+
+    def to_original(self, seconds: np.ndarray) -> np.ndarray:
+        """Map times in the processed audio back onto the original recording."""
+        region = np.searchsorted(self.offsets, seconds, side="right") - 1
+        region = np.clip(region, 0, len(self.offsets) - 1)
+        return seconds - self.offsets[region] + self.starts[region]
+
+
+@dataclass
+class PreparedAudio:
+    chunks: List[bytes]
+    # Start of each chunk in the processed audio, in seconds
+    offsets: List[float]
+    # None when processed timestamps already match the original recording
+    timeline: Optional[SpeechTimeline] = None
+
+    @classmethod
+    def unchanged(cls, audio: bytes) -> "PreparedAudio":
+        return cls([audio], [0.0])
+
+    @property
+    def size(self) -> int:
+        return sum(len(chunk) for chunk in self.chunks)
+
+
+def ffmpeg_binary() -> Optional[str]:
+    """Path of the configured ffmpeg binary, or None if it is not installed."""
+    return shutil.which(settings.ffmpeg_path)
+
+
+def _pool() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.audio_preprocess_workers,
+            thread_name_prefix="ffmpeg",
+        )
+    return _executor
+
+
+def _run_ffmpeg(args: List[str], audio: bytes) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        args,
+        input=audio,
+        capture_output=True,
+        check=True,
+        timeout=FFMPEG_TIMEOUT_SECONDS,
+    )
+
+
+def decode_wav(audio: bytes) -> Optional[Tuple[np.ndarray, int]]:
+    """Mono int16 samples and sample rate of a 16-bit PCM WAV, or None for anything else."""
+    try:
+        with wave.open(io.BytesIO(audio)) as wav:
+            if wav.getsampwidth() != 2:
+                return None
+            channels, rate = wav.getnchannels(), wav.getframerate()
+            pcm = np.frombuffer(wav.readframes(wav.getnframes()), dtype="<i2")
+    except (wave.Error, EOFError):
+        return None
+
+    if channels > 1:
+        pcm = pcm[:len(pcm) - len(pcm) % channels].reshape(-1, channels).mean(axis=1).astype(np.int16)
+    return pcm, rate
+
+
+def encode_wav(pcm: np.ndarray, sample_rate: int) -> bytes:
+    out = io.BytesIO()
+    with wave.open(out, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(pcm.astype("<i2").tobytes())
+    return out.getvalue()
+
+
+def keep_speech(pcm: np.ndarray, sample_rate: int) -> Tuple[np.ndarray, Optional[SpeechTimeline]]:
+    """
+    Drop long silences from pcm.
+
+    Returns the speech samples back to back and their timeline, or pcm and
+    None when there is nothing to cut. Audio with no detected speech at all is
+    kept whole rather than risk discarding a quiet recording.
+    """
+    starts, ends = speech_regions(
+        pcm,
+        sample_rate,
+        threshold_db=settings.silence_threshold_db,
+        min_silence_seconds=settings.silence_min_seconds,
+        padding_seconds=SILENCE_PADDING_SECONDS,
+    )
+    duration = len(pcm) / sample_rate
+    if starts.size == 0 or np.sum(ends - starts) >= duration - FRAME_SECONDS:
+        return pcm, None
+
+    first = (starts * sample_rate).astype(np.int64)
+    last = (ends * sample_rate).astype(np.int64)
+    speech = np.concatenate([pcm[a:b] for a, b in zip(first.tolist(), last.tolist())])
+    return speech, SpeechTimeline(starts, ends)
+
+
+def chunk_starts(
+    pcm: np.ndarray,
+    sample_rate: int,
+    max_seconds: float,
+    search_seconds: float = CHUNK_SEARCH_SECONDS,
+) -> List[int]:
+    """
+    Sample offsets splitting pcm into chunks of at most max_seconds.
+
+    Each cut is placed at the quietest frame in the search_seconds before the
+    limit, so it rarely lands mid-word. max_seconds <= 0 disables chunking.
+    """
+    max_samples = int(max_seconds * sample_rate)
+    if max_samples <= 0 or len(pcm) <= max_samples:
+        return [0]
+
+    frame = max(1, int(sample_rate * FRAME_SECONDS))
+    levels = frame_levels_db(pcm, sample_rate)
+    starts = [0]
+    while len(pcm) - starts[-1] > max_samples:
+        limit = starts[-1] + max_samples
+        first_frame = max(starts[-1], limit - int(search_seconds * sample_rate)) // frame + 1
+        last_frame = limit // frame
+        if last_frame > first_frame:
+            cut = (first_frame + int(np.argmin(levels[first_frame:last_frame]))) * frame
+        else:
+            cut = limit
+        starts.append(max(cut, starts[-1] + 1))
+    return starts
+
+
+def _split(pcm: np.ndarray, sample_rate: int) -> Tuple[List[np.ndarray], List[float]]:
+    starts = chunk_starts(pcm, sample_rate, settings.transcription_chunk_seconds)
+    bounds = starts + [len(pcm)]
+    chunks = [pcm[a:b] for a, b in zip(bounds, bounds[1:])]
+    return chunks, [start / sample_rate for start in starts]
+
+
+def _transcode(ffmpeg: str, audio: bytes) -> PreparedAudio:
+    """Decode to mono 16 kHz PCM, drop long silences, and encode the rest as Opus chunks."""
+    decoded = _run_ffmpeg(
+        [
+            ffmpeg, "-hide_banner", "-loglevel", "error", "-i", "pipe:0", "-vn",
+            "-ac", "1", "-ar", str(SAMPLE_RATE), "-f", "s16le", "pipe:1",
+        ],
+        audio,
+    )
+    pcm, timeline = keep_speech(np.frombuffer(decoded.stdout, dtype="<i2"), SAMPLE_RATE)
+    pieces, offsets = _split(pcm, SAMPLE_RATE)
+
+    chunks = [
+        _run_ffmpeg(
+            [
+                ffmpeg, "-hide_banner", "-loglevel", "error",
+                "-f", "s16le", "-ac", "1", "-ar", str(SAMPLE_RATE), "-i", "pipe:0",
+                "-c:a", "libopus", "-b:a", settings.audio_bitrate,
+                # Same input, same bytes: the Ogg stream serial is random otherwise,
+                # and transcript checkpoints are keyed on the encoded chunk
+                "-fflags", "+bitexact", "-flags:a", "+bitexact",
+                "-f", "ogg", "pipe:1",
+            ],
+            piece.tobytes(),
+        ).stdout
+        for piece in pieces
+    ]
+    return PreparedAudio(chunks, offsets, timeline)
+
+
+def _trim_wav(audio: bytes) -> Optional[PreparedAudio]:
+    """Silence removal and chunking for PCM WAV uploads when ffmpeg is not available."""
+    decoded = decode_wav(audio)
+    if decoded is None:
+        return None
+    pcm, rate = decoded
+    speech, timeline = keep_speech(pcm, rate)
+    pieces, offsets = _split(speech, rate)
+    if timeline is None and len(pieces) == 1:
+        return None
+    return PreparedAudio([encode_wav(piece, rate) for piece in pieces], offsets, timeline)
+
+
+async def preprocess_audio(audio: bytes) -> PreparedAudio:
+    """
+    Compact audio for upload to ElevenLabs, split into chunks if long.
+
+    Falls back to the original bytes as a single chunk when pre-processing is
+    disabled, the audio cannot be decoded, ffmpeg fails, or the result is
+    neither smaller nor chunked.
+    """
+    if not settings.audio_preprocess:
+        return PreparedAudio.unchanged(audio)
+
+    loop = asyncio.get_running_loop()
+    ffmpeg = ffmpeg_binary()
+    if ffmpeg is None:
+        logger.debug("ffmpeg not found at %s; only WAV uploads are trimmed", settings.ffmpeg_path)
+        with timed("audio_preprocess"):
+            prepared = await loop.run_in_executor(_pool(), _trim_wav, audio)
+        return prepared or PreparedAudio.unchanged(audio)
+
+    try:
+        with timed("audio_preprocess"):
+            prepared = await loop.run_in_executor(_pool(), _transcode, ffmpeg, audio)
+    except (subprocess.SubprocessError, OSError) as e:
+        stderr = getattr(e, "stderr", None) or b""
+        logger.warning("Audio pre-processing failed, sending original audio: %s %.300s", e, stderr.decode(errors="replace"))
+        FALLBACKS.labels("audio_preprocess").inc()
+        return PreparedAudio.unchanged(audio)
+
+    if prepared.size >= len(audio) and len(prepared.chunks) == 1:
+        return PreparedAudio.unchanged(audio)
+
+    logger.info(
+        "Pre-processed audio",
+        extra={"audio_bytes": len(audio), "processed_bytes": prepared.size, "chunks": len(prepared.chunks)},
+    )
+    return prepared
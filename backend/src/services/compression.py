@@ -0,0 +1,22 @@
+"""
+Shared zstd compression for cold in-memory data.
+
+One compression context holds several MB of state, so all callers share a
+single compressor and decompressor. Both are only used from the event loop
+thread.
+"""
+import zstandard
+
+COMPRESSION_LEVEL = 3
+
+_compressor = zstandard.ZstdCompressor(level=COMPRESSION_LEVEL)
+_decompressor = zstandard.ZstdDecompressor()
+
+
+def compress(data: bytes) -> bytes:
+    # compress() returns a buffer sized for the worst case; keep an exact-size copy
+    return bytes(memoryview(_compressor.compress(data)))
+
+
+def decompress(data: bytes) -> bytes:
+    return _decompressor.decompress(data)
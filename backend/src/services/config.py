@@ -1,22 +1,104 @@
+import logging
 import os
+from typing import Optional
 from pydantic import BaseModel
 
+logger = logging.getLogger(__name__)
+
 class Settings(BaseModel):
     gemini_api_key: str
     gemini_model: str = "gemini-2.5-flash"  # Default to available model
     pause_trigger_seconds: float = 1.5
+    # Live analysis runs at the latest this long after the first unanalyzed segment,
+    # needs this many new words to fire on a pause, and is spaced by Gemini latency
+    trigger_max_wait_seconds: float = 15.0
+    trigger_min_words: int = 3
+    trigger_latency_factor: float = 1.0
     max_buffer_segments: int = 300
+    # Transcript segmentation: split speaker turns on pauses and cap their length (0 disables)
+    segment_pause_seconds: float = 2.0
+    segment_max_seconds: float = 30.0
+    segment_sentence_boundaries: bool = True
+    # Per-call prompt budget; longer transcripts are analyzed as map-reduce windows.
+    # Kept well below the context window because Gemini echoes the transcript back.
+    gemini_max_prompt_tokens: int = 48000
+    gemini_map_concurrency: int = 4
+    # Register the static instructions with Gemini context caching
+    gemini_context_cache: bool = True
+    gemini_cache_ttl_seconds: int = 3600
+    # Transcode uploads with ffmpeg before transcription (mono, 16 kHz, Opus, long silences cut)
+    audio_preprocess: bool = True
+    ffmpeg_path: str = "ffmpeg"
+    audio_preprocess_workers: int = 2
+    audio_bitrate: str = "24k"
+    silence_threshold_db: float = -40.0
+    silence_min_seconds: float = 2.0
+    # Shared ElevenLabs HTTP client
+    elevenlabs_timeout_seconds: float = 300.0
+    elevenlabs_connect_timeout_seconds: float = 10.0
+    elevenlabs_max_connections: int = 8
+    elevenlabs_max_concurrency: int = 4
+    # Split long recordings into chunks of this many seconds (0 disables). Chunks are
+    # diarized separately, so their speakers get per-chunk ids. Each request is retried.
+    transcription_chunk_seconds: float = 0.0
+    transcription_max_retries: int = 3
+    transcription_retry_base_seconds: float = 1.0
+    # Opt-in: keep each chunk's transcript here until its recording is fully transcribed,
+    # so a failed upload can be resubmitted; entries older than the TTL are removed
+    transcription_checkpoint_dir: Optional[str] = None
+    transcription_checkpoint_ttl_seconds: float = 86400.0
+    # Live stream transcription: "realtime" (16 kHz PCM frames, partial results) or
+    # "chunks" (batch-transcribe each committed recording, diarized per chunk)
+    stream_transcriber: str = "realtime"
+    elevenlabs_realtime_model: str = "scribe_v2_realtime"
+    # Override API endpoints, e.g. to point at benchmarks/stub_server.py
+    gemini_base_url: Optional[str] = None
+    elevenlabs_base_url: Optional[str] = None
 
 settings = Settings(
     gemini_api_key=os.getenv("GEMINI_API_KEY", ""),
     gemini_model=os.getenv("GEMINI_MODEL", "gemini-2.5-flash"),  # Default to available model
     pause_trigger_seconds=float(os.getenv("PAUSE_TRIGGER_SECONDS", "1.5")),
+    trigger_max_wait_seconds=float(os.getenv("TRIGGER_MAX_WAIT_SECONDS", "15")),
+    trigger_min_words=int(os.getenv("TRIGGER_MIN_WORDS", "3")),
+    trigger_latency_factor=float(os.getenv("TRIGGER_LATENCY_FACTOR", "1.0")),
     max_buffer_segments=int(os.getenv("MAX_BUFFER_SEGMENTS", "300")),
+    segment_pause_seconds=float(os.getenv("SEGMENT_PAUSE_SECONDS", "2.0")),
+    segment_max_seconds=float(os.getenv("SEGMENT_MAX_SECONDS", "30.0")),
+    segment_sentence_boundaries=os.getenv("SEGMENT_SENTENCE_BOUNDARIES", "true").lower() == "true",
+    gemini_max_prompt_tokens=int(os.getenv("GEMINI_MAX_PROMPT_TOKENS", "48000")),
+    gemini_map_concurrency=int(os.getenv("GEMINI_MAP_CONCURRENCY", "4")),
+    gemini_context_cache=os.getenv("GEMINI_CONTEXT_CACHE", "true").lower() == "true",
+    gemini_cache_ttl_seconds=int(os.getenv("GEMINI_CACHE_TTL_SECONDS", "3600")),
+    audio_preprocess=os.getenv("AUDIO_PREPROCESS", "true").lower() == "true",
+    ffmpeg_path=os.getenv("FFMPEG_PATH", "ffmpeg"),
+    audio_preprocess_workers=int(os.getenv("AUDIO_PREPROCESS_WORKERS", "2")),
+    audio_bitrate=os.getenv("AUDIO_BITRATE", "24k"),
+    silence_threshold_db=float(os.getenv("SILENCE_THRESHOLD_DB", "-40")),
+    silence_min_seconds=float(os.getenv("SILENCE_MIN_SECONDS", "2.0")),
+    elevenlabs_timeout_seconds=float(os.getenv("ELEVENLABS_TIMEOUT_SECONDS", "300")),
+    elevenlabs_connect_timeout_seconds=float(os.getenv("ELEVENLABS_CONNECT_TIMEOUT_SECONDS", "10")),
+    elevenlabs_max_connections=int(os.getenv("ELEVENLABS_MAX_CONNECTIONS", "8")),
+    elevenlabs_max_concurrency=int(os.getenv("ELEVENLABS_MAX_CONCURRENCY", "4")),
+    transcription_chunk_seconds=float(os.getenv("TRANSCRIPTION_CHUNK_SECONDS", "0")),
+    transcription_max_retries=int(os.getenv("TRANSCRIPTION_MAX_RETRIES", "3")),
+    transcription_retry_base_seconds=float(os.getenv("TRANSCRIPTION_RETRY_BASE_SECONDS", "1.0")),
+    transcription_checkpoint_dir=os.getenv("TRANSCRIPTION_CHECKPOINT_DIR") or None,
+    transcription_checkpoint_ttl_seconds=float(os.getenv("TRANSCRIPTION_CHECKPOINT_TTL_SECONDS", "86400")),
+    stream_transcriber=os.getenv("STREAM_TRANSCRIBER", "realtime"),
+    elevenlabs_realtime_model=os.getenv("ELEVENLABS_REALTIME_MODEL", "scribe_v2_realtime"),
+    gemini_base_url=os.getenv("GEMINI_BASE_URL") or None,
+    elevenlabs_base_url=os.getenv("ELEVENLABS_BASE_URL") or None,
 )
 
-# Only raise error if not in test mode
-if not settings.gemini_api_key and "pytest" not in os.environ.get("_", ""):
-    # Check if we're running tests by checking if pytest is in the call stack
-    import sys
-    if "pytest" not in " ".join(sys.argv):
+
+
+def validate_settings():
+    """
+    Fail fast on missing configuration. Called from the app's startup hook
+    rather than at import, so tools and tests can import the code without keys.
+    """
+    if not settings.gemini_api_key:
         raise RuntimeError("Missing GEMINI_API_KEY")
+    if not os.getenv("ELEVENLABS_API_KEY"):
+        logger.warning("ELEVENLABS_API_KEY is not set; audio transcription will fail")
@@ -3,23 +3,60 @@ Service to integrate 11 Labs speech-to-text with the meeting workflow.
 """
 import os
 import asyncio
-from typing import List, Optional
+import logging
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Callable, List, Optional, Tuple, Union
 
-from elevenlabs.client import ElevenLabs
+import httpx
+import orjson
 from src.models.schemas import DiarizedSegment
+from src.services.audio_preprocess import SpeechTimeline, preprocess_audio
+from src.services.config import settings
+from src.services.metrics import FALLBACKS, timed
+from src.services.segmentation import (
+    SegmentationPolicy,
+    WordColumns,
+    columns_from_word_dicts,
+    columns_from_word_objects,
+    concat_columns,
+    segment_words,
+)
+from src.services.transcript_checkpoint import TranscriptCheckpoint, chunk_key
 
+if TYPE_CHECKING:
+    # The SDK is slow to import and only needed when a caller passes a client
+    from elevenlabs.client import ElevenLabs
 
-def normalize_speaker_id(speaker_id: str) -> str:
-    """Normalize 11 Labs speaker_id to our format (speaker_0 -> spk_0)"""
-    if speaker_id.startswith("speaker_"):
-        return speaker_id.replace("speaker_", "spk_")
-    return speaker_id
+logger = logging.getLogger(__name__)
+
+ELEVENLABS_API_URL = "https://api.elevenlabs.io"
+# Part of the checkpoint key: a change here must not reuse old transcripts
+TRANSCRIPTION_PARAMS = "model_id=scribe_v2;tag_audio_events=true;language_code=eng;diarize=true"
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+# Process-wide HTTP client and request pool, created at app startup (or on first use)
+_http_client: Optional[httpx.Client] = None
+_request_pool: Optional[ThreadPoolExecutor] = None
+_client_lock = threading.Lock()
+
+
+def segmentation_policy() -> SegmentationPolicy:
+    """Segmentation limits from settings."""
+    return SegmentationPolicy(
+        pause_seconds=settings.segment_pause_seconds,
+        max_duration_seconds=settings.segment_max_seconds,
+        sentence_boundaries=settings.segment_sentence_boundaries,
+    )
 
 
 def transform_elevenlabs_transcription_to_segments(
-    transcription_data: dict,
+    transcription_data: Union[dict, bytes, Any],
     meeting_id: str,
-    is_final: bool = True
+    is_final: bool = True,
+    policy: Optional[SegmentationPolicy] = None,
+    timeline: Optional[SpeechTimeline] = None,
 ) -> List[DiarizedSegment]:
     """
     Transform 11 Labs transcription output to DiarizedSegment format.
@@ -42,191 +79,274 @@ def transform_elevenlabs_transcription_to_segments(
             ...
         ]
     }
+
+    Also accepts the raw JSON response body, or the SDK response model, in
+    which case words are read from the SDK objects without a dict round-trip.
+
+    Segments split on speaker change and per policy (defaults to settings).
+    If the audio had silences cut out, timeline maps word times back onto the
+    original recording.
     """
-    if not transcription_data or "words" not in transcription_data:
+    parsed = transcription_columns(transcription_data)
+    if parsed is None:
         return []
-    
-    words = transcription_data.get("words", [])
-    if not words:
-        return []
-    
-    # Group words by speaker
-    segments = []
-    current_segment_words = []
-    current_speaker = None
-    current_start = None
-    
-    for word in words:
-        # Skip spacing-only words for speaker grouping
-        if word.get("type") == "spacing":
-            if current_segment_words:
-                current_segment_words.append(word)
-            continue
-        
-        word_speaker = word.get("speaker_id")
-        
-        # If speaker changes, finalize current segment and start new one
-        if current_speaker is not None and word_speaker != current_speaker:
-            if current_segment_words:
-                segment = _create_segment_from_words(
-                    current_segment_words,
-                    current_speaker,
-                    meeting_id,
-                    is_final,
-                    transcription_data.get("language_probability")
-                )
-                if segment:
-                    segments.append(segment)
-            
-            current_segment_words = [word]
-            current_speaker = word_speaker
-            current_start = word.get("start")
-        else:
-            if current_speaker is None:
-                current_speaker = word_speaker
-                current_start = word.get("start")
-            current_segment_words.append(word)
-    
-    # Add the last segment
-    if current_segment_words:
-        segment = _create_segment_from_words(
-            current_segment_words,
-            current_speaker,
-            meeting_id,
-            is_final,
-            transcription_data.get("language_probability")
-        )
-        if segment:
-            segments.append(segment)
-    
-    return segments
+    columns, confidence = parsed
+    return segments_from_columns(columns, meeting_id, is_final, confidence, policy, timeline)
 
 
-def _create_segment_from_words(
-    words: List[dict],
-    speaker_id: str,
-    meeting_id: str,
-    is_final: bool,
-    confidence: Optional[float]
-) -> Optional[DiarizedSegment]:
-    """Create a DiarizedSegment from a list of words."""
-    if not words:
-        return None
-    
-    # Filter content words for timing
-    content_words = [w for w in words if w.get("type") == "word"]
-    if not content_words:
+def transcription_columns(transcription_data: Union[dict, bytes, Any]) -> Optional[Tuple[WordColumns, Optional[float]]]:
+    """Word columns and language probability of a response, or None if it has no words."""
+    if not transcription_data:
         return None
-    
-    # Get speaker and normalize
-    fallback_speaker = content_words[0].get("speaker_id") if content_words else None
-    final_speaker_id = speaker_id or fallback_speaker or "spk_0"
-    speaker = normalize_speaker_id(final_speaker_id)
-    
-    # Calculate timing from content words
-    start_seconds = min(w.get("start", 0) for w in content_words)
-    end_seconds = max(w.get("end", 0) for w in content_words)
-    
-    # Convert to milliseconds
-    start_ms = int(start_seconds * 1000)
-    end_ms = int(end_seconds * 1000)
-    
-    # Build text from all words (including spacing)
-    text = "".join(w.get("text", "") for w in words).strip()
-    
-    if not text:
+
+    if isinstance(transcription_data, (bytes, bytearray, memoryview, str)):
+        transcription_data = orjson.loads(transcription_data)
+
+    if isinstance(transcription_data, dict):
+        words = transcription_data.get("words") or []
+        confidence = transcription_data.get("language_probability")
+        to_columns = columns_from_word_dicts
+    else:
+        words = getattr(transcription_data, "words", None) or []
+        confidence = getattr(transcription_data, "language_probability", None)
+        to_columns = columns_from_word_objects
+
+    if not words:
         return None
+    return to_columns(words), confidence
+
+
+def segments_from_columns(
+    columns: WordColumns,
+    meeting_id: str,
+    is_final: bool = True,
+    confidence: Optional[float] = None,
+    policy: Optional[SegmentationPolicy] = None,
+    timeline: Optional[SpeechTimeline] = None,
+) -> List[DiarizedSegment]:
+    if timeline is not None:
+        columns.start = timeline.to_original(columns.start)
+        columns.end = timeline.to_original(columns.end)
     
-    return DiarizedSegment(
+    # Segment in bulk on parallel word arrays
+    return segment_words(
+        columns,
         meeting_id=meeting_id,
-        speaker=speaker,
-        start_ms=start_ms,
-        end_ms=end_ms,
-        text=text,
         is_final=is_final,
-        confidence=confidence
+        confidence=confidence,
+        policy=policy or segmentation_policy(),
+    )
+
+
+def start_client():
+    """
+    Create the shared ElevenLabs HTTP client and request pool.
+
+    Connections are kept alive across uploads. The pool's worker count caps
+    concurrent transcription requests at ELEVENLABS_MAX_CONCURRENCY.
+    """
+    global _http_client, _request_pool
+    with _client_lock:
+        if _http_client is None:
+            _http_client = httpx.Client(
+                base_url=(settings.elevenlabs_base_url or ELEVENLABS_API_URL).rstrip("/"),
+                timeout=httpx.Timeout(
+                    settings.elevenlabs_timeout_seconds,
+                    connect=settings.elevenlabs_connect_timeout_seconds,
+                ),
+                limits=httpx.Limits(
+                    max_connections=settings.elevenlabs_max_connections,
+                    max_keepalive_connections=settings.elevenlabs_max_connections,
+                ),
+            )
+        if _request_pool is None:
+            _request_pool = ThreadPoolExecutor(
+                max_workers=settings.elevenlabs_max_concurrency,
+                thread_name_prefix="elevenlabs",
+            )
+
+
+def close_client():
+    """Close pooled connections; called at app shutdown."""
+    global _http_client, _request_pool
+    with _client_lock:
+        if _http_client is not None:
+            _http_client.close()
+            _http_client = None
+        if _request_pool is not None:
+            _request_pool.shutdown(wait=False)
+            _request_pool = None
+
+
+def get_http_client() -> httpx.Client:
+    if _http_client is None:
+        start_client()
+    return _http_client
+
+
+def _get_request_pool() -> ThreadPoolExecutor:
+    if _request_pool is None:
+        start_client()
+    return _request_pool
+
+
+def _convert_raw(api_key: str, audio_data: bytes) -> bytes:
+    """
+    Call the speech-to-text endpoint and return the undecoded JSON body.
+
+    The SDK builds a model object per word, which dominates the cost for long
+    recordings; the raw body is parsed with orjson and read into columns instead.
+    """
+    response = get_http_client().post(
+        "/v1/speech-to-text",
+        headers={"xi-api-key": api_key},
+        data={
+            "model_id": "scribe_v2",
+            "tag_audio_events": "true",
+            "language_code": "eng",  # Can be omitted for auto-detection
+            "diarize": "true",
+        },
+        files={"file": audio_data},
     )
+    response.raise_for_status()
+    return response.content
+
+
+def _checkpoint() -> Optional[TranscriptCheckpoint]:
+    """The checkpoint directory, with stale entries expired, or None if checkpointing is off."""
+    if not settings.transcription_checkpoint_dir:
+        return None
+    checkpoint = TranscriptCheckpoint(settings.transcription_checkpoint_dir)
+    if settings.transcription_checkpoint_ttl_seconds > 0:
+        checkpoint.expire(settings.transcription_checkpoint_ttl_seconds)
+    return checkpoint
+
+
+def _delete_checkpoints(checkpoint: TranscriptCheckpoint, chunks: List[bytes]):
+    for chunk in chunks:
+        checkpoint.delete(chunk_key(chunk, TRANSCRIPTION_PARAMS))
+
+
+def _is_retryable(error: Exception) -> bool:
+    """Network failures, timeouts, rate limits and 5xx responses are worth retrying."""
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in RETRYABLE_STATUS
+    if isinstance(error, httpx.TransportError):
+        return True
+    # SDK ApiError carries the status code
+    return getattr(error, "status_code", None) in RETRYABLE_STATUS
+
+
+async def _with_retries(request: Callable[[], Any]) -> Any:
+    """Run a blocking request in the request pool, retrying transient errors with exponential backoff."""
+    loop = asyncio.get_event_loop()
+    attempt = 0
+    while True:
+        try:
+            with timed("elevenlabs_transcription"):
+                return await loop.run_in_executor(_get_request_pool(), request)
+        except Exception as e:
+            if attempt >= settings.transcription_max_retries or not _is_retryable(e):
+                raise
+            delay = settings.transcription_retry_base_seconds * 2 ** attempt
+            delay += random.uniform(0, delay / 2)
+            attempt += 1
+            logger.warning("Transcription attempt %d failed, retrying in %.1fs: %.200s", attempt, delay, e)
+            FALLBACKS.labels("transcription_retry").inc()
+            await asyncio.sleep(delay)
+
+
+async def _transcribe_chunk(
+    chunk: bytes,
+    request: Callable[[bytes], Any],
+    checkpoint: Optional[TranscriptCheckpoint],
+) -> Any:
+    """Transcribe one chunk, reusing a checkpointed response if there is one."""
+    key = chunk_key(chunk, TRANSCRIPTION_PARAMS) if checkpoint else None
+    if checkpoint:
+        body = await asyncio.to_thread(checkpoint.get, key)
+        if body is not None:
+            logger.info("Reusing checkpointed transcript", extra={"audio_bytes": len(chunk)})
+            return body
+
+    response = await _with_retries(lambda: request(chunk))
+
+    # Only raw response bodies are checkpointed; SDK objects are used as-is
+    if checkpoint and isinstance(response, bytes):
+        await asyncio.to_thread(checkpoint.put, key, response)
+    return response
 
 
 async def transcribe_audio_file(
     audio_data: bytes,
     meeting_id: str,
-    elevenlabs_client: Optional[ElevenLabs] = None,
+    elevenlabs_client: Optional["ElevenLabs"] = None,
     is_final: bool = True
 ) -> List[DiarizedSegment]:
     """
     Transcribe audio file using 11 Labs and convert to DiarizedSegments.
+
+    Long recordings are transcribed as chunks. Each chunk is retried on
+    transient errors and, if TRANSCRIPTION_CHECKPOINT_DIR is set, checkpointed
+    until the whole recording is transcribed, so a failed upload can be
+    resubmitted without re-transcribing finished chunks.
+    ElevenLabs diarizes each chunk separately, so speakers are never merged
+    across chunks: a recording split into chunks (TRANSCRIPTION_CHUNK_SECONDS,
+    off by default) gets per-chunk speaker ids such as "spk_0_c1".
     
     Args:
         audio_data: Audio file bytes
         meeting_id: Meeting ID for the segments
-        elevenlabs_client: Optional pre-initialized ElevenLabs client
+        elevenlabs_client: Optional pre-initialized ElevenLabs client; without
+            one the API is called directly and the raw JSON response is used
         is_final: Whether this is a final transcription chunk
     
     Returns:
         List of DiarizedSegment objects
     """
-    
-    # Initialize client if not provided
     if elevenlabs_client is None:
         api_key = os.getenv("ELEVENLABS_API_KEY")
         if not api_key:
             raise ValueError("ELEVENLABS_API_KEY environment variable is required")
-        elevenlabs_client = ElevenLabs(api_key=api_key)
     
-    # Convert audio to transcription (run in thread pool since it's blocking)
-    loop = asyncio.get_event_loop()
-    transcription = await loop.run_in_executor(
-        None,
-        lambda: elevenlabs_client.speech_to_text.convert(
-            file=audio_data,
+    # Smaller upload: mono 16 kHz Opus with long silences cut
+    prepared = await preprocess_audio(audio_data)
+
+    if elevenlabs_client is None:
+        request = lambda chunk: _convert_raw(api_key, chunk)
+    else:
+        request = lambda chunk: elevenlabs_client.speech_to_text.convert(
+            file=chunk,
             model_id="scribe_v2",
             tag_audio_events=True,
             language_code="eng",  # Can be None for auto-detection
             diarize=True,
         )
-    )
     
-    # Convert transcription to dict
-    transcription_dict = {}
-    if hasattr(transcription, "model_dump"):
-        transcription_dict = transcription.model_dump()
-    elif hasattr(transcription, "dict"):
-        transcription_dict = transcription.dict()
-    else:
-        # Try to access attributes directly
-        words = getattr(transcription, "words", [])
-        # Convert word objects to dicts if needed
-        words_list = []
-        for word in words:
-            if hasattr(word, "model_dump"):
-                words_list.append(word.model_dump())
-            elif hasattr(word, "dict"):
-                words_list.append(word.dict())
-            elif isinstance(word, dict):
-                words_list.append(word)
-            else:
-                # Try to access as attributes
-                words_list.append({
-                    "text": getattr(word, "text", ""),
-                    "start": getattr(word, "start", 0.0),
-                    "end": getattr(word, "end", 0.0),
-                    "type": getattr(word, "type", "word"),
-                    "speaker_id": getattr(word, "speaker_id", "speaker_0"),
-                    "logprob": getattr(word, "logprob", 0.0),
-                    "characters": getattr(word, "characters", None),
-                })
-        
-        transcription_dict = {
-            "text": getattr(transcription, "text", ""),
-            "words": words_list,
-            "language_code": getattr(transcription, "language_code", "eng"),
-            "language_probability": getattr(transcription, "language_probability", 1.0),
-        }
+    # Checkpoint files are read and written off the event loop
+    checkpoint = await asyncio.to_thread(_checkpoint)
+    responses = await asyncio.gather(*(_transcribe_chunk(chunk, request, checkpoint) for chunk in prepared.chunks))
+    # Every chunk is done; the checkpoints were only needed to resume a failed upload
+    if checkpoint:
+        await asyncio.to_thread(_delete_checkpoints, checkpoint, prepared.chunks)
     
     # Transform to segments
-    return transform_elevenlabs_transcription_to_segments(
-        transcription_dict,
-        meeting_id=meeting_id,
-        is_final=is_final
-    )
+    with timed("segment_transform"):
+        parts, offsets, chunk_ids, confidence = [], [], [], None
+        for chunk_id, (response, offset) in enumerate(zip(responses, prepared.offsets)):
+            parsed = transcription_columns(response)
+            if parsed is None:
+                continue
+            parts.append(parsed[0])
+            offsets.append(offset)
+            chunk_ids.append(chunk_id)
+            confidence = parsed[1] if confidence is None else confidence
+        if not parts:
+            return []
+        return segments_from_columns(
+            concat_columns(parts, offsets, chunk_ids),
+            meeting_id=meeting_id,
+            is_final=is_final,
+            confidence=confidence,
+            timeline=prepared.timeline,
+        )
@@ -0,0 +1,119 @@
+"""
+Gemini context caching for the static system instructions.
+
+The instruction block is registered once per model with Gemini's cached-content
+API so each analysis only sends the transcript. Entries are renewed before
+their TTL runs out, and models that reject caching (unsupported model, prompt
+below the minimum cacheable size, quota) fall back to sending the instructions
+as a plain system instruction.
+"""
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Renew an entry when it has less than this left before expiry
+RENEW_MARGIN_SECONDS = 300
+# How long to wait before retrying a model that failed to create a cache
+UNSUPPORTED_RETRY_SECONDS = 600
+
+
+@dataclass
+class _CacheEntry:
+    name: str
+    expires_at: float
+
+
+class InstructionCache:
+    """
+    Process-wide registry of cached-content entries, one per model.
+
+    Used from executor threads, so all bookkeeping is guarded by a lock. The
+    create and update requests run outside it: one thread refreshes a model's
+    entry while the others keep using the current entry, or send the
+    instructions uncached, instead of queueing behind a slow request.
+    """
+
+    def __init__(self, system_instruction: str, ttl_seconds: int):
+        self.system_instruction = system_instruction
+        self.ttl_seconds = ttl_seconds
+        self._entries: Dict[str, _CacheEntry] = {}
+        self._unsupported_until: Dict[str, float] = {}
+        # Models whose entry is being created or renewed by some thread
+        self._refreshing: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def get(self, client, model: str) -> Optional[str]:
+        """Return the cached-content name for model, creating or renewing it as needed."""
+        with self._lock:
+            now = time.monotonic()
+
+            if self._unsupported_until.get(model, 0) > now:
+                return None
+
+            entry = self._entries.get(model)
+            if entry and now < entry.expires_at - RENEW_MARGIN_SECONDS:
+                return entry.name
+
+            if model in self._refreshing:
+                return entry.name if entry and now < entry.expires_at else None
+            self._refreshing.add(model)
+
+        try:
+            return self._refresh(client, model, entry)
+        finally:
+            with self._lock:
+                self._refreshing.discard(model)
+
+    def _refresh(self, client, model: str, entry: Optional[_CacheEntry]) -> Optional[str]:
+        """Renew entry if it is still live, otherwise create a new one. Runs without the lock."""
+        from google.genai import types
+
+        now = time.monotonic()
+        if entry and now < entry.expires_at:
+            try:
+                client.caches.update(
+                    name=entry.name,
+                    config=types.UpdateCachedContentConfig(ttl=f"{self.ttl_seconds}s"),
+                )
+                with self._lock:
+                    entry.expires_at = now + self.ttl_seconds
+                return entry.name
+            except Exception as e:
+                logger.warning("Could not renew instruction cache for %s: %.200s", model, e)
+                with self._lock:
+                    if self._entries.get(model) is entry:
+                        del self._entries[model]
+
+        try:
+            cached = client.caches.create(
+                model=model,
+                config=types.CreateCachedContentConfig(
+                    system_instruction=self.system_instruction,
+                    ttl=f"{self.ttl_seconds}s",
+                    display_name="levelus-instructions",
+                ),
+            )
+        except Exception as e:
+            logger.info("Context caching unavailable for %s: %.200s", model, e)
+            with self._lock:
+                self._entries.pop(model, None)
+                self._unsupported_until[model] = now + UNSUPPORTED_RETRY_SECONDS
+            return None
+
+        with self._lock:
+            self._entries[model] = _CacheEntry(name=cached.name, expires_at=now + self.ttl_seconds)
+        return cached.name
+
+    def invalidate(self, model: str):
+        """Forget the entry for model, e.g. after the server rejected it."""
+        with self._lock:
+            self._entries.pop(model, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._unsupported_until.clear()
@@ -1,30 +1,27 @@
 import json
 import asyncio
-from typing import Any, Dict
-from google import genai
+import contextvars
+import functools
+import logging
+import textwrap
+import threading
+import time
+from typing import Any, Dict, List, Optional
 from .config import settings
+from .gemini_cache import InstructionCache
+from .gemini_reduce import count_actions, reduce_outputs
+from .log import model_var, sample_payload
+from .metrics import ERRORS, FALLBACKS, GEMINI_CALL_SECONDS, timed
+from .prompt_budget import estimate_tokens, split_into_windows
 
-def build_prompt(segments_with_timestamps: list) -> str:
-    """
-    Build prompt for Gemini with full transcript including timestamps.
-    
-    segments_with_timestamps: List of dicts with {speaker, start_ms, end_ms, text}
-    """
-    # Build full transcript with timestamps
-    transcript_lines = []
-    for seg in segments_with_timestamps:
-        start_sec = seg['start_ms'] / 1000.0
-        end_sec = seg['end_ms'] / 1000.0
-        transcript_lines.append(
-            f"[{start_sec:.2f}s-{end_sec:.2f}s] {seg['speaker']}: {seg['text']}"
-        )
-    
-    transcript_text = "\n".join(transcript_lines)
-    
-    # Build diarized text for analysis
-    diarized_text = "\n".join([f"[{s['speaker']}] {s['text']}" for s in segments_with_timestamps])
-    
-    return f"""
+logger = logging.getLogger(__name__)
+
+# Gemini 2.5 models accept up to ~1M input tokens
+GEMINI_CONTEXT_TOKENS = 1_000_000
+
+# Static instructions, identical for every call. Built once at import and kept
+# ahead of the transcript so the prompt prefix is stable (and cacheable).
+SYSTEM_INSTRUCTIONS = textwrap.dedent("""
     You are an AI meeting equity assistant and facilitator.
 
     Your purpose is to analyze meetings to identify and reduce unequal participation,
@@ -48,16 +45,6 @@ def build_prompt(segments_with_timestamps: list) -> str:
 
     --------------------------------------------------
 
-    INPUT DATA:
-
-    Full transcript:
-    {transcript_text}
-
-    Diarized transcript:
-    {diarized_text}
-
-    --------------------------------------------------
-
     SPEAKER IDENTIFICATION TASK:
 
     If speakers introduce themselves (e.g., "Hi, I'm Sarah", "This is John speaking"):
@@ -116,42 +103,42 @@ def build_prompt(segments_with_timestamps: list) -> str:
 
     Return exactly this JSON schema:
 
-    {{
+    {
     "summary": string,
 
     "decisions": string[],
 
     "action_items": [
-        {{
+        {
         "owner": string|null,
         "item": string,
         "due": string|null
-        }}
+        }
     ],
 
     "important_points": string[],
 
-    "meeting_statistics": {{
+    "meeting_statistics": {
         "total_duration_seconds": number,
         "total_speakers": number,
 
-        "speaking_time_by_speaker": {{
+        "speaking_time_by_speaker": {
         "speaker_name": number
-        }},
+        },
 
         "total_words": number,
 
-        "words_by_speaker": {{
+        "words_by_speaker": {
         "speaker_name": number
-        }},
+        },
 
         "interruptions_count": number,
 
         "average_turn_length_seconds": number
-    }},
+    },
 
     "inequalities": [
-        {{
+        {
         "type": "interruption"
                 | "idea_ignored"
                 | "idea_taken"
@@ -166,20 +153,20 @@ def build_prompt(segments_with_timestamps: list) -> str:
         "timestamp_ms": number,
 
         "context": string
-        }}
+        }
     ],
 
     "full_transcript": [
-        {{
+        {
         "speaker": string,
         "start_ms": number,
         "end_ms": number,
         "text": string
-        }}
+        }
     ],
 
     "amplified_transcript": [
-        {{
+        {
         "speaker": string,
         "start_ms": number,
         "end_ms": number,
@@ -187,11 +174,11 @@ def build_prompt(segments_with_timestamps: list) -> str:
         "original_text": string,
 
         "highlighted_text": string
-        }}
+        }
     ],
 
     "suggestions": [
-        {{
+        {
         "action":
             "invite_quiet_people"
         | "credit_original_idea_person"
@@ -209,9 +196,9 @@ def build_prompt(segments_with_timestamps: list) -> str:
         "target_speaker": string|null,
 
         "suggested_message": string
-        }}
+        }
     ]
-    }}
+    }
 
     IMPORTANT:
 
@@ -223,7 +210,64 @@ def build_prompt(segments_with_timestamps: list) -> str:
     - If no inequalities exist, return []
 
     Return ONLY the JSON object.
+""").strip()
+
+TRANSCRIPT_HEADER = (
+    "--------------------------------------------------\n\n"
+    "INPUT DATA:\n\n"
+    "Transcript, one segment per line: <speaker code> <start_ms> <end_ms> <text>\n"
+    "Speaker codes are defined in the legend. Always use the original speaker ids "
+    "from the legend in the output, never the codes."
+)
+
+
+INSTRUCTION_TOKENS = estimate_tokens(SYSTEM_INSTRUCTIONS)
+
+instruction_cache = InstructionCache(SYSTEM_INSTRUCTIONS, settings.gemini_cache_ttl_seconds)
+
+
+def speaker_codes(segments_with_timestamps: list) -> Dict[str, str]:
+    """
+    Map each speaker id to a short code (S0, S1, ...) in order of first appearance.
+
+    Codes that are also speaker ids are skipped, so restoring the codes in
+    Gemini's output cannot swap a speaker literally named "S1" with another.
+    """
+    speakers = list(dict.fromkeys(seg['speaker'] for seg in segments_with_timestamps))
+    taken = set(speakers)
+    codes: Dict[str, str] = {}
+    number = 0
+    for speaker in speakers:
+        while f"S{number}" in taken:
+            number += 1
+        codes[speaker] = f"S{number}"
+        number += 1
+    return codes
+
+
+def build_transcript_block(segments_with_timestamps: list) -> str:
+    """
+    Build the per-call part of the prompt: a compact transcript encoding.
+    
+    Each segment is one line with a speaker short code and integer millisecond
+    timestamps, e.g. "S0 1200 3400 Hello everyone".
+    """
+    codes = speaker_codes(segments_with_timestamps)
+    legend = ", ".join(f"{code}={speaker}" for speaker, code in codes.items())
+    lines = "\n".join([
+        f"{codes[seg['speaker']]} {seg['start_ms']} {seg['end_ms']} {seg['text']}"
+        for seg in segments_with_timestamps
+    ])
+    return f"{TRANSCRIPT_HEADER}\n\nLegend: {legend}\n\n{lines}"
+
+
+def build_prompt(segments_with_timestamps: list) -> str:
+    """
+    Build prompt for Gemini with full transcript including timestamps.
+    
+    segments_with_timestamps: List of dicts with {speaker, start_ms, end_ms, text}
     """
+    return f"{SYSTEM_INSTRUCTIONS}\n\n{build_transcript_block(segments_with_timestamps)}"
 
 
 async def call_gemini(segments_with_timestamps: list) -> Dict[str, Any]:
@@ -232,12 +276,71 @@ async def call_gemini(segments_with_timestamps: list) -> Dict[str, Any]:
     
     Based on official documentation: https://ai.google.dev/gemini-api/docs/text-generation
     
+    Transcripts whose estimated prompt exceeds settings.gemini_max_prompt_tokens
+    are split into windows on speaker-turn boundaries, analyzed concurrently and
+    reduced into a single result.
+    
     Args:
         segments_with_timestamps: List of dicts with keys: speaker, start_ms, end_ms, text
     """
-    # Initialize the client - API key can be passed or read from env
-    client = genai.Client(api_key=settings.gemini_api_key)
+    try:
+        return await _call_gemini(segments_with_timestamps)
+    except Exception:
+        # Counted once per analysis, however many windows or models it tried
+        ERRORS.labels("gemini").inc()
+        raise
+
+
+async def _call_gemini(segments_with_timestamps: list) -> Dict[str, Any]:
+    # Off the event loop: the first call imports the SDK, which takes about a second
+    client = await asyncio.to_thread(_new_client)
+    models_to_try = _models_to_try()
+    
+    window_budget = max(settings.gemini_max_prompt_tokens - _instruction_tokens(), 1)
+    windows = split_into_windows(segments_with_timestamps, window_budget, _segment_tokens)
     
+    if len(windows) <= 1:
+        return await _analyze_window(client, models_to_try, segments_with_timestamps)
+    
+    logger.info("Transcript exceeds prompt budget, analyzing %d windows", len(windows))
+    FALLBACKS.labels("map_reduce").inc()
+    
+    # Bound the number of concurrent Gemini calls
+    semaphore = asyncio.Semaphore(settings.gemini_map_concurrency)
+    
+    async def analyze(window: list) -> Dict[str, Any]:
+        async with semaphore:
+            return await _analyze_window(client, models_to_try, window)
+    
+    tasks = [asyncio.ensure_future(analyze(window)) for window in windows]
+    try:
+        results = await asyncio.gather(*tasks)
+    except Exception:
+        # One failed window fails the analysis; stop spending tokens on the others
+        for task in tasks:
+            task.cancel()
+        raise
+    return reduce_outputs(list(results), windows)
+
+
+def warm_sdk():
+    """Import the Gemini SDK ahead of the first analysis; blocking, so run it in a thread."""
+    try:
+        from google import genai  # noqa: F401
+    except Exception as e:
+        logger.warning("Could not import the Gemini SDK: %s", e)
+
+
+def _new_client():
+    """Build a Gemini client. The SDK is imported here because it is slow to import."""
+    from google import genai
+
+    http_options = {"base_url": settings.gemini_base_url} if settings.gemini_base_url else None
+    return genai.Client(api_key=settings.gemini_api_key, http_options=http_options)
+
+
+def _models_to_try() -> List[str]:
+    """List of models to try in order of preference."""
     # Get model name and ensure it's valid
     requested_model = settings.gemini_model
     
@@ -250,22 +353,8 @@ async def call_gemini(segments_with_timestamps: list) -> Dict[str, Any]:
         else:
             requested_model = f"gemini-{requested_model}"
     
-    # Build the prompt
-    prompt = build_prompt(segments_with_timestamps)
-    
-    # Check prompt length (Gemini has token limits)
-    prompt_length = len(prompt)
-    if prompt_length > 1000000:  # Roughly 250k tokens (conservative)
-        raise Exception(
-            f"Prompt too long ({prompt_length} chars). "
-            f"Consider processing fewer segments at once."
-        )
-    
-    print(f"Prompt length: {prompt_length} characters")
-    
-    # List of models to try in order of preference
     # Use models that actually exist based on API listing
-    models_to_try = [
+    models = [
         requested_model,
         "gemini-2.5-flash",
         "gemini-2.5-pro",
@@ -275,6 +364,78 @@ async def call_gemini(segments_with_timestamps: list) -> Dict[str, Any]:
         "gemini-flash-latest",
         "gemini-pro-latest",
     ]
+    # Drop duplicates (e.g. when the requested model is also a fallback)
+    return list(dict.fromkeys(models))
+
+
+def _segment_tokens(seg: dict) -> int:
+    """Estimated prompt tokens contributed by one transcript line."""
+    return estimate_tokens(f"S0 {seg['start_ms']} {seg['end_ms']} {seg['text']}\n")
+
+
+def _instruction_tokens() -> int:
+    """Estimated prompt tokens of everything except the transcript lines."""
+    # Header plus a generous allowance for the speaker legend
+    return INSTRUCTION_TOKENS + estimate_tokens(TRANSCRIPT_HEADER) + 64
+
+
+def _list_models(client) -> List[str]:
+    """Names of the models available to this API key, or [] if listing fails."""
+    available_models = []
+    try:
+        for model in client.models.list():
+            model_name = model.name
+            # Extract just the model name (remove 'models/' prefix if present)
+            if '/' in model_name:
+                model_name = model_name.split('/')[-1]
+            available_models.append(model_name)
+    except Exception:
+        # If listing fails, continue with our fallback list
+        pass
+    return available_models
+
+
+async def _analyze_window(client, models_to_try: List[str], segments_with_timestamps: list) -> Dict[str, Any]:
+    """Run a single Gemini analysis over one transcript window."""
+    # Only the transcript is sent per call; the instructions go through the
+    # context cache (or a plain system instruction when caching is unavailable)
+    with timed("prompt_build"):
+        transcript_block = build_transcript_block(segments_with_timestamps)
+    
+    # Check prompt size (Gemini limits are in tokens)
+    prompt_tokens = INSTRUCTION_TOKENS + estimate_tokens(transcript_block)
+    if prompt_tokens > GEMINI_CONTEXT_TOKENS:
+        raise Exception(
+            f"Prompt too long (~{prompt_tokens} tokens). "
+            f"A single segment exceeds the Gemini context window."
+        )
+    
+    logger.info(
+        "Prompt size: ~%d tokens", prompt_tokens,
+        extra={"prompt_tokens": prompt_tokens, "transcript_chars": len(transcript_block)},
+    )
+    
+    def generate(model_name: str, cached_content: Optional[str]):
+        if cached_content:
+            config = {"temperature": 0.2, "cached_content": cached_content}
+        else:
+            config = {"temperature": 0.2, "system_instruction": SYSTEM_INSTRUCTIONS}
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            # https://ai.google.dev/gemini-api/docs/text-generation
+            response = client.models.generate_content(
+                model=model_name,
+                contents=transcript_block,
+                config=config
+            )
+            outcome = "ok"
+            return response
+        finally:
+            GEMINI_CALL_SECONDS.labels(model_name, outcome).observe(time.perf_counter() - start)
+    
+    # Set when the awaiting coroutine is cancelled; the worker stops before its next request
+    cancelled = threading.Event()
     
     # Try each model until one works
     # Run SDK calls in executor since they're blocking
@@ -282,61 +443,68 @@ async def call_gemini(segments_with_timestamps: list) -> Dict[str, Any]:
         """Synchronous wrapper for SDK call"""
         last_error = None
         text = None
-        available_models = []
-        
-        # First, try to list available models to help with debugging
-        try:
-            # Try to get available models (if SDK supports it)
-            models_list = list(client.models.list())
-            for model in models_list:
-                model_name = model.name
-                # Extract just the model name (remove 'models/' prefix if present)
-                if '/' in model_name:
-                    model_name = model_name.split('/')[-1]
-                available_models.append(model_name)
-        except Exception:
-            # If listing fails, continue with our fallback list
-            pass
         
         for model_name in models_to_try:
+            if cancelled.is_set():
+                return None, None
+            model_var.set(model_name)
             try:
-                # Use the new SDK exactly as shown in official docs
-                # https://ai.google.dev/gemini-api/docs/text-generation
-                response = client.models.generate_content(
-                    model=model_name,
-                    contents=prompt,
-                    config={"temperature": 0.2}
-                )
+                cached_content = None
+                if settings.gemini_context_cache:
+                    cached_content = instruction_cache.get(client, model_name)
+                
+                try:
+                    response = generate(model_name, cached_content)
+                except Exception as e:
+                    if not cached_content:
+                        raise
+                    # Cache expired or was rejected: drop it and retry uncached
+                    logger.warning("Cached call failed with %s, retrying without cache: %.200s", model_name, e)
+                    instruction_cache.invalidate(model_name)
+                    FALLBACKS.labels("gemini_uncached_retry").inc()
+                    response = generate(model_name, None)
+                
                 # According to docs, response has .text attribute directly
                 text = response.text
                 if text and text.strip():
-                    return text, None, available_models  # Success
+                    return text, None  # Success
             except Exception as e:
                 error_str = str(e)
                 # Log specific error types
                 if "429" in error_str or "rate limit" in error_str.lower():
-                    print(f"Rate limit error with {model_name}: {error_str}")
+                    logger.warning("Rate limit error with %s: %s", model_name, error_str)
                 elif "403" in error_str or "permission" in error_str.lower():
-                    print(f"Permission error with {model_name}: {error_str}")
+                    logger.warning("Permission error with %s: %s", model_name, error_str)
                 elif "401" in error_str or "unauthorized" in error_str.lower():
-                    print(f"Authentication error with {model_name}: {error_str}")
+                    logger.warning("Authentication error with %s: %s", model_name, error_str)
                 elif "404" in error_str or "not found" in error_str.lower():
-                    print(f"Model not found: {model_name}")
+                    logger.warning("Model not found: %s", model_name)
                 else:
-                    print(f"Error with {model_name}: {error_str[:200]}")
+                    logger.warning("Error with %s: %.200s", model_name, error_str)
                 last_error = e
+                FALLBACKS.labels("gemini_model").inc()
                 # Continue to next model
                 continue
         
-        return None, last_error, available_models
+        return None, last_error
     
     # Run in executor to avoid blocking the event loop
     loop = asyncio.get_event_loop()
-    text, last_error, available_models = await loop.run_in_executor(None, generate_content_sync)
+    # Copy the context so log records from the worker thread keep their correlation ids
+    try:
+        text, last_error = await loop.run_in_executor(
+            None, functools.partial(contextvars.copy_context().run, generate_content_sync)
+        )
+    except asyncio.CancelledError:
+        # A request already sent cannot be recalled, but no further models are tried
+        cancelled.set()
+        raise
     
     # If all models failed, raise an informative error
     if not text:
         error_msg = str(last_error) if last_error else "Unknown error"
+        # Only list models on failure, to help with debugging
+        available_models = await loop.run_in_executor(None, _list_models, client)
         available_msg = ""
         if available_models:
             available_msg = f"\nAvailable models for your API key: {', '.join(available_models[:10])}"
@@ -354,6 +522,47 @@ async def call_gemini(segments_with_timestamps: list) -> Dict[str, Any]:
             f"4. See: https://ai.google.dev/gemini-api/docs/troubleshooting"
         )
 
+    with timed("json_normalize"):
+        return _parse_response(text, segments_with_timestamps)
+
+
+def _restore_speaker_ids(result: Dict[str, Any], codes: Dict[str, str]) -> None:
+    """Replace speaker short codes (S0, S1, ...) with original speaker ids in place."""
+    original = {code: speaker for speaker, code in codes.items()}
+    
+    def restore_ref(ref):
+        if isinstance(ref, dict) and ref.get("speaker_id") in original:
+            ref["speaker_id"] = original[ref["speaker_id"]]
+    
+    for key in ("full_transcript", "amplified_transcript"):
+        for entry in result.get(key) or []:
+            restore_ref(entry)
+            if isinstance(entry, dict) and entry.get("speaker") in original:
+                entry["speaker"] = original[entry["speaker"]]
+    for inequality in result.get("inequalities") or []:
+        if isinstance(inequality, dict):
+            restore_ref(inequality.get("speaker_affected"))
+    for suggestion in result.get("suggestions") or []:
+        if isinstance(suggestion, dict):
+            restore_ref(suggestion.get("target_speaker"))
+    for item in result.get("action_items") or []:
+        if isinstance(item, dict):
+            restore_ref(item.get("owner"))
+    
+    stats = result.get("meeting_statistics")
+    if isinstance(stats, dict):
+        for key in ("speaking_time_by_speaker", "words_by_speaker"):
+            if isinstance(stats.get(key), dict):
+                stats[key] = {original.get(k, k): v for k, v in stats[key].items()}
+    
+    sentiment = result.get("sentiment")
+    if isinstance(sentiment, dict):
+        for entry in sentiment.get("by_speaker") or []:
+            restore_ref(entry)
+
+
+def _parse_response(text: str, segments_with_timestamps: list) -> Dict[str, Any]:
+    """Parse and normalize Gemini's response text into a GeminiOutput-shaped dict."""
     # Parse JSON (best effort)
     # Handle cases where Gemini returns explanatory text before/after JSON
     # Find the first { and last } to extract the JSON object
@@ -618,52 +827,21 @@ async def call_gemini(segments_with_timestamps: list) -> Dict[str, Any]:
         
         # Calculate action counts for meeting_statistics
         if "meeting_statistics" in result and isinstance(result["meeting_statistics"], dict):
-            stats = result["meeting_statistics"]
-            # Initialize counts if not present
-            action_counts = {
-                "invite_quiet_people_count": 0,
-                "credit_original_idea_person_count": 0,
-                "let_speaker_finish_count": 0,
-                "clarify_decision_count": 0,
-                "redirect_attention_count": 0,
-                "encourage_input_count": 0,
-                "rebalance_discussion_count": 0
-            }
-            
-            # Count actions in suggestions (excluding do_nothing)
-            if "suggestions" in result and isinstance(result["suggestions"], list):
-                for suggestion in result["suggestions"]:
-                    if not isinstance(suggestion, dict):
-                        continue
-                    action = suggestion.get("action")
-                    if action and action != "do_nothing":
-                        count_key = f"{action}_count"
-                        if count_key in action_counts:
-                            action_counts[count_key] = action_counts.get(count_key, 0) + 1
-            
-            # Count actions in amplified_transcript (excluding do_nothing)
-            if "amplified_transcript" in result and isinstance(result["amplified_transcript"], list):
-                for entry in result["amplified_transcript"]:
-                    if not isinstance(entry, dict):
-                        continue
-                    action = entry.get("recommended_action")
-                    if action and action != "do_nothing":
-                        count_key = f"{action}_count"
-                        if count_key in action_counts:
-                            action_counts[count_key] = action_counts.get(count_key, 0) + 1
-            
-            # Update statistics with counts
-            for key, value in action_counts.items():
-                stats[key] = value
+            result["meeting_statistics"].update(count_actions(result))
+        
+        # Map any speaker short codes Gemini echoed back to the original ids
+        _restore_speaker_ids(result, speaker_codes(segments_with_timestamps))
         
         return result
     except Exception as e:
         # Fallback if model returns non-JSON - return structure with provided transcript
-        import traceback
-        print(f"JSON parsing error: {e}")
-        print(f"Error at line {e.__traceback__.tb_lineno if hasattr(e, '__traceback__') else 'unknown'}")
-        print(f"First 500 chars of response: {text[:500] if text else 'No text'}")
-        print(f"Last 500 chars of response: {text[-500:] if text and len(text) > 500 else text if text else 'No text'}")
+        FALLBACKS.labels("json_parse").inc()
+        logger.warning("JSON parsing error: %s", e, extra={"response_chars": len(text) if text else 0})
+        if logger.isEnabledFor(logging.DEBUG) and sample_payload():
+            logger.debug(
+                "Unparseable Gemini response",
+                extra={"head": text[:500] if text else None, "tail": text[-500:] if text else None},
+            )
         
         # Try to extract JSON from the text even if parsing failed
         # This handles cases where there's explanatory text before/after JSON
@@ -0,0 +1,235 @@
+"""
+Reduce step for map-reduce Gemini analysis.
+
+Long meetings are analyzed as several transcript windows. Each window produces
+a normalized Gemini result dict; the functions here merge those into a single
+dict that validates as a GeminiOutput.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+
+ACTION_COUNT_KEYS = [
+    "invite_quiet_people_count",
+    "credit_original_idea_person_count",
+    "let_speaker_finish_count",
+    "clarify_decision_count",
+    "redirect_attention_count",
+    "encourage_input_count",
+    "rebalance_discussion_count",
+]
+
+PRIORITY_RANK = {"high": 0, "medium": 1, "low": 2}
+
+
+def count_actions(result: Dict[str, Any]) -> Dict[str, int]:
+    """Count recommended actions (excluding do_nothing) in suggestions and amplified_transcript."""
+    action_counts = {key: 0 for key in ACTION_COUNT_KEYS}
+
+    for suggestion in result.get("suggestions") or []:
+        if not isinstance(suggestion, dict):
+            continue
+        action = suggestion.get("action")
+        if action and action != "do_nothing":
+            count_key = f"{action}_count"
+            if count_key in action_counts:
+                action_counts[count_key] += 1
+
+    for entry in result.get("amplified_transcript") or []:
+        if not isinstance(entry, dict):
+            continue
+        action = entry.get("recommended_action")
+        if action and action != "do_nothing":
+            count_key = f"{action}_count"
+            if count_key in action_counts:
+                action_counts[count_key] += 1
+
+    return action_counts
+
+
+def _speaker_id(ref: Any) -> Optional[str]:
+    if isinstance(ref, dict):
+        return ref.get("speaker_id")
+    return ref
+
+
+def _count_turns(segments: List[dict]) -> int:
+    turns = 0
+    previous = None
+    for seg in segments:
+        if seg["speaker"] != previous:
+            turns += 1
+            previous = seg["speaker"]
+    return turns
+
+
+def _merge_statistics(
+    results: List[Dict[str, Any]],
+    windows: List[List[dict]],
+) -> Dict[str, Any]:
+    speaking_time: Dict[str, float] = {}
+    words: Dict[str, int] = {}
+    total_words = 0
+    interruptions = 0
+    weighted_turn_length = 0.0
+    total_turns = 0
+    max_speakers = 0
+
+    for result, window in zip(results, windows):
+        stats = result.get("meeting_statistics") or {}
+
+        for speaker, seconds in (stats.get("speaking_time_by_speaker") or {}).items():
+            speaking_time[speaker] = speaking_time.get(speaker, 0.0) + float(seconds or 0)
+        for speaker, count in (stats.get("words_by_speaker") or {}).items():
+            words[speaker] = words.get(speaker, 0) + int(count or 0)
+
+        total_words += int(stats.get("total_words") or 0)
+        interruptions += int(stats.get("interruptions_count") or 0)
+        max_speakers = max(max_speakers, int(stats.get("total_speakers") or 0))
+
+        # Weight each window's average turn length by its number of turns
+        turns = _count_turns(window)
+        weighted_turn_length += float(stats.get("average_turn_length_seconds") or 0) * turns
+        total_turns += turns
+
+    all_segments = [seg for window in windows for seg in window]
+    duration_ms = 0
+    if all_segments:
+        duration_ms = max(s["end_ms"] for s in all_segments) - min(s["start_ms"] for s in all_segments)
+
+    return {
+        "total_duration_seconds": duration_ms / 1000.0,
+        "total_speakers": max(len(set(speaking_time) | set(words)), max_speakers),
+        "speaking_time_by_speaker": speaking_time,
+        "total_words": total_words,
+        "words_by_speaker": words,
+        "interruptions_count": interruptions,
+        "average_turn_length_seconds": weighted_turn_length / total_turns if total_turns else 0.0,
+    }
+
+
+def _dedupe(items: List[Any], key) -> List[Any]:
+    seen = set()
+    unique = []
+    for item in items:
+        k = key(item)
+        if k in seen:
+            continue
+        seen.add(k)
+        unique.append(item)
+    return unique
+
+
+def _rank_suggestions(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Merge suggestions from all windows.
+
+    Suggestions with the same action and target are collapsed, keeping the
+    highest priority. The result is ordered by priority, then by how many
+    windows raised the suggestion, then by recency (later windows first).
+    """
+    merged: Dict[Tuple[Any, Any], Dict[str, Any]] = {}
+    votes: Dict[Tuple[Any, Any], int] = {}
+    last_seen: Dict[Tuple[Any, Any], int] = {}
+
+    for window_index, result in enumerate(results):
+        for suggestion in result.get("suggestions") or []:
+            if not isinstance(suggestion, dict):
+                continue
+            key = (suggestion.get("action"), _speaker_id(suggestion.get("target_speaker")))
+            votes[key] = votes.get(key, 0) + 1
+            last_seen[key] = window_index
+
+            existing = merged.get(key)
+            rank = PRIORITY_RANK.get(suggestion.get("priority"), len(PRIORITY_RANK))
+            if existing is None or rank <= PRIORITY_RANK.get(existing.get("priority"), len(PRIORITY_RANK)):
+                merged[key] = suggestion
+
+    return sorted(
+        merged.values(),
+        key=lambda s: (
+            PRIORITY_RANK.get(s.get("priority"), len(PRIORITY_RANK)),
+            -votes[(s.get("action"), _speaker_id(s.get("target_speaker")))],
+            -last_seen[(s.get("action"), _speaker_id(s.get("target_speaker")))],
+        ),
+    )
+
+
+def _merge_sentiment(results: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    sentiments = [r.get("sentiment") for r in results if isinstance(r.get("sentiment"), dict)]
+    if not sentiments:
+        return None
+
+    by_speaker: Dict[str, Dict[str, Any]] = {}
+    scores: Dict[str, List[float]] = {}
+    for sentiment in sentiments:
+        for entry in sentiment.get("by_speaker") or []:
+            if not isinstance(entry, dict) or "speaker_id" not in entry:
+                continue
+            # Latest window wins for label and rationale; scores are averaged
+            by_speaker[entry["speaker_id"]] = dict(entry)
+            scores.setdefault(entry["speaker_id"], []).append(float(entry.get("score") or 0))
+
+    for speaker_id, entry in by_speaker.items():
+        entry["score"] = sum(scores[speaker_id]) / len(scores[speaker_id])
+
+    return {
+        "overall": sentiments[-1].get("overall") or {},
+        "by_speaker": list(by_speaker.values()),
+    }
+
+
+def reduce_outputs(
+    results: List[Dict[str, Any]],
+    windows: List[List[dict]],
+) -> Dict[str, Any]:
+    """
+    Merge per-window Gemini results into one result dict.
+
+    Args:
+        results: Normalized Gemini result dicts, one per window, in time order
+        windows: The segment windows the results were produced from
+    """
+    if len(results) == 1:
+        return results[0]
+
+    summaries = [r.get("summary", "").strip() for r in results]
+
+    action_items = _dedupe(
+        [item for r in results for item in r.get("action_items") or []],
+        key=lambda item: (
+            str(item.get("item", "")).strip().lower(),
+            _speaker_id(item.get("owner")),
+        ) if isinstance(item, dict) else repr(item),
+    )
+
+    important_points = _dedupe(
+        [point for r in results for point in r.get("important_points") or []],
+        key=lambda point: str(point).strip().lower(),
+    )
+
+    inequalities = _dedupe(
+        [iq for r in results for iq in r.get("inequalities") or []],
+        key=lambda iq: (
+            iq.get("type"),
+            _speaker_id(iq.get("speaker_affected")),
+            iq.get("timestamp_ms"),
+        ) if isinstance(iq, dict) else repr(iq),
+    )
+    inequalities.sort(key=lambda iq: iq.get("timestamp_ms") or 0)
+
+    full_transcript = [entry for r in results for entry in r.get("full_transcript") or []]
+    amplified_transcript = [entry for r in results for entry in r.get("amplified_transcript") or []]
+
+    merged = {
+        "summary": "\n\n".join(s for s in summaries if s),
+        "action_items": action_items,
+        "important_points": important_points,
+        "meeting_statistics": _merge_statistics(results, windows),
+        "inequalities": inequalities,
+        "full_transcript": full_transcript,
+        "amplified_transcript": amplified_transcript,
+        "suggestions": _rank_suggestions(results),
+        "sentiment": _merge_sentiment(results),
+    }
+    merged["meeting_statistics"].update(count_actions(merged))
+
+    return merged
@@ -0,0 +1,147 @@
+"""
+Structured, non-blocking logging.
+
+Records are handed to a QueueHandler and written to stdout by a background
+QueueListener thread, so logging never performs I/O on the event loop.
+Correlation ids (meeting_id, job_id, model) are taken from context variables
+and attached to every record.
+
+Environment:
+    LOG_LEVEL                 DEBUG, INFO, WARNING, ... (default INFO)
+    LOG_FORMAT                json or text (default json)
+    LOG_PAYLOAD_SAMPLE_RATE   fraction of verbose payload logs to keep (default 0.01)
+"""
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+from contextlib import contextmanager
+from typing import Optional
+
+meeting_id_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("meeting_id", default=None)
+job_id_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("job_id", default=None)
+model_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("model", default=None)
+
+_CONTEXT_VARS = {
+    "meeting_id": meeting_id_var,
+    "job_id": job_id_var,
+    "model": model_var,
+}
+
+# Attributes present on every LogRecord; anything else came in through extra=
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+PAYLOAD_SAMPLE_RATE = float(os.getenv("LOG_PAYLOAD_SAMPLE_RATE", "0.01"))
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class ContextFilter(logging.Filter):
+    """Attach correlation ids from the current context to the record."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        for name, var in _CONTEXT_VARS.items():
+            if not hasattr(record, name):
+                setattr(record, name, var.get())
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RESERVED and value is not None:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Human-readable lines for local development."""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        context = " ".join(
+            f"{name}={getattr(record, name)}"
+            for name in _CONTEXT_VARS
+            if getattr(record, name, None) is not None
+        )
+        return f"{line} [{context}]" if context else line
+
+
+def setup_logging():
+    """Route all logging through a background queue listener. Safe to call more than once."""
+    global _listener
+    if _listener is not None:
+        return
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    if os.getenv("LOG_FORMAT", "json").lower() == "text":
+        stream_handler.setFormatter(TextFormatter())
+    else:
+        stream_handler.setFormatter(JsonFormatter())
+
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    # Runs in the calling thread, where the context variables are visible
+    queue_handler.addFilter(ContextFilter())
+
+    root = logging.getLogger()
+    root.handlers = [queue_handler]
+    root.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging():
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+@contextmanager
+def log_context(**fields):
+    """Bind correlation ids (meeting_id, job_id, model) for the enclosed block."""
+    tokens = [(_CONTEXT_VARS[name], _CONTEXT_VARS[name].set(value)) for name, value in fields.items()]
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+
+def bind_context(**fields):
+    """
+    Bind correlation ids for the rest of the current task.
+
+    Each request and each asyncio task runs in its own copy of the context,
+    so bindings do not leak between requests.
+    """
+    for name, value in fields.items():
+        _CONTEXT_VARS[name].set(value)
+
+
+def sample_payload() -> bool:
+    """Whether to emit a verbose payload log, per LOG_PAYLOAD_SAMPLE_RATE."""
+    return PAYLOAD_SAMPLE_RATE > 0 and random.random() < PAYLOAD_SAMPLE_RATE
@@ -1,46 +1,82 @@
 import asyncio
+import logging
 import time
-from collections import deque
-from typing import Deque, Dict, Optional, List
+from typing import Dict, Optional
 
 from src.models.schemas import DiarizedSegment, TimestampedGeminiOutput
+from src.services.config import settings
 from src.services.gemini_client import call_gemini
+from src.services.log import bind_context
+from src.services.metrics import ACTIVE_MEETINGS, ANALYSES_CANCELLED, BUFFERED_SEGMENTS, FALLBACKS, timed
+from src.services.output_history import OutputHistory
+from src.services.scheduler import DeadlineScheduler
+from src.services.segment_store import TieredSegmentStore
+from src.services.trigger_policy import TriggerPolicy, TriggerState
+
+logger = logging.getLogger(__name__)
 
 
 class MeetingState:
 
     def __init__(self, meeting_id: str):
         self.meeting_id = meeting_id
-        self.buffer: Deque[DiarizedSegment] = deque(maxlen=300)
-        self.gemini_outputs: List[TimestampedGeminiOutput] = []
+        # Full history; the newest max_buffer_segments stay uncompressed for analysis
+        self.buffer = TieredSegmentStore(meeting_id, hot_limit=settings.max_buffer_segments)
+        # Stored as deltas; indexes and iterates like a list of TimestampedGeminiOutput
+        self.gemini_outputs = OutputHistory()
 
-        self.pause_task: Optional[asyncio.Task] = None
+        self.trigger = TriggerState()
         self.gemini_running = False
+        # Bumped by every analysis and by reset; results from older generations are stale
+        self.generation = 0
+        self.gemini_call: Optional[asyncio.Task] = None
+        # Trigger work taken by the running analysis (TriggerState.take)
+        self.running_work: tuple = (None, 0)
         self.last_cutoff = 0
 
     def append(self, seg: DiarizedSegment):
         self.buffer.append(seg)
 
+    def cancel_analysis(self, reason: str):
+        """
+        Invalidate the running analysis and cancel its Gemini call.
+
+        Its taken work goes back to the trigger, so a superseding run takes it
+        over (and restores it if that run fails too).
+        """
+        self.generation += 1
+        if self.gemini_call and not self.gemini_call.done():
+            self.gemini_call.cancel()
+            ANALYSES_CANCELLED.labels(reason).inc()
+        self.trigger.restore(self.running_work)
+        self.running_work = (None, 0)
+        self.gemini_call = None
+        self.gemini_running = False
+
     def clear(self):
+        self.cancel_analysis("reset")
         self.buffer.clear()
         self.gemini_outputs.clear()
+        self.trigger.reset()
+        pause_triggers.cancel(self.meeting_id)
         self.last_cutoff = 0
 
     def recent_text(self) -> str:
-        parts = [
-            f"[{s.speaker}] {s.text}"
-            for s in self.buffer
-            if s.end_ms > self.last_cutoff
-        ]
+        rows = self.buffer.ending_after(self.last_cutoff)
+        parts = [f"[{speaker}] {text}" for speaker, text in zip(rows.speakers(), rows.texts())]
         return "\n".join(parts)
 
     def advance_cutoff(self):
         if self.buffer:
-            self.last_cutoff = max(s.end_ms for s in self.buffer)
+            self.last_cutoff = self.buffer.max_end_ms()
 
 
 MEETINGS: Dict[str, MeetingState] = {}
 
+# Evaluated only when /metrics is scraped
+ACTIVE_MEETINGS.set_function(lambda: len(MEETINGS))
+BUFFERED_SEGMENTS.set_function(lambda: sum(len(m.buffer) for m in list(MEETINGS.values())))
+
 
 def get_meeting(meeting_id: str) -> MeetingState:
     if meeting_id not in MEETINGS:
@@ -49,58 +85,138 @@ def get_meeting(meeting_id: str) -> MeetingState:
     return MEETINGS[meeting_id]
 
 
+async def ingest(seg: DiarizedSegment) -> bool:
+    """
+    Add a final segment to its meeting and re-arm the pause trigger.
+
+    Partial and empty segments are ignored. Returns whether seg was stored.
+    """
+    if not (seg.is_final and seg.text.strip()):
+        return False
+
+    state = get_meeting(seg.meeting_id)
+    state.append(seg)
+    state.trigger.add(len(seg.text.split()), time.monotonic())
+    await arm_trigger(state)
+    return True
+
+
+async def arm_trigger(state: MeetingState):
+    """(Re)schedule analysis of the meeting according to the trigger policy."""
+    delay = TriggerPolicy.from_settings().delay(state.trigger, time.monotonic())
+    if delay is not None:
+        await schedule_pause_trigger(state, delay)
+
+
 async def schedule_pause_trigger(state: MeetingState, seconds: float):
-    if state.pause_task:
-        state.pause_task.cancel()
+    """Analyze the meeting in seconds, replacing its pending trigger."""
+    pause_triggers.schedule(state.meeting_id, seconds)
 
-    async def run():
-        await asyncio.sleep(seconds)
-        await run_gemini(state)
 
-    state.pause_task = asyncio.create_task(run())
+async def _fire_pause_trigger(meeting_id: str):
+    state = MEETINGS.get(meeting_id)
+    if state is not None:
+        await analyze(state)
 
 
-async def run_gemini(state: MeetingState):
-    if state.gemini_running:
-        return
+# One scheduler for all meetings' pause triggers; rescheduling never cancels
+# an analysis already running
+pause_triggers = DeadlineScheduler(_fire_pause_trigger)
+
+
+async def analyze(state: MeetingState, supersede: bool = False):
+    """
+    Run the analysis, then re-arm for segments that arrived meanwhile.
 
-    # Get the segment range that will be processed
-    segments_in_range = [
-        s for s in state.buffer
-        if s.end_ms > state.last_cutoff
-    ]
+    A failed run puts its work back and is retried with backoff, so a failure
+    at the end of a meeting does not wait for another segment.
+    """
+    if state.gemini_running and not supersede:
+        return  # the run in flight re-arms when it finishes
+    try:
+        await run_gemini(state, supersede=supersede)
+    except Exception:
+        now = time.monotonic()
+        if state.trigger.pending_since is None and (state.buffer.max_end_ms() or 0) > state.last_cutoff:
+            # Unanalyzed segments always leave work pending, even if no run restored it
+            state.trigger.add(0, now)
+        state.trigger.failed(now)
+        await arm_trigger(state)
+        raise
+    await arm_trigger(state)
+
+
+async def run_gemini(state: MeetingState, supersede: bool = False):
+    """
+    Analyze the segments after last_cutoff (at most the newest
+    max_buffer_segments) and store the output.
+
+    A run already in flight wins unless supersede is set, in which case it is
+    cancelled and this run covers its window too. A run whose generation was
+    superseded or reset while Gemini was working stores nothing.
+    """
+    bind_context(meeting_id=state.meeting_id)
+    if state.gemini_running:
+        if not supersede:
+            return
+        state.cancel_analysis("superseded")
+
+    # Get the segment range that will be processed: at most the hot tier
+    # (max_buffer_segments), so a backlog left by failed runs cannot grow the window
+    in_range, skipped = state.buffer.hot_ending_after(state.last_cutoff)
+    if skipped:
+        FALLBACKS.labels("analysis_backlog").inc()
+        logger.warning(
+            "Unanalyzed backlog exceeds the buffer; skipping the oldest segments",
+            extra={"max_segments_skipped": skipped},
+        )
     
-    if not segments_in_range:
+    if not len(in_range):
+        state.trigger.take()
         return
     
     # Prepare segments with timestamps for Gemini
-    segments_for_gemini = [
-        {
-            "speaker": s.speaker,
-            "start_ms": s.start_ms,
-            "end_ms": s.end_ms,
-            "text": s.text
-        }
-        for s in segments_in_range
-    ]
+    segments_for_gemini = in_range.gemini_segments()
     
-    start_ms = min(s.start_ms for s in segments_in_range)
-    end_ms = max(s.end_ms for s in segments_in_range)
+    start_ms = in_range.min_start_ms()
+    end_ms = in_range.max_end_ms()
 
+    state.generation += 1
+    generation = state.generation
     state.gemini_running = True
+    taken = state.running_work = state.trigger.take()
+    started = time.monotonic()
+    # A separate task so reset/supersede can cancel the call without cancelling the caller
+    call = asyncio.ensure_future(call_gemini(segments_for_gemini))
+    state.gemini_call = call
 
     try:
-        out = await call_gemini(segments_for_gemini)
-        state.advance_cutoff()
+        try:
+            out = await call
+        except asyncio.CancelledError:
+            if state.generation != generation:
+                return  # cancelled by reset or a superseding run
+            state.trigger.restore(taken)
+            raise
+        except BaseException:
+            if state.generation == generation:
+                state.trigger.restore(taken)
+            raise
+
+        if state.generation != generation:
+            ANALYSES_CANCELLED.labels("stale").inc()
+            return
+        state.trigger.finished(time.monotonic() - started, time.monotonic())
+        # Only the analyzed window is done; segments that arrived meanwhile are not
+        state.last_cutoff = max(state.last_cutoff, end_ms)
         
         # Store the output with timestamp and segment range
-        timestamped_output = TimestampedGeminiOutput(
-            timestamp_ms=int(time.time() * 1000),
-            start_ms=start_ms,
-            end_ms=end_ms,
-            **out
-        )
+        with timed("pydantic_validation"):
+            timestamped_output = TimestampedGeminiOutput.from_gemini(out, start_ms, end_ms)
         state.gemini_outputs.append(timestamped_output)
 
     finally:
-        state.gemini_running = False
+        if state.generation == generation:
+            state.gemini_running = False
+            state.gemini_call = None
+            state.running_work = (None, 0)
@@ -0,0 +1,72 @@
+"""
+Prometheus metrics for the backend, exposed at /metrics.
+
+Hot-path cost is one histogram observation per stage; gauges are computed by
+callback only when /metrics is scraped.
+"""
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+# Stages span sub-millisecond transforms up to multi-minute transcriptions
+STAGE_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0,
+)
+
+STAGE_SECONDS = Histogram(
+    "levelus_stage_seconds",
+    "Time spent in each pipeline stage",
+    ["stage"],
+    buckets=STAGE_BUCKETS,
+)
+
+GEMINI_CALL_SECONDS = Histogram(
+    "levelus_gemini_call_seconds",
+    "Latency of individual Gemini generate_content calls",
+    ["model", "outcome"],
+    buckets=STAGE_BUCKETS,
+)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "levelus_http_request_seconds",
+    "End-to-end HTTP request latency by route",
+    ["method", "route", "status"],
+    buckets=STAGE_BUCKETS,
+)
+
+FALLBACKS = Counter(
+    "levelus_fallbacks_total",
+    "Fallback paths taken (model fallback, uncached retry, JSON repair, map-reduce)",
+    ["kind"],
+)
+
+ANALYSES_CANCELLED = Counter(
+    "levelus_analyses_cancelled_total",
+    "Live analyses cancelled or discarded before their result was stored",
+    ["reason"],
+)
+
+ERRORS = Counter(
+    "levelus_errors_total",
+    "Errors by pipeline stage",
+    ["stage"],
+)
+
+ACTIVE_MEETINGS = Gauge(
+    "levelus_active_meetings",
+    "Meetings currently held in memory",
+)
+
+BUFFERED_SEGMENTS = Gauge(
+    "levelus_buffered_segments",
+    "Segments held in meeting buffers across all meetings",
+)
+
+
+def timed(stage: str):
+    """Context manager observing the duration of a pipeline stage."""
+    return STAGE_SECONDS.labels(stage).time()
+
+
+def render_metrics():
+    """Return the Prometheus exposition payload and its content type."""
+    return generate_latest(), CONTENT_TYPE_LATEST
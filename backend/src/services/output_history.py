@@ -0,0 +1,190 @@
+"""
+History of a meeting's Gemini outputs, stored as deltas.
+
+Successive analyses mostly repeat the previous one: the same speakers,
+statistics that barely move, inequalities and suggestions that only grow.
+Each output is kept as a structural delta against the one before, with a
+full keyframe every KEYFRAME_INTERVAL entries so any snapshot can be rebuilt
+from a nearby starting point. The newest output is kept materialized.
+
+A keyframe and the deltas up to the next one form a block. Once a newer
+block starts, the old one is serialized with orjson and zstd-compressed;
+reads decode it on demand through a small LRU of decoded blocks, so a long
+meeting keeps only its current block inflated.
+
+A delta maps each changed field of the dumped output to one change:
+
+    {"set": value}                      replace the value
+    {"keep": n, "append": [...]}        keep the first n list items, append the rest
+    {"patch": {...}, "remove": [...]}   nested change to a dict (keys are field names)
+
+The first delta is taken against an empty dict. The same format is served
+by GET /meeting/{meeting_id}/outputs so clients can follow along incrementally.
+"""
+from collections import OrderedDict
+from typing import Iterator, List, Optional, Union
+
+import orjson
+
+from src.models.schemas import TimestampedGeminiOutput
+from src.services.compression import compress, decompress
+
+KEYFRAME_INTERVAL = 16
+# Decoded cold blocks kept for repeated reads
+DECODED_BLOCKS = 2
+
+
+def _common_prefix(old: list, new: list) -> int:
+    n = 0
+    for a, b in zip(old, new):
+        if a != b:
+            break
+        n += 1
+    return n
+
+
+def diff(old: dict, new: dict) -> dict:
+    """Changes turning old into new."""
+    changes = {}
+    for key, value in new.items():
+        if key in old and old[key] == value:
+            continue
+        previous = old.get(key)
+        if isinstance(value, list) and isinstance(previous, list):
+            keep = _common_prefix(previous, value)
+            if keep == len(value) and keep < len(previous):
+                changes[key] = {"set": value}  # pure truncation; just replace
+            else:
+                changes[key] = {"keep": keep, "append": value[keep:]}
+        elif isinstance(value, dict) and isinstance(previous, dict):
+            changes[key] = {"patch": diff(previous, value), "remove": [k for k in previous if k not in value]}
+        else:
+            changes[key] = {"set": value}
+    for key in old:
+        if key not in new:
+            changes[key] = {"set": None}
+    return changes
+
+
+def apply(old: dict, changes: dict) -> dict:
+    """New dict with changes applied; unchanged values are shared with old."""
+    new = dict(old)
+    for key, change in changes.items():
+        if "set" in change:
+            new[key] = change["set"]
+        elif "keep" in change:
+            new[key] = old[key][:change["keep"]] + change["append"]
+        else:
+            patched = apply(old[key], change["patch"])
+            for removed in change["remove"]:
+                patched.pop(removed, None)
+            new[key] = patched
+    return new
+
+
+class OutputHistory:
+    """
+    Sequence of TimestampedGeminiOutputs backed by deltas.
+
+    Supports len(), indexing, iteration and append() like the list it
+    replaces. Indexing rebuilds the snapshot from its block's keyframe;
+    iteration replays the deltas once.
+    """
+
+    def __init__(self):
+        # Each block is {"keyframe": dict, "deltas": [dict, ...]} (the keyframe's own
+        # delta first), or its compressed bytes once it is no longer the newest
+        self._blocks: List[Union[dict, bytes]] = []
+        self._decoded: "OrderedDict[int, dict]" = OrderedDict()
+        self._count = 0
+        self._current: dict = {}
+        self._latest: Optional[TimestampedGeminiOutput] = None
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, output: TimestampedGeminiOutput):
+        snapshot = output.model_dump(mode="json")
+        changes = diff(self._current, snapshot)
+        if self._count % KEYFRAME_INTERVAL == 0:
+            if self._blocks:
+                self._blocks[-1] = compress(orjson.dumps(self._blocks[-1]))
+            self._blocks.append({"keyframe": snapshot, "deltas": [changes]})
+        else:
+            self._blocks[-1]["deltas"].append(changes)
+        self._count += 1
+        self._current = snapshot
+        self._latest = output
+
+    def clear(self):
+        self.__init__()
+
+    def _block(self, number: int) -> dict:
+        block = self._blocks[number]
+        if isinstance(block, dict):
+            return block
+        decoded = self._decoded.get(number)
+        if decoded is None:
+            decoded = self._decoded[number] = orjson.loads(decompress(block))
+            if len(self._decoded) > DECODED_BLOCKS:
+                self._decoded.popitem(last=False)
+        else:
+            self._decoded.move_to_end(number)
+        return decoded
+
+    def nbytes(self) -> int:
+        """Compressed size of the cold blocks."""
+        return sum(len(block) for block in self._blocks if isinstance(block, bytes))
+
+    @property
+    def latest(self) -> Optional[TimestampedGeminiOutput]:
+        """The current view: the newest output."""
+        return self._latest
+
+    def snapshot(self, index: int) -> dict:
+        """Dumped output at index, rebuilt from its block's keyframe."""
+        n = len(self)
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            raise IndexError("output index out of range")
+        if index == n - 1:
+            return self._current
+        block = self._block(index // KEYFRAME_INTERVAL)
+        state = block["keyframe"]
+        for changes in block["deltas"][1:index % KEYFRAME_INTERVAL + 1]:
+            state = apply(state, changes)
+        return state
+
+    def __getitem__(self, index: int) -> TimestampedGeminiOutput:
+        if index in (-1, len(self) - 1) and self._latest is not None:
+            return self._latest
+        return TimestampedGeminiOutput.model_validate(self.snapshot(index))
+
+    def __iter__(self) -> Iterator[TimestampedGeminiOutput]:
+        last = len(self) - 1
+        for i, state in enumerate(self.snapshots()):
+            yield self._latest if i == last else TimestampedGeminiOutput.model_validate(state)
+
+    def snapshots(self) -> Iterator[dict]:
+        """
+        Every dumped output in order, without rebuilding models.
+
+        Snapshots were dumped from validated outputs, so they can be
+        serialized as they are; building models from them costs as much as
+        validating the original Gemini output again.
+        """
+        state: dict = {}
+        for changes in self._iter_deltas(0):
+            state = apply(state, changes)
+            yield state
+
+    def _iter_deltas(self, since: int) -> Iterator[dict]:
+        for number in range(since // KEYFRAME_INTERVAL, len(self._blocks)):
+            deltas = self._block(number)["deltas"]
+            start = since - number * KEYFRAME_INTERVAL if number * KEYFRAME_INTERVAL < since else 0
+            yield from deltas[start:]
+
+    def deltas(self, since: int = 0) -> List[dict]:
+        """Deltas of outputs since..len-1; the first applies to the snapshot at since-1 (or {})."""
+        return list(self._iter_deltas(max(since, 0)))
@@ -0,0 +1,89 @@
+"""
+Token estimation and window splitting for Gemini prompts.
+
+Gemini limits are expressed in tokens, not characters, so prompt sizes are
+estimated here and oversized transcripts are split into windows that each fit
+the configured budget.
+"""
+import math
+from typing import Callable, List
+
+# Gemini tokenizes English prose at roughly four characters per token.
+CHARS_PER_TOKEN = 4.0
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of Gemini tokens in a piece of text."""
+    if not text:
+        return 0
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def split_speaker_turns(segments: List[dict]) -> List[List[dict]]:
+    """Group consecutive segments from the same speaker into turns."""
+    turns: List[List[dict]] = []
+    current_speaker = None
+
+    for seg in segments:
+        if not turns or seg["speaker"] != current_speaker:
+            turns.append([])
+            current_speaker = seg["speaker"]
+        turns[-1].append(seg)
+
+    return turns
+
+
+def split_into_windows(
+    segments: List[dict],
+    max_tokens: int,
+    segment_tokens: Callable[[dict], int],
+) -> List[List[dict]]:
+    """
+    Split segments into consecutive time windows that fit a token budget.
+
+    Windows are cut on speaker-turn boundaries so a speaker is never split
+    mid-turn. A single turn larger than the budget is cut on segment
+    boundaries instead, and a single segment larger than the budget becomes
+    its own window.
+
+    Args:
+        segments: List of dicts with keys: speaker, start_ms, end_ms, text
+        max_tokens: Token budget for the transcript part of each window
+        segment_tokens: Function estimating the prompt tokens of one segment
+    """
+    windows: List[List[dict]] = []
+    current: List[dict] = []
+    current_tokens = 0
+
+    def flush():
+        nonlocal current, current_tokens
+        if current:
+            windows.append(current)
+        current = []
+        current_tokens = 0
+
+    for turn in split_speaker_turns(segments):
+        costs = [segment_tokens(seg) for seg in turn]
+        turn_tokens = sum(costs)
+
+        if current_tokens + turn_tokens <= max_tokens:
+            current.extend(turn)
+            current_tokens += turn_tokens
+            continue
+
+        flush()
+
+        if turn_tokens <= max_tokens:
+            current.extend(turn)
+            current_tokens = turn_tokens
+            continue
+
+        # Turn alone exceeds the budget: fall back to segment boundaries
+        for seg, cost in zip(turn, costs):
+            if current and current_tokens + cost > max_tokens:
+                flush()
+            current.append(seg)
+            current_tokens += cost
+
+    flush()
+    return windows
@@ -0,0 +1,113 @@
+"""
+Central deadline scheduler for per-meeting pause triggers.
+
+Instead of one sleeping asyncio.Task per meeting, cancelled and recreated on
+every segment, all deadlines live in a single heap served by one event loop
+timer. Rescheduling a key pushes a new heap entry and leaves the old one to
+be skipped when popped (lazy deletion); the loop timer is only moved when
+the earliest deadline changes. A task is created only when a deadline
+actually fires.
+"""
+import asyncio
+import heapq
+import logging
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from src.services.metrics import ERRORS
+
+logger = logging.getLogger(__name__)
+
+
+class DeadlineScheduler:
+    """Runs callback(key) once the deadline set for key passes."""
+
+    def __init__(self, callback: Callable[[str], Awaitable[None]]):
+        self._callback = callback
+        self._heap: List[Tuple[float, int, str]] = []
+        self._deadlines: Dict[str, Tuple[float, int]] = {}
+        self._seq = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._timer_at: Optional[float] = None
+        self._running: Set[asyncio.Task] = set()
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
+    def _bind(self) -> asyncio.AbstractEventLoop:
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Deadlines from a previous (closed) loop can no longer fire
+            self.close()
+            self._loop = loop
+        return loop
+
+    def schedule(self, key: str, delay: float):
+        """Fire key after delay seconds, replacing any pending deadline for it."""
+        loop = self._bind()
+        when = loop.time() + delay
+        self._seq += 1
+        self._deadlines[key] = (when, self._seq)
+        heapq.heappush(self._heap, (when, self._seq, key))
+        if len(self._heap) > 2 * len(self._deadlines) + 64:
+            self._compact()
+        self._arm(loop)
+
+    def cancel(self, key: str):
+        self._deadlines.pop(key, None)
+
+    def deadline(self, key: str) -> Optional[float]:
+        """Loop time at which key fires, or None."""
+        entry = self._deadlines.get(key)
+        return entry[0] if entry else None
+
+    def close(self):
+        """Drop all deadlines and stop the timer; callbacks already running continue."""
+        if self._timer:
+            self._timer.cancel()
+        self._timer = self._timer_at = None
+        self._heap.clear()
+        self._deadlines.clear()
+
+    def _compact(self):
+        """Rebuild the heap without superseded entries."""
+        self._heap = [(when, seq, key) for key, (when, seq) in self._deadlines.items()]
+        heapq.heapify(self._heap)
+
+    def _arm(self, loop: asyncio.AbstractEventLoop):
+        """Point the loop timer at the earliest live deadline."""
+        while self._heap and self._deadlines.get(self._heap[0][2]) != self._heap[0][:2]:
+            heapq.heappop(self._heap)
+        if not self._heap:
+            if self._timer:
+                self._timer.cancel()
+            self._timer = self._timer_at = None
+            return
+
+        when = self._heap[0][0]
+        if self._timer_at == when:
+            return
+        if self._timer:
+            self._timer.cancel()
+        self._timer_at = when
+        self._timer = loop.call_at(when, self._fire)
+
+    def _fire(self):
+        loop = self._loop
+        self._timer = self._timer_at = None
+        now = loop.time()
+        while self._heap and self._heap[0][0] <= now:
+            when, seq, key = heapq.heappop(self._heap)
+            if self._deadlines.get(key) != (when, seq):
+                continue
+            del self._deadlines[key]
+            task = loop.create_task(self._callback(key))
+            self._running.add(task)
+            task.add_done_callback(self._done)
+        self._arm(loop)
+
+    def _done(self, task: asyncio.Task):
+        self._running.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            ERRORS.labels("pause_trigger").inc()
+            logger.error("Scheduled analysis failed", exc_info=task.exception())
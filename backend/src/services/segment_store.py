@@ -0,0 +1,476 @@
+"""
+Columnar storage for a meeting's transcript segments.
+
+Segments are kept as parallel arrays instead of one pydantic object each:
+start/end times as int64, speakers as interned int32 codes, confidence as
+float64 (NaN for None), and all text UTF-8 encoded in a single arena
+addressed by an offset/length table. The meeting id is stored once.
+
+Reads hand out SegmentRow records (attribute-compatible with
+DiarizedSegment), plain dicts for Gemini, or DiarizedSegment models built
+without re-validation at the API boundary.
+
+TieredSegmentStore keeps a meeting's full history: a bounded hot
+SegmentStore for live analysis, with older rows frozen into zstd-compressed
+cold chunks that are decoded only when a read reaches them.
+"""
+import json
+import struct
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.models.schemas import DiarizedSegment
+from src.services.compression import compress, decompress
+
+INITIAL_CAPACITY = 64
+
+# (name, dtype) of the per-row columns, in serialization order
+_COLUMNS = (
+    ("_start_ms", np.int64),
+    ("_end_ms", np.int64),
+    ("_speaker", np.int32),
+    ("_confidence", np.float64),
+    ("_is_final", np.bool_),
+    ("_text_length", np.int32),
+)
+_HEADER = struct.Struct("<II")  # row count, speaker table length
+
+
+class SegmentRow:
+    """A segment read from a SegmentStore."""
+    __slots__ = ("meeting_id", "speaker", "start_ms", "end_ms", "text", "is_final", "confidence")
+
+    def __init__(self, meeting_id, speaker, start_ms, end_ms, text, is_final, confidence):
+        self.meeting_id = meeting_id
+        self.speaker = speaker
+        self.start_ms = start_ms
+        self.end_ms = end_ms
+        self.text = text
+        self.is_final = is_final
+        self.confidence = confidence
+
+    def __repr__(self) -> str:
+        return f"SegmentRow({self.speaker!r}, {self.start_ms}, {self.end_ms}, {self.text!r})"
+
+
+class SegmentStore:
+    """
+    Append-only columnar segment buffer.
+
+    With maxlen set, the oldest segments are dropped once it is full, like
+    deque(maxlen=...). Dropped rows are reclaimed by compacting the arrays
+    once they make up half the capacity, so appends stay amortized O(1).
+    """
+
+    def __init__(self, meeting_id: str, maxlen: Optional[int] = None):
+        self.meeting_id = meeting_id
+        self.maxlen = maxlen
+        self._speakers: List[str] = []
+        self._speaker_codes: Dict[str, int] = {}
+        self._allocate(INITIAL_CAPACITY)
+
+    def _allocate(self, capacity: int):
+        self._start_ms = np.zeros(capacity, dtype=np.int64)
+        self._end_ms = np.zeros(capacity, dtype=np.int64)
+        self._speaker = np.zeros(capacity, dtype=np.int32)
+        self._confidence = np.full(capacity, np.nan, dtype=np.float64)
+        self._is_final = np.zeros(capacity, dtype=bool)
+        self._text_offset = np.zeros(capacity, dtype=np.int64)
+        self._text_length = np.zeros(capacity, dtype=np.int32)
+        self._arena = bytearray()
+        self._head = 0   # first live row
+        self._tail = 0   # one past the last row
+
+    def __len__(self) -> int:
+        return self._tail - self._head
+
+    def clear(self):
+        self._allocate(INITIAL_CAPACITY)
+
+    def append(self, seg):
+        """Store a DiarizedSegment (or any object with the same attributes)."""
+        if self._tail == len(self._start_ms):
+            self._grow()
+
+        i = self._tail
+        code = self._speaker_codes.get(seg.speaker)
+        if code is None:
+            code = self._speaker_codes[seg.speaker] = len(self._speakers)
+            self._speakers.append(seg.speaker)
+        text = seg.text.encode()
+
+        self._start_ms[i] = seg.start_ms
+        self._end_ms[i] = seg.end_ms
+        self._speaker[i] = code
+        self._confidence[i] = np.nan if seg.confidence is None else seg.confidence
+        self._is_final[i] = seg.is_final
+        self._text_offset[i] = len(self._arena)
+        self._text_length[i] = len(text)
+        self._arena += text
+        self._tail += 1
+
+        if self.maxlen is not None and len(self) > self.maxlen:
+            self._head += 1
+
+    def extend(self, segments):
+        for seg in segments:
+            self.append(seg)
+
+    def _grow(self):
+        """Make room for one more row, compacting dropped rows first if that frees enough."""
+        capacity = len(self._start_ms)
+        live = len(self)
+        new_capacity = capacity if self._head >= capacity // 2 else capacity * 2
+        head, tail = self._head, self._tail
+
+        arena_start = int(self._text_offset[head]) if live else len(self._arena)
+        columns = {}
+        for name in ("_start_ms", "_end_ms", "_speaker", "_confidence", "_is_final", "_text_offset", "_text_length"):
+            old = getattr(self, name)
+            new = np.zeros(new_capacity, dtype=old.dtype)
+            new[:live] = old[head:tail]
+            columns[name] = new
+        columns["_text_offset"][:live] -= arena_start
+
+        for name, array in columns.items():
+            setattr(self, name, array)
+        self._arena = self._arena[arena_start:]
+        self._head, self._tail = 0, live
+
+    def _load(
+        self,
+        columns: Dict[str, np.ndarray],
+        speakers: List[str],
+        arena: bytes,
+    ):
+        """Replace the contents with the given columns (row-aligned, no dropped rows)."""
+        count = len(columns["_start_ms"])
+        self._allocate(max(INITIAL_CAPACITY, count))
+        for name, dtype in _COLUMNS:
+            getattr(self, name)[:count] = columns[name]
+        self._text_offset[:count] = np.concatenate(([0], np.cumsum(columns["_text_length"], dtype=np.int64)[:-1]))[:count]
+        self._arena = bytearray(arena)
+        self._speakers = list(speakers)
+        self._speaker_codes = {name: i for i, name in enumerate(self._speakers)}
+        self._tail = count
+
+    def select(self, positions: Optional[np.ndarray] = None) -> "SegmentStore":
+        """A new store holding copies of the rows at positions (all rows by default)."""
+        if positions is None:
+            positions = np.arange(len(self))
+        rows = self._head + positions
+        columns = {name: getattr(self, name)[rows] for name, _ in _COLUMNS}
+
+        offsets = self._text_offset[rows]
+        lengths = self._text_length[rows]
+        if rows.size and np.all(offsets[1:] == offsets[:-1] + lengths[:-1]):
+            # Contiguous rows: one slice of the arena
+            arena = bytes(self._arena[int(offsets[0]):int(offsets[-1] + lengths[-1])])
+        else:
+            arena = b"".join(self._arena[o:o + n] for o, n in zip(offsets.tolist(), lengths.tolist()))
+
+        store = SegmentStore(self.meeting_id)
+        store._load(columns, self._speakers, arena)
+        return store
+
+    def take_front(self, count: int) -> "SegmentStore":
+        """Remove the oldest count rows and return them as a new store."""
+        front = self.select(np.arange(min(count, len(self))))
+        self._head += len(front)
+        return front
+
+    @classmethod
+    def concat(cls, meeting_id: str, stores: Sequence["SegmentStore"]) -> "SegmentStore":
+        """Rows of all stores, in order, in one new store."""
+        speakers = list(dict.fromkeys(name for store in stores for name in store._speakers))
+        codes = {name: i for i, name in enumerate(speakers)}
+
+        parts = [store.select() for store in stores if len(store)]
+        columns = {}
+        for name, dtype in _COLUMNS:
+            if name == "_speaker":
+                arrays = [
+                    np.array([codes[n] for n in part._speakers], dtype=np.int32)[part._speaker[:part._tail]]
+                    for part in parts
+                ]
+            else:
+                arrays = [getattr(part, name)[:part._tail] for part in parts]
+            columns[name] = np.concatenate(arrays) if arrays else np.empty(0, dtype=dtype)
+
+        store = cls(meeting_id)
+        store._load(columns, speakers, b"".join(bytes(part._arena) for part in parts))
+        return store
+
+    def to_bytes(self) -> bytes:
+        """Serialize the live rows (used for cold storage)."""
+        compact = self.select()
+        speakers = json.dumps(compact._speakers).encode()
+        count = len(compact)
+        return b"".join(
+            [_HEADER.pack(count, len(speakers)), speakers]
+            + [getattr(compact, name)[:count].tobytes() for name, _ in _COLUMNS]
+            + [bytes(compact._arena)]
+        )
+
+    @classmethod
+    def from_bytes(cls, meeting_id: str, data: bytes) -> "SegmentStore":
+        count, speakers_length = _HEADER.unpack_from(data)
+        position = _HEADER.size
+        speakers = json.loads(data[position:position + speakers_length])
+        position += speakers_length
+
+        columns = {}
+        for name, dtype in _COLUMNS:
+            size = count * np.dtype(dtype).itemsize
+            columns[name] = np.frombuffer(data, dtype=dtype, count=count, offset=position)
+            position += size
+
+        store = cls(meeting_id)
+        store._load(columns, speakers, data[position:])
+        return store
+
+    # Row access
+
+    def _row(self, i: int) -> SegmentRow:
+        offset = int(self._text_offset[i])
+        confidence = float(self._confidence[i])
+        return SegmentRow(
+            self.meeting_id,
+            self._speakers[self._speaker[i]],
+            int(self._start_ms[i]),
+            int(self._end_ms[i]),
+            self._arena[offset:offset + int(self._text_length[i])].decode(),
+            bool(self._is_final[i]),
+            None if confidence != confidence else confidence,
+        )
+
+    def __getitem__(self, index: int) -> SegmentRow:
+        n = len(self)
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            raise IndexError("segment index out of range")
+        return self._row(self._head + index)
+
+    def __iter__(self) -> Iterator[SegmentRow]:
+        return (self._row(i) for i in range(self._head, self._tail))
+
+    # Vectorized reads
+
+    @property
+    def start_ms(self) -> np.ndarray:
+        return self._start_ms[self._head:self._tail]
+
+    @property
+    def end_ms(self) -> np.ndarray:
+        return self._end_ms[self._head:self._tail]
+
+    def max_end_ms(self) -> Optional[int]:
+        return int(self.end_ms.max()) if len(self) else None
+
+    def min_start_ms(self) -> Optional[int]:
+        return int(self.start_ms.min()) if len(self) else None
+
+    def ending_after(self, cutoff_ms: int) -> np.ndarray:
+        """Positions of segments ending after cutoff_ms, in insertion order."""
+        return np.flatnonzero(self.end_ms > cutoff_ms)
+
+    def by_start(self) -> np.ndarray:
+        """Positions of all segments ordered by start time (stable)."""
+        return np.argsort(self.start_ms, kind="stable")
+
+    def texts(self, positions: Optional[np.ndarray] = None) -> List[str]:
+        if positions is None:
+            positions = np.arange(len(self))
+        offsets = self._text_offset[self._head + positions].tolist()
+        lengths = self._text_length[self._head + positions].tolist()
+        arena = self._arena
+        return [arena[o:o + n].decode() for o, n in zip(offsets, lengths)]
+
+    def speakers(self, positions: Optional[np.ndarray] = None) -> List[str]:
+        if positions is None:
+            positions = np.arange(len(self))
+        names = self._speakers
+        return [names[c] for c in self._speaker[self._head + positions].tolist()]
+
+    def gemini_segments(self, positions: Optional[np.ndarray] = None) -> List[dict]:
+        """{speaker, start_ms, end_ms, text} dicts, the shape call_gemini expects."""
+        if positions is None:
+            positions = np.arange(len(self))
+        rows = self._head + positions
+        return [
+            {"speaker": speaker, "start_ms": start, "end_ms": end, "text": text}
+            for speaker, start, end, text in zip(
+                self.speakers(positions),
+                self._start_ms[rows].tolist(),
+                self._end_ms[rows].tolist(),
+                self.texts(positions),
+            )
+        ]
+
+    def to_models(self, positions: Optional[np.ndarray] = None) -> List[DiarizedSegment]:
+        """DiarizedSegment models for the API; data in the store was validated on the way in."""
+        if positions is None:
+            positions = np.arange(len(self))
+        rows = self._head + positions
+        confidences = [None if c != c else c for c in self._confidence[rows].tolist()]
+        return [
+            DiarizedSegment.model_construct(
+                meeting_id=self.meeting_id,
+                speaker=speaker,
+                start_ms=start,
+                end_ms=end,
+                text=text,
+                is_final=is_final,
+                confidence=confidence,
+            )
+            for speaker, start, end, text, is_final, confidence in zip(
+                self.speakers(positions),
+                self._start_ms[rows].tolist(),
+                self._end_ms[rows].tolist(),
+                self.texts(positions),
+                self._is_final[rows].tolist(),
+                confidences,
+            )
+        ]
+
+    def nbytes(self) -> int:
+        """Approximate memory held by the store's buffers."""
+        arrays = (self._start_ms, self._end_ms, self._speaker, self._confidence,
+                  self._is_final, self._text_offset, self._text_length)
+        return sum(a.nbytes for a in arrays) + len(self._arena)
+
+
+class ColdChunk:
+    """A compressed run of consecutive segments, with its time bounds for skipping."""
+    __slots__ = ("count", "start_ms", "end_ms", "payload")
+
+    def __init__(self, count: int, start_ms: int, end_ms: int, payload: bytes):
+        self.count = count
+        self.start_ms = start_ms  # earliest segment start
+        self.end_ms = end_ms      # latest segment end
+        self.payload = payload
+
+
+class TieredSegmentStore:
+    """
+    A meeting's full segment history in a hot and a cold tier.
+
+    The hot tier is a SegmentStore of at most hot_limit rows. When it
+    overflows, its oldest chunk_size rows (half the limit by default) are
+    serialized and zstd-compressed into a ColdChunk. Nothing is dropped:
+    len(), iteration, indexing and the range reads below cover both tiers,
+    and only cold chunks overlapping the requested range are decompressed.
+    """
+
+    def __init__(self, meeting_id: str, hot_limit: int, chunk_size: Optional[int] = None):
+        self.meeting_id = meeting_id
+        self.hot_limit = max(1, hot_limit)
+        self.chunk_size = chunk_size or max(1, self.hot_limit // 2)
+        self.hot = SegmentStore(meeting_id)
+        self._cold: List[ColdChunk] = []
+        self._cold_count = 0
+
+    def __len__(self) -> int:
+        return self._cold_count + len(self.hot)
+
+    @property
+    def cold_count(self) -> int:
+        """Segments held in cold chunks."""
+        return self._cold_count
+
+    def clear(self):
+        self.hot.clear()
+        self._cold.clear()
+        self._cold_count = 0
+
+    def append(self, seg):
+        self.hot.append(seg)
+        if len(self.hot) > self.hot_limit:
+            self._freeze(max(self.chunk_size, len(self.hot) - self.hot_limit))
+
+    def extend(self, segments):
+        for seg in segments:
+            self.append(seg)
+
+    def _freeze(self, count: int):
+        """Move the oldest count hot rows into a new cold chunk."""
+        rows = self.hot.take_front(count)
+        payload = compress(rows.to_bytes())
+        self._cold.append(ColdChunk(len(rows), rows.min_start_ms(), rows.max_end_ms(), payload))
+        self._cold_count += len(rows)
+
+    def _thaw(self, chunk: ColdChunk) -> SegmentStore:
+        return SegmentStore.from_bytes(self.meeting_id, decompress(chunk.payload))
+
+    # Row access
+
+    def __getitem__(self, index: int) -> SegmentRow:
+        n = len(self)
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            raise IndexError("segment index out of range")
+        if index >= self._cold_count:
+            return self.hot[index - self._cold_count]
+        for chunk in self._cold:
+            if index < chunk.count:
+                return self._thaw(chunk)[index]
+            index -= chunk.count
+        raise IndexError("segment index out of range")
+
+    def __iter__(self) -> Iterator[SegmentRow]:
+        for chunk in self._cold:
+            yield from self._thaw(chunk)
+        yield from self.hot
+
+    # Range reads; each returns a new SegmentStore in insertion order
+
+    def _collect(self, cold: List[SegmentStore], hot: SegmentStore) -> SegmentStore:
+        if not cold:
+            return hot
+        return SegmentStore.concat(self.meeting_id, cold + [hot])
+
+    def history(self) -> SegmentStore:
+        """Every segment of the meeting."""
+        return self._collect([self._thaw(chunk) for chunk in self._cold], self.hot.select())
+
+    def ending_after(self, cutoff_ms: int) -> SegmentStore:
+        """Segments ending after cutoff_ms, usually all in the hot tier."""
+        cold = []
+        for chunk in self._cold:
+            if chunk.end_ms > cutoff_ms:
+                rows = self._thaw(chunk)
+                cold.append(rows.select(rows.ending_after(cutoff_ms)))
+        return self._collect(cold, self.hot.select(self.hot.ending_after(cutoff_ms)))
+
+    def hot_ending_after(self, cutoff_ms: int) -> Tuple[SegmentStore, int]:
+        """
+        Hot segments ending after cutoff_ms, and an upper bound on the cold
+        segments that also do (counted per chunk, without decompressing).
+        """
+        skipped = sum(chunk.count for chunk in self._cold if chunk.end_ms > cutoff_ms)
+        return self.hot.select(self.hot.ending_after(cutoff_ms)), skipped
+
+    def between(self, start_ms: int, end_ms: int) -> SegmentStore:
+        """Segments overlapping [start_ms, end_ms)."""
+        def overlapping(rows: SegmentStore) -> SegmentStore:
+            return rows.select(np.flatnonzero((rows.end_ms > start_ms) & (rows.start_ms < end_ms)))
+
+        cold = [
+            overlapping(self._thaw(chunk))
+            for chunk in self._cold
+            if chunk.end_ms > start_ms and chunk.start_ms < end_ms
+        ]
+        return self._collect(cold, overlapping(self.hot))
+
+    def max_end_ms(self) -> Optional[int]:
+        ends = [chunk.end_ms for chunk in self._cold]
+        if len(self.hot):
+            ends.append(self.hot.max_end_ms())
+        return max(ends) if ends else None
+
+    def nbytes(self) -> int:
+        """Approximate memory held by both tiers."""
+        return self.hot.nbytes() + sum(len(chunk.payload) for chunk in self._cold)
@@ -0,0 +1,345 @@
+"""
+Columnar conversion of ElevenLabs word timelines into DiarizedSegments.
+
+Words are held as parallel arrays (text, start, end, speaker code, type) and
+segment boundaries are found with vectorized operations, so multi-hour
+transcripts with hundreds of thousands of words are segmented in bulk instead
+of word by word.
+
+Segments always break on speaker change. A SegmentationPolicy additionally
+breaks on long pauses and caps segment duration, preferring to cut at the end
+of a sentence, so a monologue does not become one unbounded segment.
+"""
+import itertools
+from collections import defaultdict
+from dataclasses import dataclass
+from operator import attrgetter, itemgetter
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from src.models.schemas import DiarizedSegment
+
+WORD = 0
+SPACING = 1
+OTHER = 2  # e.g. audio_event
+
+_TYPE_CODES = {"word": WORD, "spacing": SPACING}
+
+SENTENCE_END = (".", "?", "!")
+
+# Words per extraction block; see _columns_from_words
+EXTRACT_BLOCK = 4096
+
+_FIELDS = ("text", "type", "start", "end", "speaker_id")
+
+_STRICT_GETTERS = {name: itemgetter(name) for name in _FIELDS}
+_LENIENT_GETTERS = {
+    "text": lambda w: w.get("text") or "",
+    "type": lambda w: w.get("type"),
+    "start": lambda w: w.get("start") or 0.0,
+    "end": lambda w: w.get("end") or 0.0,
+    "speaker_id": lambda w: w.get("speaker_id"),
+}
+_ATTR_GETTERS = {name: attrgetter(name) for name in _FIELDS}
+_LENIENT_ATTR_GETTERS = {
+    "text": lambda w: getattr(w, "text", None) or "",
+    "type": lambda w: getattr(w, "type", None),
+    "start": lambda w: getattr(w, "start", None) or 0.0,
+    "end": lambda w: getattr(w, "end", None) or 0.0,
+    "speaker_id": lambda w: getattr(w, "speaker_id", None),
+}
+
+
+@dataclass
+class WordColumns:
+    """Parallel arrays describing a word timeline."""
+    text: List[str]
+    start: np.ndarray    # seconds, float64
+    end: np.ndarray      # seconds, float64
+    speaker: np.ndarray  # int32 index into speakers, -1 for spacing
+    kind: np.ndarray     # int8: WORD, SPACING or OTHER
+    speakers: List[Optional[str]]
+
+    def __len__(self) -> int:
+        return len(self.text)
+
+
+@dataclass(frozen=True)
+class SegmentationPolicy:
+    """When to split a speaker turn into several segments. 0 disables a rule."""
+    # Split where the silence between consecutive words is at least this long
+    pause_seconds: float = 0.0
+    # Split segments longer than this
+    max_duration_seconds: float = 0.0
+    # When splitting for duration, cut after the last complete sentence if there is one
+    sentence_boundaries: bool = True
+
+
+def normalize_speaker_id(speaker_id: str) -> str:
+    """Normalize 11 Labs speaker_id to our format (speaker_0 -> spk_0)"""
+    if speaker_id.startswith("speaker_"):
+        return speaker_id.replace("speaker_", "spk_")
+    return speaker_id
+
+
+def columns_from_word_dicts(words: Sequence[dict]) -> WordColumns:
+    """Build WordColumns from ElevenLabs word dicts."""
+    try:
+        # Fast path: every field present, as in the SDK's model_dump output
+        return _columns_from_words(words, _STRICT_GETTERS)
+    except (KeyError, TypeError):
+        return _columns_from_words(words, _LENIENT_GETTERS)
+
+
+def columns_from_word_objects(words: Sequence[Any]) -> WordColumns:
+    """Build WordColumns straight from ElevenLabs SDK word models, without model_dump()."""
+    try:
+        return _columns_from_words(words, _ATTR_GETTERS)
+    except (AttributeError, TypeError):
+        return _columns_from_words(words, _LENIENT_ATTR_GETTERS)
+
+
+def _columns_from_words(words: Sequence[Any], getters: Dict[str, Callable[[Any], Any]]) -> WordColumns:
+    """
+    Extract parallel arrays from word objects.
+
+    Python-level access dominates the cost, so each field is read with a
+    C-level getter in its own pass, and timing and speaker fields are only
+    read for non-spacing words (about half of an ElevenLabs timeline).
+    Words are processed in blocks of EXTRACT_BLOCK so the passes over a
+    block find its word objects still in CPU cache; streaming each pass over
+    the whole timeline is slower than the plain per-word loop.
+    """
+    count = len(words)
+    get_text, get_type = getters["text"], getters["type"]
+    get_start, get_end, get_speaker = getters["start"], getters["end"], getters["speaker_id"]
+
+    text: List[str] = []
+    start = np.zeros(count, dtype=np.float64)
+    end = np.zeros(count, dtype=np.float64)
+    speaker = np.full(count, -1, dtype=np.int32)
+    kind = np.empty(count, dtype=np.int8)
+    type_codes = defaultdict(lambda: OTHER, _TYPE_CODES)
+    # Speakers are numbered in order of first appearance
+    speaker_codes = defaultdict(itertools.count().__next__)
+
+    for first in range(0, count, EXTRACT_BLOCK):
+        block = words[first:first + EXTRACT_BLOCK]
+        text.extend(map(get_text, block))
+        block_kind = np.fromiter(map(type_codes.__getitem__, map(get_type, block)), dtype=np.int8, count=len(block))
+        kind[first:first + len(block)] = block_kind
+
+        positions = np.flatnonzero(block_kind != SPACING)
+        content = [block[i] for i in positions.tolist()]
+        positions += first
+        start[positions] = np.fromiter(map(get_start, content), dtype=np.float64, count=len(content))
+        end[positions] = np.fromiter(map(get_end, content), dtype=np.float64, count=len(content))
+        speaker[positions] = np.fromiter(
+            map(speaker_codes.__getitem__, map(get_speaker, content)), dtype=np.int32, count=len(content)
+        )
+
+    return WordColumns(text, start, end, speaker, kind, list(speaker_codes))
+
+
+def concat_columns(
+    parts: Sequence[WordColumns],
+    offsets: Sequence[float],
+    chunk_ids: Optional[Sequence[int]] = None,
+) -> WordColumns:
+    """
+    Join word timelines transcribed separately, shifting each by its offset (seconds).
+
+    ElevenLabs diarizes each part on its own, so "speaker_0" in two parts need
+    not be the same person. When there are several parts, each part's labels
+    get a chunk suffix ("speaker_0" in chunk 1 becomes "speaker_0_c1"; chunk_ids
+    default to the part positions) rather than being merged by label.
+    """
+    if len(parts) == 1 and offsets[0] == 0:
+        return parts[0]
+
+    if chunk_ids is None:
+        chunk_ids = range(len(parts))
+    labels = [
+        [s if s is None or len(parts) == 1 else f"{s}_c{chunk}" for s in part.speakers]
+        for part, chunk in zip(parts, chunk_ids)
+    ]
+    speakers: List[Optional[str]] = list(dict.fromkeys(s for part_labels in labels for s in part_labels))
+    codes = {s: i for i, s in enumerate(speakers)}
+
+    text: List[str] = []
+    starts, ends, speaker_codes, kinds = [], [], [], []
+    for part, offset, part_labels in zip(parts, offsets, labels):
+        text.extend(part.text)
+        timed_words = part.kind != SPACING
+        starts.append(np.where(timed_words, part.start + offset, 0.0))
+        ends.append(np.where(timed_words, part.end + offset, 0.0))
+        # -1 (spacing) indexes the appended -1 at the end of the lookup
+        lookup = np.array([codes[s] for s in part_labels] + [-1], dtype=np.int32)
+        speaker_codes.append(lookup[part.speaker])
+        kinds.append(part.kind)
+
+    return WordColumns(
+        text,
+        np.concatenate(starts) if starts else np.empty(0),
+        np.concatenate(ends) if ends else np.empty(0),
+        np.concatenate(speaker_codes) if speaker_codes else np.empty(0, dtype=np.int32),
+        np.concatenate(kinds) if kinds else np.empty(0, dtype=np.int8),
+        speakers,
+    )
+
+
+def segment_boundaries(columns: WordColumns, policy: Optional[SegmentationPolicy] = None) -> np.ndarray:
+    """
+    Word indices at which new segments start.
+
+    A segment starts at every non-spacing word whose speaker differs from the
+    previous non-spacing word, and wherever the policy asks for a split.
+    Spacing before the first word is dropped; spacing after a word belongs to
+    that word's segment.
+    """
+    non_spacing = np.flatnonzero(columns.kind != SPACING)
+    if non_spacing.size == 0:
+        return non_spacing
+
+    speakers = columns.speaker[non_spacing]
+    split = np.empty(non_spacing.size, dtype=bool)
+    split[0] = True
+    split[1:] = speakers[1:] != speakers[:-1]
+
+    if policy and policy.pause_seconds > 0:
+        start = columns.start[non_spacing]
+        end = columns.end[non_spacing]
+        split[1:] |= start[1:] - end[:-1] >= policy.pause_seconds
+
+    firsts = np.flatnonzero(split)
+    if policy and policy.max_duration_seconds > 0:
+        firsts = _split_long_segments(columns, non_spacing, firsts, policy)
+
+    return non_spacing[firsts]
+
+
+def _split_long_segments(
+    columns: WordColumns,
+    non_spacing: np.ndarray,
+    firsts: np.ndarray,
+    policy: SegmentationPolicy,
+) -> np.ndarray:
+    """
+    Add cut points so no segment runs longer than policy.max_duration_seconds.
+
+    Works on positions within non_spacing. Only segments over the limit are
+    walked, one binary search per cut.
+    """
+    max_seconds = policy.max_duration_seconds
+    start = columns.start[non_spacing]
+    end = columns.end[non_spacing]
+    stops = np.append(firsts[1:], non_spacing.size)
+
+    too_long = np.flatnonzero(np.maximum.reduceat(end, firsts) - start[firsts] > max_seconds)
+    if too_long.size == 0:
+        return firsts
+
+    # Positions just after a word that ends a sentence
+    sentence_cuts = None
+    if policy.sentence_boundaries:
+        texts = columns.text
+        ends_sentence = np.fromiter(
+            (texts[i].rstrip().endswith(SENTENCE_END) for i in non_spacing.tolist()),
+            dtype=bool,
+            count=non_spacing.size,
+        )
+        sentence_cuts = np.flatnonzero(ends_sentence) + 1
+
+    cuts = []
+    for i in too_long.tolist():
+        first, stop = int(firsts[i]), int(stops[i])
+        # Running max so out-of-order word times still give a sorted search key
+        reach = np.maximum.accumulate(end[first:stop])
+        cut = first
+        while True:
+            # First word that would take the segment past the limit
+            over = first + int(np.searchsorted(reach, start[cut] + max_seconds, side="right"))
+            if over >= stop:
+                break
+            next_cut = max(over, cut + 1)
+            if sentence_cuts is not None:
+                j = int(np.searchsorted(sentence_cuts, over, side="right")) - 1
+                if j >= 0 and sentence_cuts[j] > cut:
+                    next_cut = int(sentence_cuts[j])
+            cut = next_cut
+            cuts.append(cut)
+
+    return np.union1d(firsts, cuts)
+
+
+def build_segments(
+    columns: WordColumns,
+    starts: np.ndarray,
+    meeting_id: str,
+    is_final: bool = True,
+    confidence: Optional[float] = None,
+) -> List[DiarizedSegment]:
+    """Create one DiarizedSegment per word range [starts[i], starts[i + 1])."""
+    if starts.size == 0:
+        return []
+
+    ends = np.append(starts[1:], len(columns))
+
+    # Timing comes from content words only; mask everything else out of min/max
+    is_word = columns.kind == WORD
+    word_start = np.where(is_word, columns.start, np.inf)
+    word_end = np.where(is_word, columns.end, -np.inf)
+    seg_start = np.minimum.reduceat(word_start, starts)
+    seg_end = np.maximum.reduceat(word_end, starts)
+    has_words = np.isfinite(seg_start)
+
+    start_ms = (np.where(has_words, seg_start, 0) * 1000).astype(np.int64)
+    end_ms = (np.where(has_words, seg_end, 0) * 1000).astype(np.int64)
+
+    # Speaker of the segment is the speaker of its first word
+    speaker_names = [
+        normalize_speaker_id(s) if s else "spk_0"
+        for s in columns.speakers
+    ]
+    seg_speaker = columns.speaker[starts].tolist()
+
+    # Plain lists are much faster than numpy scalars for per-segment access
+    starts_list = starts.tolist()
+    ends_list = ends.tolist()
+    start_ms = start_ms.tolist()
+    end_ms = end_ms.tolist()
+
+    segments = []
+    texts = columns.text
+    for i in np.flatnonzero(has_words).tolist():
+        text = "".join(texts[starts_list[i]:ends_list[i]]).strip()
+        if not text:
+            continue
+        # Plain construction: pydantic-core validates these few fields faster
+        # than model_construct assigns them in Python
+        segments.append(DiarizedSegment(
+            meeting_id=meeting_id,
+            speaker=speaker_names[seg_speaker[i]],
+            start_ms=start_ms[i],
+            end_ms=end_ms[i],
+            text=text,
+            is_final=is_final,
+            confidence=confidence,
+        ))
+
+    return segments
+
+
+def segment_words(
+    columns: WordColumns,
+    meeting_id: str,
+    is_final: bool = True,
+    confidence: Optional[float] = None,
+    policy: Optional[SegmentationPolicy] = None,
+) -> List[DiarizedSegment]:
+    """Split a word timeline into DiarizedSegments on speaker change and per policy."""
+    if len(columns) == 0:
+        return []
+    starts = segment_boundaries(columns, policy)
+    return build_segments(columns, starts, meeting_id, is_final, confidence)
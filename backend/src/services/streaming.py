@@ -0,0 +1,239 @@
+"""
+Streaming speech-to-text adapters for live meetings.
+
+The /meetings/{meeting_id}/stream WebSocket hands audio frames to a
+StreamingTranscriber and ingests whatever DiarizedSegments it emits. Partial
+(is_final=False) segments are only echoed to the client; final segments are
+added to the meeting and arm the pause trigger.
+"""
+import asyncio
+import base64
+import logging
+import os
+from abc import ABC, abstractmethod
+from typing import Iterable, List, Optional
+
+from src.models.schemas import DiarizedSegment
+from src.services.config import settings
+from src.services.elevenlabs_service import transcribe_audio_file, transform_elevenlabs_transcription_to_segments
+
+logger = logging.getLogger(__name__)
+
+
+class StreamingTranscriber(ABC):
+    """Turns a stream of audio frames into DiarizedSegments."""
+
+    def __init__(self, meeting_id: str):
+        self.meeting_id = meeting_id
+
+    @abstractmethod
+    async def feed(self, audio: bytes) -> List[DiarizedSegment]:
+        """Accept an audio frame; return any segments that are ready."""
+
+    @abstractmethod
+    async def commit(self, end_ms: Optional[int] = None) -> List[DiarizedSegment]:
+        """Mark the end of a self-contained chunk of audio ending at end_ms into the meeting."""
+
+    async def close(self) -> List[DiarizedSegment]:
+        """Flush remaining audio at the end of the stream."""
+        return await self.commit()
+
+
+class ReplayTranscriber(StreamingTranscriber):
+    """
+    Local stand-in that replays a scripted transcript, one segment per frame.
+
+    Used by tests and offline demos; the audio content is ignored.
+    """
+
+    def __init__(self, meeting_id: str, segments: Iterable[DiarizedSegment]):
+        super().__init__(meeting_id)
+        self._pending = list(segments)
+
+    async def feed(self, audio: bytes) -> List[DiarizedSegment]:
+        return [self._pending.pop(0)] if self._pending else []
+
+    async def commit(self, end_ms: Optional[int] = None) -> List[DiarizedSegment]:
+        segments, self._pending = self._pending, []
+        return segments
+
+
+class ElevenLabsChunkTranscriber(StreamingTranscriber):
+    """
+    Transcribes each committed chunk with the ElevenLabs batch API.
+
+    The client sends a complete, independently decodable recording per chunk
+    (e.g. restarting MediaRecorder every few seconds) and commits it with the
+    chunk's end time. Timestamps are shifted onto the meeting timeline.
+    Diarization runs per chunk, so each chunk's speakers get their own ids
+    ("spk_0" in the third chunk becomes "spk_0_c2") rather than being merged
+    with another chunk's "spk_0".
+    """
+
+    def __init__(self, meeting_id: str):
+        super().__init__(meeting_id)
+        self._chunk = bytearray()
+        self._offset_ms = 0
+        self._chunk_index = 0
+
+    async def feed(self, audio: bytes) -> List[DiarizedSegment]:
+        self._chunk += audio
+        return []
+
+    async def commit(self, end_ms: Optional[int] = None) -> List[DiarizedSegment]:
+        if not self._chunk:
+            if end_ms is not None:
+                self._offset_ms = end_ms
+            return []
+
+        audio = bytes(self._chunk)
+        self._chunk.clear()
+        offset = self._offset_ms
+        suffix = f"_c{self._chunk_index}"
+        self._chunk_index += 1
+
+        segments = await transcribe_audio_file(audio_data=audio, meeting_id=self.meeting_id, is_final=True)
+        shifted = [
+            seg.model_copy(update={
+                "speaker": seg.speaker + suffix,
+                "start_ms": seg.start_ms + offset,
+                "end_ms": seg.end_ms + offset,
+            })
+            for seg in segments
+        ]
+
+        if end_ms is not None:
+            self._offset_ms = end_ms
+        elif shifted:
+            self._offset_ms = max(seg.end_ms for seg in shifted)
+        logger.info("Transcribed stream chunk", extra={"audio_bytes": len(audio), "segments": len(shifted)})
+        return shifted
+
+
+class ElevenLabsRealtimeTranscriber(StreamingTranscriber):
+    """
+    Streams audio to the ElevenLabs realtime speech-to-text API.
+
+    Frames must be 16 kHz mono 16-bit little-endian PCM. The server commits
+    on voice activity; until then its running transcript is returned as a
+    partial segment covering the uncommitted audio, and each committed
+    transcript is segmented from its word timestamps. Events are returned
+    from the next feed() or commit() call. One session covers the whole
+    stream, so speaker ids stay consistent across the meeting (words
+    without one are attributed to "spk_0").
+    """
+
+    SAMPLE_RATE = 16000
+    # A commit with nothing left to transcribe gets no reply; don't wait long for one
+    COMMIT_WAIT_SECONDS = 2.0
+
+    def __init__(self, meeting_id: str):
+        super().__init__(meeting_id)
+        self._connection = None
+        self._events: asyncio.Queue = asyncio.Queue()
+        self._audio_ms = 0.0
+        self._final_end_ms = 0
+        self._speaker = "spk_0"
+
+    async def _open_session(self):
+        """Connect a realtime session (the SDK is only imported when streaming)."""
+        from elevenlabs.realtime import AudioFormat, CommitStrategy, ScribeRealtime
+
+        api_key = os.getenv("ELEVENLABS_API_KEY")
+        if not api_key:
+            raise ValueError("ELEVENLABS_API_KEY environment variable is required")
+        base_url = settings.elevenlabs_base_url or "https://api.elevenlabs.io"
+        scribe = ScribeRealtime(api_key=api_key, base_url=base_url.replace("http", "ws", 1))
+        return await scribe.connect({
+            "model_id": settings.elevenlabs_realtime_model,
+            "audio_format": AudioFormat.PCM_16000,
+            "sample_rate": self.SAMPLE_RATE,
+            "commit_strategy": CommitStrategy.VAD,
+            "include_timestamps": True,
+        })
+
+    async def _connect(self):
+        connection = await self._open_session()
+        for event in ("partial_transcript", "committed_transcript_with_timestamps", "error"):
+            connection.on(event, lambda data, event=event: self._events.put_nowait((event, data)))
+        return connection
+
+    async def feed(self, audio: bytes) -> List[DiarizedSegment]:
+        if self._connection is None:
+            self._connection = await self._connect()
+        await self._connection.send({"audio_base_64": base64.b64encode(audio).decode("ascii")})
+        self._audio_ms += len(audio) * 1000 / (2 * self.SAMPLE_RATE)
+        return self._drain()
+
+    async def commit(self, end_ms: Optional[int] = None) -> List[DiarizedSegment]:
+        if self._connection is None:
+            return []
+        await self._connection.commit()
+        segments = self._drain()
+        try:
+            while True:
+                event, data = await asyncio.wait_for(self._events.get(), self.COMMIT_WAIT_SECONDS)
+                segments.extend(self._handle(event, data))
+                if event == "committed_transcript_with_timestamps":
+                    break
+        except asyncio.TimeoutError:
+            pass
+        return segments
+
+    async def close(self) -> List[DiarizedSegment]:
+        if self._connection is None:
+            return []
+        try:
+            return await self.commit()
+        finally:
+            await self._connection.close()
+            self._connection = None
+
+    def _drain(self) -> List[DiarizedSegment]:
+        """Segments for the events received so far; only the latest partial is kept."""
+        finals: List[DiarizedSegment] = []
+        partial: List[DiarizedSegment] = []
+        while not self._events.empty():
+            event, data = self._events.get_nowait()
+            segments = self._handle(event, data)
+            if event == "partial_transcript":
+                partial = segments
+            else:
+                finals.extend(segments)
+                partial = []
+        return finals + partial
+
+    def _handle(self, event: str, data: dict) -> List[DiarizedSegment]:
+        if event == "error":
+            raise RuntimeError(f"ElevenLabs realtime error: {data.get('error') or data.get('message') or data}")
+
+        end_ms = max(int(self._audio_ms), self._final_end_ms)
+        text = (data.get("text") or "").strip()
+        if event == "partial_transcript":
+            if not text:
+                return []
+            return [DiarizedSegment(
+                meeting_id=self.meeting_id, speaker=self._speaker,
+                start_ms=self._final_end_ms, end_ms=end_ms, text=text, is_final=False,
+            )]
+
+        segments = transform_elevenlabs_transcription_to_segments(
+            {"words": data.get("words") or []}, self.meeting_id, is_final=True,
+        )
+        if not segments and text:
+            # Committed without word timestamps: one segment over the uncommitted audio
+            segments = [DiarizedSegment(
+                meeting_id=self.meeting_id, speaker=self._speaker,
+                start_ms=self._final_end_ms, end_ms=end_ms, text=text, is_final=True,
+            )]
+        if segments:
+            self._final_end_ms = max(self._final_end_ms, max(seg.end_ms for seg in segments))
+            self._speaker = segments[-1].speaker
+        return segments
+
+
+def create_transcriber(meeting_id: str) -> StreamingTranscriber:
+    """Transcriber used for a new stream (STREAM_TRANSCRIBER)."""
+    if settings.stream_transcriber == "chunks":
+        return ElevenLabsChunkTranscriber(meeting_id)
+    return ElevenLabsRealtimeTranscriber(meeting_id)
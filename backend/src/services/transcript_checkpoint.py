@@ -0,0 +1,90 @@
+"""
+On-disk checkpoints of transcribed audio chunks.
+
+Each chunk's raw ElevenLabs response is stored under the SHA-256 of the chunk
+bytes and the request parameters. Re-uploading a recording whose first chunks
+were already transcribed (e.g. after a later chunk failed) reuses them instead
+of paying for them again.
+
+Checkpoints hold meeting transcripts, so they are kept only as long as they
+are useful: a recording's checkpoints are deleted once all its chunks are
+transcribed, and entries left behind by uploads that were never resubmitted
+expire after a TTL.
+"""
+import hashlib
+import logging
+import os
+import tempfile
+import time
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+def chunk_key(audio: bytes, params: str) -> str:
+    """Checkpoint key for an audio chunk transcribed with the given request parameters."""
+    digest = hashlib.sha256(audio)
+    digest.update(b"\0")
+    digest.update(params.encode())
+    return digest.hexdigest()
+
+
+class TranscriptCheckpoint:
+    """Directory of raw transcription responses, one file per chunk key."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            with open(self._path(key), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logger.warning("Could not read transcript checkpoint %s: %s", key, e)
+            return None
+
+    def put(self, key: str, body: bytes):
+        """Store body atomically so a crash never leaves a partial checkpoint."""
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(body)
+            os.replace(tmp_path, self._path(key))
+        except OSError as e:
+            logger.warning("Could not write transcript checkpoint %s: %s", key, e)
+
+    def delete(self, key: str):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning("Could not delete transcript checkpoint %s: %s", key, e)
+
+    def expire(self, max_age_seconds: float) -> int:
+        """Remove checkpoints (and leftover temp files) older than max_age_seconds; returns how many."""
+        cutoff = time.time() - max_age_seconds
+        removed = 0
+        try:
+            entries = list(os.scandir(self.directory))
+        except FileNotFoundError:
+            return 0
+        except OSError as e:
+            logger.warning("Could not list transcript checkpoints: %s", e)
+            return 0
+        for entry in entries:
+            if not entry.name.endswith((".json", ".tmp")):
+                continue
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+                    removed += 1
+            except OSError:
+                continue  # removed concurrently or unreadable; try again next time
+        return removed
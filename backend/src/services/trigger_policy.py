@@ -0,0 +1,99 @@
+"""
+When to analyze a live meeting.
+
+Every final segment pushes the analysis back by the debounce (waiting for a
+pause in the conversation), but never past max_wait after the first
+unanalyzed segment, so continuous speech is still analyzed at a steady
+cadence. A pause only triggers a run once min_new_words have accumulated;
+smaller remainders wait for max_wait. Runs are also spaced by the recent
+Gemini latency so a slow model is not called back to back.
+"""
+from dataclasses import dataclass
+from typing import Optional
+
+from src.services.config import settings
+
+# Weight of the newest sample in the Gemini latency average
+LATENCY_SMOOTHING = 0.3
+
+
+class TriggerState:
+    """Unanalyzed work and recent Gemini latency of one meeting (monotonic seconds)."""
+    __slots__ = ("pending_since", "pending_words", "latency", "last_finished", "failures", "last_failed")
+
+    def __init__(self):
+        self.pending_since: Optional[float] = None  # arrival of the first unanalyzed segment
+        self.pending_words = 0
+        self.latency = 0.0
+        self.last_finished: Optional[float] = None
+        self.failures = 0  # consecutive failed runs
+        self.last_failed: Optional[float] = None
+
+    def add(self, words: int, now: float):
+        if self.pending_since is None:
+            self.pending_since = now
+        self.pending_words += words
+
+    def take(self) -> tuple:
+        """Start a run: clear the pending work and return it for restore()."""
+        taken = (self.pending_since, self.pending_words)
+        self.pending_since, self.pending_words = None, 0
+        return taken
+
+    def restore(self, taken: tuple):
+        """Put work from a failed run back, merged with anything that arrived since."""
+        since, words = taken
+        if since is not None:
+            self.pending_since = since if self.pending_since is None else min(since, self.pending_since)
+        self.pending_words += words
+
+    def finished(self, seconds: float, now: float):
+        """Record the latency of a completed Gemini call."""
+        if self.last_finished is None:
+            self.latency = seconds
+        else:
+            self.latency += LATENCY_SMOOTHING * (seconds - self.latency)
+        self.last_finished = now
+        self.failures = 0
+
+    def failed(self, now: float):
+        """Record a failed run; the retry backs off until a run completes."""
+        self.failures += 1
+        self.last_failed = now
+
+    def reset(self):
+        self.__init__()
+
+
+@dataclass
+class TriggerPolicy:
+    debounce_seconds: float
+    max_wait_seconds: float
+    min_new_words: int = 1
+    # Minimum gap between runs, as a multiple of the recent Gemini latency
+    latency_factor: float = 1.0
+
+    @classmethod
+    def from_settings(cls) -> "TriggerPolicy":
+        return cls(
+            debounce_seconds=settings.pause_trigger_seconds,
+            max_wait_seconds=settings.trigger_max_wait_seconds,
+            min_new_words=settings.trigger_min_words,
+            latency_factor=settings.trigger_latency_factor,
+        )
+
+    def delay(self, trigger: TriggerState, now: float) -> Optional[float]:
+        """Seconds until the meeting should be analyzed, or None when nothing is pending."""
+        if trigger.pending_since is None:
+            return None
+
+        deadline = trigger.pending_since + self.max_wait_seconds
+        if trigger.pending_words >= self.min_new_words:
+            deadline = min(deadline, now + self.debounce_seconds)
+        if trigger.last_finished is not None:
+            deadline = max(deadline, trigger.last_finished + self.latency_factor * trigger.latency)
+        if trigger.failures:
+            # Retry after the debounce, doubling per consecutive failure up to max_wait
+            backoff = min(self.debounce_seconds * 2 ** (trigger.failures - 1), self.max_wait_seconds)
+            deadline = max(deadline, trigger.last_failed + backoff)
+        return max(0.0, deadline - now)
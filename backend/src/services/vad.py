@@ -0,0 +1,63 @@
+"""
+Energy-based voice activity detection on decoded PCM.
+
+Audio is split into short frames, each frame's RMS level is compared with a
+threshold in dBFS, and runs of speech frames are padded and merged across
+short pauses. Only silences of at least min_silence_seconds separate regions,
+so normal pauses between words are kept intact.
+"""
+from typing import Tuple
+
+import numpy as np
+
+FRAME_SECONDS = 0.03
+
+
+def frame_levels_db(pcm: np.ndarray, sample_rate: int, frame_seconds: float = FRAME_SECONDS) -> np.ndarray:
+    """RMS level of each frame of int16 mono PCM, in dBFS."""
+    frame = max(1, int(sample_rate * frame_seconds))
+    count = len(pcm) // frame
+    if count == 0:
+        return np.empty(0, dtype=np.float32)
+
+    frames = pcm[:count * frame].reshape(count, frame).astype(np.float32) / 32768.0
+    rms = np.sqrt(np.mean(frames * frames, axis=1))
+    return 20 * np.log10(rms + 1e-10)
+
+
+def speech_regions(
+    pcm: np.ndarray,
+    sample_rate: int,
+    threshold_db: float,
+    min_silence_seconds: float,
+    padding_seconds: float,
+    frame_seconds: float = FRAME_SECONDS,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Start and end times (seconds) of the speech regions in pcm.
+
+    Regions are padded by padding_seconds on both sides and merged when the
+    silence between them is shorter than min_silence_seconds.
+    """
+    levels = frame_levels_db(pcm, sample_rate, frame_seconds)
+    speech = levels > threshold_db
+    if not speech.any():
+        return np.empty(0), np.empty(0)
+
+    # Rising and falling edges of the speech mask, in frames
+    edges = np.diff(np.concatenate(([False], speech, [False])).astype(np.int8))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+
+    padding = int(round(padding_seconds / frame_seconds))
+    starts = np.maximum(starts - padding, 0)
+    ends = np.minimum(ends + padding, len(speech))
+
+    # Merge regions separated by less than the minimum silence
+    gaps = starts[1:] - ends[:-1]
+    separate = gaps >= min_silence_seconds / frame_seconds
+    starts = np.concatenate((starts[:1], starts[1:][separate]))
+    ends = np.concatenate((ends[:-1][separate], ends[-1:]))
+
+    duration = len(pcm) / sample_rate
+    return starts * frame_seconds, np.minimum(ends * frame_seconds, duration)
@@ -0,0 +1,135 @@
+import shutil
+import subprocess
+
+import numpy as np
+import pytest
+from unittest.mock import patch
+
+from src.services.audio_preprocess import (
+    SAMPLE_RATE,
+    SpeechTimeline,
+    _transcode,
+    chunk_starts,
+    decode_wav,
+    encode_wav,
+    keep_speech,
+    preprocess_audio,
+)
+from src.services.transcript_checkpoint import chunk_key
+
+
+def tone(seconds, amplitude=8000):
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return (amplitude * np.sin(2 * np.pi * 220 * t)).astype(np.int16)
+
+
+def silence(seconds):
+    return np.zeros(int(seconds * SAMPLE_RATE), dtype=np.int16)
+
+
+class TestSpeechTimeline:
+    """Test mapping processed audio times back onto the original recording"""
+
+    def test_to_original(self):
+        """Test processed times map back across removed regions"""
+        timeline = SpeechTimeline(np.array([0.0, 20.0, 40.0]), np.array([10.0, 30.0, 50.0]))
+
+        processed = np.array([0.0, 5.0, 10.0, 15.0, 20.0, 25.0])
+
+        np.testing.assert_allclose(timeline.to_original(processed), [0.0, 5.0, 20.0, 25.0, 40.0, 45.0])
+
+    def test_keep_speech(self):
+        """Test long silences are dropped and recorded in the timeline"""
+        pcm = np.concatenate([tone(2), silence(10), tone(2)])
+
+        speech, timeline = keep_speech(pcm, SAMPLE_RATE)
+
+        assert len(speech) < len(pcm) / 2
+        np.testing.assert_allclose(timeline.to_original(np.array([1.0, 3.0])), [1.0, 13.0 - 0.5], atol=0.05)
+
+    def test_chunk_starts_cut_at_quiet_frame(self):
+        """Test long audio is chunked at the quietest moment before each limit"""
+        pcm = np.concatenate([tone(55), silence(1), tone(55), silence(1), tone(20)])
+
+        starts = chunk_starts(pcm, SAMPLE_RATE, max_seconds=60)
+
+        assert len(starts) == 3
+        assert 55 <= starts[1] / SAMPLE_RATE <= 56
+        assert 111 <= starts[2] / SAMPLE_RATE <= 112
+
+    def test_short_audio_single_chunk(self):
+        """Test audio under the limit, or with chunking disabled, stays whole"""
+        assert chunk_starts(tone(5), SAMPLE_RATE, max_seconds=60) == [0]
+        assert chunk_starts(tone(5), SAMPLE_RATE, max_seconds=0) == [0]
+
+    def test_keep_speech_without_silence(self):
+        """Test audio without long silences is left alone"""
+        pcm = tone(3)
+
+        speech, timeline = keep_speech(pcm, SAMPLE_RATE)
+
+        assert speech is pcm
+        assert timeline is None
+
+
+class TestPreprocessAudio:
+    """Test the pre-processing stage and its fallbacks"""
+
+    @pytest.mark.asyncio
+    async def test_wav_trimmed_without_ffmpeg(self):
+        """Test WAV uploads still get silence removal when ffmpeg is missing"""
+        audio = encode_wav(np.concatenate([tone(1), silence(10), tone(1)]), SAMPLE_RATE)
+
+        with patch('src.services.audio_preprocess.ffmpeg_binary', return_value=None):
+            prepared = await preprocess_audio(audio)
+
+        pcm, rate = decode_wav(prepared.chunks[0])
+        assert rate == SAMPLE_RATE
+        assert len(pcm) < 3 * SAMPLE_RATE
+        assert prepared.timeline is not None
+
+    @pytest.mark.asyncio
+    async def test_unknown_format_without_ffmpeg_returns_original(self):
+        """Test non-WAV audio is passed through when ffmpeg is missing"""
+        with patch('src.services.audio_preprocess.ffmpeg_binary', return_value=None):
+            prepared = await preprocess_audio(b"webm audio")
+
+        assert prepared.chunks == [b"webm audio"]
+        assert prepared.timeline is None
+
+    @pytest.mark.asyncio
+    async def test_ffmpeg_failure_returns_original(self):
+        """Test audio is passed through when ffmpeg fails"""
+        error = subprocess.CalledProcessError(1, "ffmpeg", stderr=b"Invalid data")
+        with patch('src.services.audio_preprocess.ffmpeg_binary', return_value="/usr/bin/ffmpeg"), \
+             patch('src.services.audio_preprocess._run_ffmpeg', side_effect=error):
+            prepared = await preprocess_audio(b"audio")
+
+        assert prepared.chunks == [b"audio"]
+
+    @pytest.mark.asyncio
+    async def test_transcode_encodes_speech_only(self):
+        """Test decoded PCM is trimmed before the encode pass"""
+        pcm = np.concatenate([tone(1), silence(10), tone(1)])
+        decode = subprocess.CompletedProcess([], 0, pcm.tobytes(), b"")
+        encode = subprocess.CompletedProcess([], 0, b"opus", b"")
+        with patch('src.services.audio_preprocess.ffmpeg_binary', return_value="/usr/bin/ffmpeg"), \
+             patch('src.services.audio_preprocess._run_ffmpeg', side_effect=[decode, encode]) as run:
+            prepared = await preprocess_audio(b"x" * 1000)
+
+        assert prepared.chunks == [b"opus"]
+        assert prepared.timeline is not None
+        decode_args, encode_args = run.call_args_list[0].args[0], run.call_args_list[1].args[0]
+        assert decode_args[decode_args.index("-ar") + 1] == "16000"
+        assert len(run.call_args_list[1].args[1]) < len(pcm.tobytes()) / 2
+        assert "libopus" in encode_args
+        assert "+bitexact" in encode_args
+
+    @pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not installed")
+    def test_transcode_is_deterministic(self):
+        """Test the same upload encodes to the same bytes, so its checkpoints are found again"""
+        audio = encode_wav(np.concatenate([tone(1), silence(3), tone(1)]), SAMPLE_RATE)
+
+        first, second = _transcode("ffmpeg", audio), _transcode("ffmpeg", audio)
+
+        assert [chunk_key(c, "") for c in first.chunks] == [chunk_key(c, "") for c in second.chunks]
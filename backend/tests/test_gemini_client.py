@@ -0,0 +1,187 @@
+import json
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.services.gemini_cache import InstructionCache
+from src.services.gemini_client import (
+    SYSTEM_INSTRUCTIONS,
+    build_prompt,
+    build_transcript_block,
+    _analyze_window,
+    _parse_response,
+    speaker_codes,
+)
+
+
+SEGMENTS = [
+    {"speaker": "spk_3", "start_ms": 0, "end_ms": 1250, "text": "Hi, I'm Sarah"},
+    {"speaker": "spk_1", "start_ms": 1250, "end_ms": 4000, "text": "Let's start"},
+    {"speaker": "spk_3", "start_ms": 4000, "end_ms": 5100, "text": "One idea"},
+]
+
+
+class TestBuildPrompt:
+    """Test prompt construction"""
+
+    def test_prompt_starts_with_static_instructions(self):
+        """Test the static instructions are a stable prefix of every prompt"""
+        assert build_prompt(SEGMENTS).startswith(SYSTEM_INSTRUCTIONS)
+        assert build_prompt([]).startswith(SYSTEM_INSTRUCTIONS)
+
+    def test_compact_transcript_encoding(self):
+        """Test segments are encoded once with short codes and ms integers"""
+        block = build_transcript_block(SEGMENTS)
+
+        assert "Legend: S0=spk_3, S1=spk_1" in block
+        assert "S0 0 1250 Hi, I'm Sarah" in block
+        assert "S1 1250 4000 Let's start" in block
+        assert block.count("One idea") == 1
+
+
+class TestParseResponse:
+    """Test normalization of Gemini responses"""
+
+    def test_speaker_codes_restored(self):
+        """Test short codes echoed by Gemini are mapped back to speaker ids"""
+        response = {
+            "summary": "s",
+            "full_transcript": [{"speaker": "S0", "start_ms": 0, "end_ms": 1250, "text": "Hi"}],
+            "inequalities": [{
+                "type": "interruption",
+                "description": "d",
+                "speaker_affected": "S0",
+                "timestamp_ms": 1250,
+                "context": "c",
+            }],
+            "meeting_statistics": {"speaking_time_by_speaker": {"S0": 2.3, "spk_1": 2.75}},
+        }
+
+        result = _parse_response(json.dumps(response), SEGMENTS)
+
+        assert result["full_transcript"][0]["speaker_id"] == "spk_3"
+        assert result["inequalities"][0]["speaker_affected"]["speaker_id"] == "spk_3"
+        assert result["meeting_statistics"]["speaking_time_by_speaker"] == {"spk_3": 2.3, "spk_1": 2.75}
+
+    def test_codes_never_collide_with_speaker_ids(self):
+        """Test a speaker literally named like a code keeps its attribution"""
+        segments = [
+            {"speaker": "spk_0", "start_ms": 0, "end_ms": 1000, "text": "Hi"},
+            {"speaker": "S0", "start_ms": 1000, "end_ms": 2000, "text": "Hello"},
+        ]
+        assert speaker_codes(segments) == {"spk_0": "S1", "S0": "S2"}
+
+        response = {
+            "summary": "s",
+            "full_transcript": [
+                {"speaker": "S1", "start_ms": 0, "end_ms": 1000, "text": "Hi"},
+                {"speaker": "S0", "start_ms": 1000, "end_ms": 2000, "text": "Hello"},
+            ],
+            "meeting_statistics": {"speaking_time_by_speaker": {"S1": 1.0, "S2": 1.0}},
+        }
+
+        result = _parse_response(json.dumps(response), segments)
+
+        assert [e["speaker_id"] for e in result["full_transcript"]] == ["spk_0", "S0"]
+        assert result["meeting_statistics"]["speaking_time_by_speaker"] == {"spk_0": 1.0, "S0": 1.0}
+
+
+class TestInstructionCache:
+    """Test context caching of the static instructions"""
+
+    def make_client(self):
+        client = MagicMock()
+        client.caches.create.return_value = SimpleNamespace(name="cachedContents/abc")
+        return client
+
+    def test_cache_created_once_per_model(self):
+        """Test the instructions are registered once and then reused"""
+        cache = InstructionCache("instructions", ttl_seconds=3600)
+        client = self.make_client()
+
+        assert cache.get(client, "gemini-2.5-flash") == "cachedContents/abc"
+        assert cache.get(client, "gemini-2.5-flash") == "cachedContents/abc"
+
+        assert client.caches.create.call_count == 1
+
+    def test_cache_renewed_near_expiry(self):
+        """Test entries close to expiry have their TTL extended"""
+        cache = InstructionCache("instructions", ttl_seconds=3600)
+        client = self.make_client()
+        cache.get(client, "gemini-2.5-flash")
+
+        with patch('src.services.gemini_cache.time.monotonic', return_value=time.monotonic() + 3500):
+            assert cache.get(client, "gemini-2.5-flash") == "cachedContents/abc"
+
+        assert client.caches.update.call_count == 1
+        assert client.caches.create.call_count == 1
+
+    def test_slow_create_does_not_block_other_calls(self):
+        """Test calls made while another thread creates the entry go uncached instead of waiting"""
+        cache = InstructionCache("instructions", ttl_seconds=3600)
+        client = self.make_client()
+        started, release = threading.Event(), threading.Event()
+
+        def slow_create(**kwargs):
+            started.set()
+            release.wait(5)
+            return SimpleNamespace(name="cachedContents/abc")
+
+        client.caches.create.side_effect = slow_create
+        creator = threading.Thread(target=cache.get, args=(client, "gemini-2.5-flash"))
+        creator.start()
+        assert started.wait(5)
+
+        assert cache.get(client, "gemini-2.5-flash") is None
+        release.set()
+        creator.join(5)
+
+        assert cache.get(client, "gemini-2.5-flash") == "cachedContents/abc"
+        assert client.caches.create.call_count == 1
+
+    def test_unsupported_model_falls_back(self):
+        """Test a model that rejects caching is not retried on every call"""
+        cache = InstructionCache("instructions", ttl_seconds=3600)
+        client = self.make_client()
+        client.caches.create.side_effect = Exception("400 cached content is too small")
+
+        assert cache.get(client, "gemini-2.0-flash") is None
+        assert cache.get(client, "gemini-2.0-flash") is None
+
+        assert client.caches.create.call_count == 1
+
+    @pytest.mark.asyncio
+    @patch('src.services.gemini_client.instruction_cache')
+    async def test_analysis_sends_only_transcript_with_cache(self, mock_cache):
+        """Test cached calls send the transcript and reference the cache"""
+        mock_cache.get.return_value = "cachedContents/abc"
+        client = MagicMock()
+        client.models.generate_content.return_value = SimpleNamespace(text='{"summary": "ok"}')
+
+        result = await _analyze_window(client, ["gemini-2.5-flash"], SEGMENTS)
+
+        kwargs = client.models.generate_content.call_args.kwargs
+        assert kwargs["config"]["cached_content"] == "cachedContents/abc"
+        assert kwargs["contents"] == build_transcript_block(SEGMENTS)
+        assert result["summary"] == "ok"
+
+    @pytest.mark.asyncio
+    @patch('src.services.gemini_client.instruction_cache')
+    async def test_analysis_retries_uncached_on_cache_error(self, mock_cache):
+        """Test a rejected cache entry falls back to a plain system instruction"""
+        mock_cache.get.return_value = "cachedContents/expired"
+        client = MagicMock()
+        client.models.generate_content.side_effect = [
+            Exception("404 cached content not found"),
+            SimpleNamespace(text='{"summary": "ok"}'),
+        ]
+
+        result = await _analyze_window(client, ["gemini-2.5-flash"], SEGMENTS)
+
+        kwargs = client.models.generate_content.call_args.kwargs
+        assert kwargs["config"]["system_instruction"] == SYSTEM_INSTRUCTIONS
+        mock_cache.invalidate.assert_called_once_with("gemini-2.5-flash")
+        assert result["summary"] == "ok"
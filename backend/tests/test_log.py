@@ -0,0 +1,50 @@
+import json
+import logging
+
+from src.services.log import ContextFilter, JsonFormatter, bind_context, log_context, meeting_id_var
+
+
+def make_record(msg="hello", **extra):
+    record = logging.LogRecord("test", logging.INFO, __file__, 1, msg, None, None)
+    for key, value in extra.items():
+        setattr(record, key, value)
+    return record
+
+
+class TestStructuredLogging:
+    """Test correlation ids and JSON formatting"""
+
+    def test_context_ids_attached(self):
+        """Test records pick up correlation ids bound in the current context"""
+        record = make_record()
+
+        with log_context(meeting_id="meeting-1", job_id="job-1"):
+            ContextFilter().filter(record)
+
+        assert record.meeting_id == "meeting-1"
+        assert record.job_id == "job-1"
+        assert record.model is None
+        assert meeting_id_var.get() is None
+
+    def test_json_formatter_includes_context_and_extra(self):
+        """Test the JSON line carries the message, correlation ids and extra fields"""
+        record = make_record("Prompt size", prompt_tokens=1200)
+
+        with log_context(meeting_id="meeting-1"):
+            ContextFilter().filter(record)
+
+        entry = json.loads(JsonFormatter().format(record))
+
+        assert entry["msg"] == "Prompt size"
+        assert entry["level"] == "INFO"
+        assert entry["meeting_id"] == "meeting-1"
+        assert entry["prompt_tokens"] == 1200
+        assert "job_id" not in entry
+
+    def test_bind_context_isolated_per_context(self):
+        """Test bindings made inside a copied context do not leak out"""
+        import contextvars
+
+        contextvars.copy_context().run(bind_context, meeting_id="inner")
+
+        assert meeting_id_var.get() is None
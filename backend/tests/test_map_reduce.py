@@ -0,0 +1,238 @@
+import asyncio
+
+import pytest
+from prometheus_client import REGISTRY
+from unittest.mock import patch
+
+from src.models.schemas import GeminiOutput
+from src.services.gemini_client import call_gemini
+from src.services.gemini_reduce import reduce_outputs
+from src.services.prompt_budget import estimate_tokens, split_into_windows
+
+
+def make_segment(speaker, start_ms, end_ms, text="word " * 10):
+    return {"speaker": speaker, "start_ms": start_ms, "end_ms": end_ms, "text": text}
+
+
+def make_result(summary, speaker, suggestions=None, inequalities=None, words=10):
+    return {
+        "summary": summary,
+        "action_items": [],
+        "important_points": ["Shared point", f"{summary} point"],
+        "meeting_statistics": {
+            "total_duration_seconds": 10.0,
+            "total_speakers": 1,
+            "speaking_time_by_speaker": {speaker: 10.0},
+            "total_words": words,
+            "words_by_speaker": {speaker: words},
+            "interruptions_count": 1,
+            "average_turn_length_seconds": 5.0,
+        },
+        "inequalities": inequalities or [],
+        "full_transcript": [],
+        "amplified_transcript": [],
+        "suggestions": suggestions or [],
+        "sentiment": None,
+    }
+
+
+class TestPromptBudget:
+    """Test token estimation and window splitting"""
+
+    def test_estimate_tokens(self):
+        """Test tokens are estimated from character length"""
+        assert estimate_tokens("") == 0
+        assert estimate_tokens("abcd") == 1
+        assert estimate_tokens("abcde") == 2
+
+    def test_single_window_when_within_budget(self):
+        """Test a small transcript stays in one window"""
+        segments = [make_segment("spk_0", 0, 1000), make_segment("spk_1", 1000, 2000)]
+
+        windows = split_into_windows(segments, 1000, lambda s: 10)
+
+        assert windows == [segments]
+
+    def test_windows_split_on_speaker_turns(self):
+        """Test windows never split a speaker turn that fits the budget"""
+        segments = [
+            make_segment("spk_0", 0, 1000),
+            make_segment("spk_0", 1000, 2000),
+            make_segment("spk_1", 2000, 3000),
+            make_segment("spk_1", 3000, 4000),
+        ]
+
+        windows = split_into_windows(segments, 30, lambda s: 10)
+
+        assert [[s["start_ms"] for s in w] for w in windows] == [[0, 1000], [2000, 3000]]
+
+    def test_oversized_turn_split_on_segments(self):
+        """Test a turn larger than the budget is cut on segment boundaries"""
+        segments = [make_segment("spk_0", i * 1000, (i + 1) * 1000) for i in range(5)]
+
+        windows = split_into_windows(segments, 20, lambda s: 10)
+
+        assert [len(w) for w in windows] == [2, 2, 1]
+        assert [s for w in windows for s in w] == segments
+
+
+class TestReduceOutputs:
+    """Test merging of per-window Gemini results"""
+
+    def test_reduce_merges_into_valid_output(self):
+        """Test the merged result validates as GeminiOutput with merged stats"""
+        windows = [
+            [make_segment("spk_0", 0, 10000)],
+            [make_segment("spk_1", 10000, 25000)],
+        ]
+        results = [make_result("First", "spk_0"), make_result("Second", "spk_1")]
+
+        merged = reduce_outputs(results, windows)
+        output = GeminiOutput(**merged)
+
+        stats = output.meeting_statistics
+        assert stats.total_duration_seconds == 25.0
+        assert stats.total_speakers == 2
+        assert stats.total_words == 20
+        assert stats.interruptions_count == 2
+        assert stats.speaking_time_by_speaker == {"spk_0": 10.0, "spk_1": 10.0}
+        assert output.important_points == ["Shared point", "First point", "Second point"]
+        assert "First" in output.summary and "Second" in output.summary
+
+    def test_reduce_dedupes_inequalities(self):
+        """Test identical inequalities reported by two windows are merged"""
+        inequality = {
+            "type": "interruption",
+            "description": "Interrupted",
+            "speaker_affected": {"speaker_id": "spk_1", "speaker_name": None},
+            "timestamp_ms": 9000,
+            "context": "...",
+        }
+        windows = [[make_segment("spk_0", 0, 10000)], [make_segment("spk_1", 10000, 20000)]]
+        results = [
+            make_result("First", "spk_0", inequalities=[inequality]),
+            make_result("Second", "spk_1", inequalities=[dict(inequality)]),
+        ]
+
+        merged = reduce_outputs(results, windows)
+
+        assert len(merged["inequalities"]) == 1
+
+    def test_reduce_ranks_suggestions(self):
+        """Test suggestions are collapsed and ordered by priority then votes"""
+        def suggestion(action, priority, target):
+            return {
+                "action": action,
+                "reason": "r",
+                "priority": priority,
+                "target_speaker": {"speaker_id": target, "speaker_name": None},
+                "suggested_message": "m",
+            }
+
+        windows = [[make_segment("spk_0", 0, 10000)], [make_segment("spk_1", 10000, 20000)]]
+        results = [
+            make_result("First", "spk_0", suggestions=[
+                suggestion("encourage_input", "low", "spk_1"),
+                suggestion("invite_quiet_people", "medium", "spk_2"),
+            ]),
+            make_result("Second", "spk_1", suggestions=[
+                suggestion("encourage_input", "high", "spk_1"),
+                suggestion("let_speaker_finish", "medium", "spk_0"),
+                suggestion("invite_quiet_people", "medium", "spk_2"),
+            ]),
+        ]
+
+        merged = reduce_outputs(results, windows)
+
+        actions = [(s["action"], s["priority"]) for s in merged["suggestions"]]
+        assert actions == [
+            ("encourage_input", "high"),
+            ("invite_quiet_people", "medium"),
+            ("let_speaker_finish", "medium"),
+        ]
+        assert merged["meeting_statistics"]["encourage_input_count"] == 1
+
+
+class TestCallGeminiMapReduce:
+    """Test call_gemini switches to map-reduce for long transcripts"""
+
+    @pytest.mark.asyncio
+    @patch('src.services.gemini_client._new_client')
+    @patch('src.services.gemini_client._analyze_window')
+    async def test_long_transcript_is_windowed(self, mock_analyze, mock_new_client):
+        """Test oversized transcripts are analyzed per window and reduced"""
+        async def analyze(client, models, window):
+            return make_result(f"Window {window[0]['start_ms']}", window[0]["speaker"])
+
+        mock_analyze.side_effect = analyze
+        segments = [
+            make_segment(f"spk_{i % 2}", i * 1000, (i + 1) * 1000, "word " * 400)
+            for i in range(20)
+        ]
+
+        with patch('src.services.gemini_client.settings.gemini_max_prompt_tokens', 6000):
+            result = await call_gemini(segments)
+
+        assert mock_analyze.call_count > 1
+        analyzed = [s for call in mock_analyze.call_args_list for s in call.args[2]]
+        assert analyzed == segments
+        GeminiOutput(**result)
+
+    @pytest.mark.asyncio
+    @patch('src.services.gemini_client._new_client')
+    @patch('src.services.gemini_client._analyze_window')
+    async def test_short_transcript_single_call(self, mock_analyze, mock_new_client):
+        """Test transcripts within budget are analyzed in one call"""
+        mock_analyze.return_value = make_result("Only", "spk_0")
+
+        result = await call_gemini([make_segment("spk_0", 0, 1000)])
+
+        assert mock_analyze.call_count == 1
+        assert result["summary"] == "Only"
+
+    @pytest.mark.asyncio
+    @patch('src.services.gemini_client._new_client')
+    @patch('src.services.gemini_client._analyze_window')
+    async def test_failed_analysis_counted_once(self, mock_analyze, mock_new_client):
+        """Test a failed analysis is one Gemini error, however many windows failed"""
+        mock_analyze.side_effect = Exception("Gemini API error")
+        segments = [
+            make_segment(f"spk_{i % 2}", i * 1000, (i + 1) * 1000, "word " * 400)
+            for i in range(20)
+        ]
+        before = REGISTRY.get_sample_value("levelus_errors_total", {"stage": "gemini"}) or 0
+
+        with patch('src.services.gemini_client.settings.gemini_max_prompt_tokens', 6000):
+            with pytest.raises(Exception, match="Gemini API error"):
+                await call_gemini(segments)
+
+        assert REGISTRY.get_sample_value("levelus_errors_total", {"stage": "gemini"}) == before + 1
+
+    @pytest.mark.asyncio
+    @patch('src.services.gemini_client._new_client')
+    @patch('src.services.gemini_client._analyze_window')
+    async def test_failed_window_cancels_the_others(self, mock_analyze, mock_new_client):
+        """Test the remaining windows stop as soon as one window fails"""
+        cancelled = []
+
+        async def analyze(client, models, window):
+            if window[0]["start_ms"] == 0:
+                raise Exception("Gemini API error")
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(window[0]["start_ms"])
+                raise
+
+        mock_analyze.side_effect = analyze
+        segments = [
+            make_segment(f"spk_{i % 2}", i * 1000, (i + 1) * 1000, "word " * 400)
+            for i in range(20)
+        ]
+
+        with patch('src.services.gemini_client.settings.gemini_max_prompt_tokens', 6000):
+            with pytest.raises(Exception, match="Gemini API error"):
+                await asyncio.wait_for(call_gemini(segments), 5)
+        await asyncio.sleep(0)
+
+        assert cancelled
@@ -4,7 +4,8 @@ from unittest.mock import AsyncMock, patch, MagicMock
 import time
 
 from src.models.schemas import DiarizedSegment, TimestampedGeminiOutput
-from src.services.meeting import MeetingState, get_meeting, schedule_pause_trigger, run_gemini, MEETINGS
+from src.services.config import settings
+from src.services.meeting import MeetingState, analyze, get_meeting, schedule_pause_trigger, run_gemini, MEETINGS, pause_triggers
 
 
 @pytest.fixture
@@ -13,6 +14,7 @@ def clear_meetings():
     MEETINGS.clear()
     yield
     MEETINGS.clear()
+    pause_triggers.close()
 
 
 @pytest.fixture
@@ -150,35 +152,42 @@ class TestMeetingService:
         """Test pause trigger scheduling"""
         state = get_meeting("test-meeting")
         
-        await schedule_pause_trigger(state, 0.1)
-        
-        assert state.pause_task is not None
-        assert not state.pause_task.done()
-        
-        # Wait for task to complete
-        await asyncio.sleep(0.15)
-        
-        # Task should be done (but we can't verify run_gemini was called without mocking)
-        # Just verify task exists and can be cancelled
-        if state.pause_task and not state.pause_task.done():
-            state.pause_task.cancel()
+        with patch('src.services.meeting.analyze', new_callable=AsyncMock) as mock_analyze:
+            await schedule_pause_trigger(state, 0.1)
+            
+            assert pause_triggers.deadline("test-meeting") is not None
+            mock_analyze.assert_not_called()
+            
+            # Wait for the deadline to pass
+            await asyncio.sleep(0.15)
+            
+            mock_analyze.assert_awaited_once_with(state)
+            assert pause_triggers.deadline("test-meeting") is None
     
     @pytest.mark.asyncio
     async def test_schedule_pause_trigger_cancels_previous(self, clear_meetings):
-        """Test that scheduling a new pause trigger cancels the previous one"""
+        """Test that scheduling a new pause trigger replaces the previous one"""
         state = get_meeting("test-meeting")
         
-        await schedule_pause_trigger(state, 1.0)
-        task1 = state.pause_task
+        with patch('src.services.meeting.analyze', new_callable=AsyncMock) as mock_analyze:
+            await schedule_pause_trigger(state, 0.05)
+            await schedule_pause_trigger(state, 0.15)
+            
+            await asyncio.sleep(0.1)
+            mock_analyze.assert_not_called()
+            
+            await asyncio.sleep(0.1)
+            mock_analyze.assert_awaited_once_with(state)
+    
+    @pytest.mark.asyncio
+    async def test_reset_cancels_pause_trigger(self, clear_meetings):
+        """Test clearing a meeting drops its pending trigger"""
+        state = get_meeting("test-meeting")
         
-        await schedule_pause_trigger(state, 0.1)
-        task2 = state.pause_task
+        await schedule_pause_trigger(state, 1.0)
+        state.clear()
         
-        assert task1 is not task2
-        # Give cancellation time to propagate
-        await asyncio.sleep(0.01)
-        # Task should be cancelled or in the process of being cancelled
-        assert task1.cancelled() or task1.done()
+        assert pause_triggers.deadline("test-meeting") is None
     
     @pytest.mark.asyncio
     @patch('src.services.meeting.call_gemini')
@@ -295,3 +304,155 @@ class TestMeetingService:
         assert len(state.gemini_outputs) == 1
         assert state.gemini_outputs[0].start_ms == 1000
         assert state.gemini_outputs[0].end_ms == 2000
+
+
+def make_output(summary="Summary"):
+    return {
+        "summary": summary,
+        "action_items": [],
+        "important_points": [],
+        "meeting_statistics": {
+            "total_duration_seconds": 1.0,
+            "total_speakers": 1,
+            "speaking_time_by_speaker": {"spk_0": 1.0},
+            "total_words": 2,
+            "words_by_speaker": {"spk_0": 2},
+            "interruptions_count": 0,
+            "average_turn_length_seconds": 1.0,
+        },
+        "inequalities": [],
+        "full_transcript": [],
+        "amplified_transcript": [],
+        "suggestions": [],
+    }
+
+
+class TestAnalysisCancellation:
+    """Test in-flight analyses are cancelled by reset and superseded by flush"""
+
+    def make_segment(self, text, start_ms):
+        return DiarizedSegment(
+            meeting_id="test-meeting", speaker="spk_0",
+            start_ms=start_ms, end_ms=start_ms + 1000, text=text,
+        )
+
+    @pytest.mark.asyncio
+    async def test_reset_cancels_running_call(self, clear_meetings):
+        """Test a reset cancels Gemini and the stale run stores nothing"""
+        started = asyncio.Event()
+        cancelled = asyncio.Event()
+
+        async def slow_gemini(segments):
+            started.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+            return make_output()
+
+        state = get_meeting("test-meeting")
+        state.append(self.make_segment("Old topic", 0))
+
+        with patch('src.services.meeting.call_gemini', slow_gemini):
+            run = asyncio.create_task(run_gemini(state))
+            await started.wait()
+            state.clear()
+            await run
+
+        assert cancelled.is_set()
+        assert len(state.gemini_outputs) == 0
+        assert state.last_cutoff == 0
+        assert not state.gemini_running
+
+    @pytest.mark.asyncio
+    async def test_flush_supersedes_running_call(self, clear_meetings):
+        """Test a superseding run cancels the old call and covers its window"""
+        first_started = asyncio.Event()
+        calls = []
+
+        async def gemini(segments):
+            calls.append([s["text"] for s in segments])
+            if len(calls) == 1:
+                first_started.set()
+                await asyncio.sleep(10)
+            return make_output()
+
+        state = get_meeting("test-meeting")
+        state.append(self.make_segment("First", 0))
+
+        with patch('src.services.meeting.call_gemini', gemini):
+            first = asyncio.create_task(run_gemini(state))
+            await first_started.wait()
+            state.append(self.make_segment("Second", 1000))
+            await run_gemini(state, supersede=True)
+            await first
+
+        assert calls == [["First"], ["First", "Second"]]
+        assert len(state.gemini_outputs) == 1
+        assert state.gemini_outputs[0].end_ms == 2000
+        assert state.last_cutoff == 2000
+
+    @pytest.mark.asyncio
+    async def test_failed_superseding_run_is_retried(self, clear_meetings):
+        """Test a flush that fails after superseding a run keeps that run's work pending"""
+        first_started = asyncio.Event()
+        calls = []
+
+        async def gemini(segments):
+            calls.append(len(segments))
+            if len(calls) == 1:
+                first_started.set()
+                await asyncio.sleep(10)
+            raise RuntimeError("Gemini unavailable")
+
+        state = get_meeting("test-meeting")
+        state.append(self.make_segment("First", 0))
+        state.trigger.add(1, now=100.0)
+
+        with patch('src.services.meeting.call_gemini', gemini):
+            first = asyncio.create_task(analyze(state))
+            await first_started.wait()
+            with pytest.raises(RuntimeError):
+                await analyze(state, supersede=True)
+            await first
+
+        assert state.trigger.pending_since == 100.0
+        assert state.trigger.failures == 1
+        assert pause_triggers.deadline("test-meeting") is not None
+
+    @pytest.mark.asyncio
+    async def test_backlog_window_is_capped(self, clear_meetings, monkeypatch):
+        """Test a backlog left by failed runs is not resent from the cold tier"""
+        monkeypatch.setattr(settings, "max_buffer_segments", 10)
+        state = get_meeting("test-meeting")
+        for i in range(50):
+            state.append(self.make_segment(f"segment {i}", i * 1000))
+        calls = []
+
+        async def gemini(segments):
+            calls.append([s["text"] for s in segments])
+            return make_output()
+
+        with patch('src.services.meeting.call_gemini', gemini):
+            await run_gemini(state)
+
+        assert len(calls[0]) <= 10
+        assert calls[0][-1] == "segment 49"
+        assert state.last_cutoff == 50000
+
+    @pytest.mark.asyncio
+    async def test_cutoff_stops_at_analyzed_window(self, clear_meetings):
+        """Test segments arriving during a call are left for the next run"""
+        state = get_meeting("test-meeting")
+        state.append(self.make_segment("Analyzed", 0))
+
+        async def gemini(segments):
+            state.append(self.make_segment("Arrived meanwhile", 1000))
+            return make_output()
+
+        with patch('src.services.meeting.call_gemini', gemini):
+            await run_gemini(state)
+
+        assert state.last_cutoff == 1000
+        assert "Arrived meanwhile" in state.recent_text()
@@ -0,0 +1,114 @@
+import pytest
+
+from src.models.schemas import TimestampedGeminiOutput
+from src.services.output_history import DECODED_BLOCKS, KEYFRAME_INTERVAL, OutputHistory, apply, diff
+from tests.test_meeting import make_output
+
+
+def make_timestamped(i, transcript_length=None):
+    """Output i of a meeting whose analyses grow cumulatively"""
+    output = make_output(f"Summary {i}")
+    output["meeting_statistics"]["total_words"] = 10 * i
+    output["meeting_statistics"]["words_by_speaker"] = {f"spk_{j}": i for j in range(1 + i % 3)}
+    output["full_transcript"] = [
+        {"speaker_id": "spk_0", "start_ms": k * 1000, "end_ms": k * 1000 + 900, "text": f"line {k}"}
+        for k in range(transcript_length if transcript_length is not None else i + 1)
+    ]
+    return TimestampedGeminiOutput(timestamp_ms=i, start_ms=0, end_ms=(i + 1) * 1000, **output)
+
+
+class TestDiff:
+    """Test structural deltas between dumped outputs"""
+
+    def test_round_trip(self):
+        """Test applying a diff reproduces the new value"""
+        old = make_timestamped(3).model_dump(mode="json")
+        new = make_timestamped(4).model_dump(mode="json")
+        assert apply(old, diff(old, new)) == new
+        assert apply({}, diff({}, new)) == new
+
+    def test_unchanged_fields_are_omitted(self):
+        """Test a delta only holds what changed, and lists only their new tail"""
+        old = make_timestamped(3).model_dump(mode="json")
+        new = make_timestamped(4).model_dump(mode="json")
+        changes = diff(old, new)
+
+        assert "inequalities" not in changes
+        assert changes["full_transcript"] == {"keep": 4, "append": [new["full_transcript"][4]]}
+        assert changes["meeting_statistics"]["patch"] == {
+            "total_words": {"set": 40},
+            "words_by_speaker": {"patch": {"spk_0": {"set": 4}, "spk_1": {"set": 4}}, "remove": []},
+        }
+
+    def test_removed_keys_and_shrinking_lists(self):
+        """Test dict keys can disappear and lists can shrink"""
+        old = {"by_speaker": {"a": 1, "b": 2}, "items": [1, 2, 3]}
+        new = {"by_speaker": {"a": 1}, "items": [1, 2]}
+        assert apply(old, diff(old, new)) == new
+
+
+class TestOutputHistory:
+    """Test the delta-backed output sequence"""
+
+    def test_sequence_interface(self):
+        """Test len, indexing and iteration across keyframes"""
+        outputs = [make_timestamped(i) for i in range(2 * KEYFRAME_INTERVAL + 3)]
+        history = OutputHistory()
+        for output in outputs:
+            history.append(output)
+
+        assert len(history) == len(outputs)
+        assert list(history) == outputs
+        assert history[0] == outputs[0]
+        assert history[KEYFRAME_INTERVAL + 5] == outputs[KEYFRAME_INTERVAL + 5]
+        assert history[-1] is outputs[-1]
+        assert history.latest is outputs[-1]
+        with pytest.raises(IndexError):
+            history[len(outputs)]
+
+    def test_snapshots(self):
+        """Test snapshots yields each dumped output without building models"""
+        outputs = [make_timestamped(i) for i in range(KEYFRAME_INTERVAL + 3)]
+        history = OutputHistory()
+        for output in outputs:
+            history.append(output)
+
+        snapshots = list(history.snapshots())
+        assert snapshots == [output.model_dump(mode="json") for output in outputs]
+        assert all(type(snapshot) is dict for snapshot in snapshots)
+
+    def test_deltas_since(self):
+        """Test a client holding output n-1 can catch up from the deltas"""
+        history = OutputHistory()
+        for i in range(5):
+            history.append(make_timestamped(i))
+
+        state = history.snapshot(2)
+        for changes in history.deltas(3):
+            state = apply(state, changes)
+        assert state == make_timestamped(4).model_dump(mode="json")
+
+    def test_old_blocks_are_compressed(self):
+        """Test only the newest block stays inflated and cold reads go through the LRU"""
+        outputs = [make_timestamped(i) for i in range(3 * KEYFRAME_INTERVAL + 1)]
+        history = OutputHistory()
+        for output in outputs:
+            history.append(output)
+
+        assert [isinstance(block, bytes) for block in history._blocks] == [True, True, True, False]
+        assert history.nbytes() > 0
+        assert history[3] == outputs[3]
+        assert history[KEYFRAME_INTERVAL + 1] == outputs[KEYFRAME_INTERVAL + 1]
+        assert history[2 * KEYFRAME_INTERVAL] == outputs[2 * KEYFRAME_INTERVAL]
+        assert len(history._decoded) == DECODED_BLOCKS
+        assert list(history) == outputs
+
+    def test_clear(self):
+        """Test clearing empties the history"""
+        history = OutputHistory()
+        history.append(make_timestamped(0))
+        history.clear()
+
+        assert len(history) == 0
+        assert history.latest is None
+        assert list(history) == []
@@ -5,7 +5,9 @@ from unittest.mock import patch, AsyncMock
 import json
 
 from src.main import app
+from src.models.schemas import DiarizedSegment
 from src.services.meeting import MEETINGS
+from src.services.streaming import ReplayTranscriber
 
 
 @pytest.fixture
@@ -32,6 +34,30 @@ class TestHealthEndpoint:
         assert response.json() == {"ok": True}
 
 
+class TestMetricsEndpoint:
+    """Test Prometheus metrics endpoint"""
+    
+    def test_metrics_endpoint(self, client, clear_meetings):
+        """Test metrics are exposed in Prometheus text format"""
+        client.post("/segment", json={
+            "meeting_id": "test-meeting-1",
+            "speaker": "spk_0",
+            "start_ms": 0,
+            "end_ms": 1000,
+            "text": "Hello world",
+            "is_final": True
+        })
+        
+        response = client.get("/metrics")
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        body = response.text
+        assert "levelus_active_meetings 1.0" in body
+        assert "levelus_buffered_segments 1.0" in body
+        assert 'route="/segment"' in body
+
+
 class TestSegmentEndpoint:
     """Test segment ingestion endpoint"""
     
@@ -97,6 +123,54 @@ class TestSegmentEndpoint:
         assert len(state.buffer) == 0
 
 
+class TestStreamEndpoint:
+    """Test live audio streaming over WebSocket"""
+
+    def make_segment(self, text, start_ms, is_final=True):
+        return DiarizedSegment(
+            meeting_id="live-1", speaker="spk_0", start_ms=start_ms,
+            end_ms=start_ms + 1000, text=text, is_final=is_final,
+        )
+
+    def test_stream_emits_partial_and_final_segments(self, client, clear_meetings):
+        """Test partial segments are echoed and final segments are ingested"""
+        script = [
+            self.make_segment("Hello", 0, is_final=False),
+            self.make_segment("Hello everyone", 0),
+            self.make_segment("Next item", 1000),
+        ]
+
+        with patch('src.api.routes.create_transcriber', lambda meeting_id: ReplayTranscriber(meeting_id, script)):
+            with client.websocket_connect("/meetings/live-1/stream") as ws:
+                ws.send_bytes(b"frame-1")
+                partial = ws.receive_json()
+                ws.send_bytes(b"frame-2")
+                final = ws.receive_json()
+                ws.send_json({"type": "end"})
+                rest = ws.receive_json()
+
+        assert partial["type"] == "partial"
+        assert partial["segment"]["text"] == "Hello"
+        assert final["type"] == "final"
+        assert rest["segment"]["text"] == "Next item"
+
+        from src.services.meeting import get_meeting, pause_triggers
+        state = get_meeting("live-1")
+        assert [s.text for s in state.buffer] == ["Hello everyone", "Next item"]
+        assert pause_triggers.deadline("live-1") is not None
+
+    def test_stream_flushes_on_disconnect(self, client, clear_meetings):
+        """Test segments pending when the client disconnects are still ingested"""
+        script = [self.make_segment("Kept", 0)]
+
+        with patch('src.api.routes.create_transcriber', lambda meeting_id: ReplayTranscriber(meeting_id, script)):
+            with client.websocket_connect("/meetings/live-1/stream") as ws:
+                ws.send_json({"type": "noop"})
+
+        from src.services.meeting import get_meeting
+        assert [s.text for s in get_meeting("live-1").buffer] == ["Kept"]
+
+
 class TestControlEndpoint:
     """Test control endpoint"""
     
@@ -204,6 +278,114 @@ class TestGetMeetingEndpoint:
         assert data["segments"][0]["start_ms"] == 0
         assert data["segments"][1]["start_ms"] == 1000
     
+    def test_get_meeting_state_full_history(self, client, clear_meetings, monkeypatch):
+        """Test segments beyond the hot buffer are still returned, and range filtering"""
+        from src.services.config import settings
+        from src.services.meeting import get_meeting
+        from src.models.schemas import DiarizedSegment
+
+        monkeypatch.setattr(settings, "max_buffer_segments", 4)
+        state = get_meeting("test-meeting-1")
+        for i in range(20):
+            state.append(DiarizedSegment(
+                meeting_id="test-meeting-1", speaker="spk_0",
+                start_ms=i * 1000, end_ms=i * 1000 + 500, text=f"Segment {i}",
+            ))
+
+        assert len(state.buffer.hot) <= 4
+        data = client.get("/meeting/test-meeting-1").json()
+        assert [s["text"] for s in data["segments"]] == [f"Segment {i}" for i in range(20)]
+
+        data = client.get("/meeting/test-meeting-1", params={"start_ms": 2000, "end_ms": 4000}).json()
+        assert [s["text"] for s in data["segments"]] == ["Segment 2", "Segment 3"]
+
+    def test_get_meeting_state_gzip(self, client, clear_meetings):
+        """Test large responses are gzip-compressed when the client accepts it"""
+        from src.services.meeting import get_meeting
+        from src.models.schemas import DiarizedSegment
+
+        state = get_meeting("test-meeting-1")
+        for i in range(50):
+            state.append(DiarizedSegment(
+                meeting_id="test-meeting-1", speaker="spk_0",
+                start_ms=i * 1000, end_ms=i * 1000 + 500, text="A fairly long sentence in a long meeting.",
+            ))
+
+        response = client.get("/meeting/test-meeting-1", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["content-type"] == "application/json"
+        assert len(response.json()["segments"]) == 50
+
+        response = client.get("/meeting/test-meeting-1", headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in response.headers
+
+    def add_output(self, state):
+        from src.models.schemas import TimestampedGeminiOutput
+        from tests.test_meeting import make_output
+
+        transcript = [{"speaker_id": "spk_0", "start_ms": 0, "end_ms": 1000, "text": "Hello"}]
+        state.gemini_outputs.append(TimestampedGeminiOutput(
+            timestamp_ms=1, start_ms=0, end_ms=1000,
+            **{**make_output("Recap"), "full_transcript": transcript},
+        ))
+
+    def test_get_meeting_state_summary_view(self, client, clear_meetings):
+        """Test view=summary drops the transcript copies from each output"""
+        from src.services.meeting import get_meeting
+        state = get_meeting("test-meeting-1")
+        self.add_output(state)
+
+        full = client.get("/meeting/test-meeting-1").json()
+        assert full["gemini_outputs"][0]["full_transcript"][0]["text"] == "Hello"
+
+        summary = client.get("/meeting/test-meeting-1", params={"view": "summary"}).json()
+        output = summary["gemini_outputs"][0]
+        assert output["summary"] == "Recap"
+        assert "full_transcript" not in output
+        assert "amplified_transcript" not in output
+
+    def test_get_meeting_state_serves_stored_outputs(self, client, clear_meetings):
+        """Test outputs served from stored snapshots match the validated models"""
+        from src.services.meeting import get_meeting
+        state = get_meeting("test-meeting-1")
+        self.add_output(state)
+        self.add_output(state)
+
+        data = client.get("/meeting/test-meeting-1").json()
+        assert data["gemini_outputs"] == [output.model_dump(mode="json") for output in state.gemini_outputs]
+
+    def test_get_meeting_state_fields(self, client, clear_meetings):
+        """Test fields= returns only the requested (nested) fields"""
+        from src.services.meeting import get_meeting
+        state = get_meeting("test-meeting-1")
+        state.append(DiarizedSegment(meeting_id="test-meeting-1", speaker="spk_0", start_ms=0, end_ms=1000, text="Hi"))
+        self.add_output(state)
+
+        data = client.get("/meeting/test-meeting-1", params={"fields": "meeting_id,gemini_outputs.summary"}).json()
+        assert data == {"meeting_id": "test-meeting-1", "gemini_outputs": [{"summary": "Recap"}]}
+
+        response = client.get("/meeting/test-meeting-1", params={"fields": "gemini_outputs.nope"})
+        assert response.status_code == 400
+        assert "gemini_outputs.nope" in response.json()["error"]
+
+    def test_get_output_deltas(self, client, clear_meetings):
+        """Test output history is served as deltas since a given index"""
+        from src.services.meeting import get_meeting
+        from src.services.output_history import apply
+        state = get_meeting("test-meeting-1")
+        self.add_output(state)
+        self.add_output(state)
+
+        data = client.get("/meeting/test-meeting-1/outputs").json()
+        assert (data["count"], data["since"], len(data["deltas"])) == (2, 0, 2)
+        first = apply({}, data["deltas"][0])
+        assert first["summary"] == "Recap"
+        # The second output repeats the first, so its delta is empty
+        assert data["deltas"][1] == {}
+
+        data = client.get("/meeting/test-meeting-1/outputs", params={"since": 5}).json()
+        assert (data["since"], data["deltas"]) == (2, [])
+
     @patch('src.services.meeting.call_gemini')
     def test_get_meeting_state_with_outputs(self, mock_gemini, client, clear_meetings):
         """Test getting state with Gemini outputs"""
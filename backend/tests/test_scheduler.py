@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+
+from src.services.scheduler import DeadlineScheduler
+
+
+class Recorder:
+    def __init__(self):
+        self.fired = []
+
+    async def __call__(self, key):
+        self.fired.append(key)
+
+
+class TestDeadlineScheduler:
+    """Test the central pause trigger scheduler"""
+
+    @pytest.mark.asyncio
+    async def test_fires_in_deadline_order(self):
+        """Test keys fire once, earliest deadline first"""
+        recorder = Recorder()
+        scheduler = DeadlineScheduler(recorder)
+        scheduler.schedule("b", 0.04)
+        scheduler.schedule("a", 0.02)
+        scheduler.schedule("c", 0.06)
+
+        await asyncio.sleep(0.1)
+        assert recorder.fired == ["a", "b", "c"]
+        assert len(scheduler) == 0
+
+    @pytest.mark.asyncio
+    async def test_reschedule_replaces_deadline(self):
+        """Test only the latest deadline for a key fires"""
+        recorder = Recorder()
+        scheduler = DeadlineScheduler(recorder)
+        for _ in range(100):
+            scheduler.schedule("m1", 0.05)
+        scheduler.schedule("m1", 0.01)
+
+        await asyncio.sleep(0.08)
+        assert recorder.fired == ["m1"]
+
+    @pytest.mark.asyncio
+    async def test_cancel(self):
+        """Test a cancelled key does not fire"""
+        recorder = Recorder()
+        scheduler = DeadlineScheduler(recorder)
+        scheduler.schedule("m1", 0.01)
+        scheduler.schedule("m2", 0.02)
+        scheduler.cancel("m1")
+
+        await asyncio.sleep(0.05)
+        assert recorder.fired == ["m2"]
+
+    @pytest.mark.asyncio
+    async def test_heap_stays_bounded(self):
+        """Test superseded entries are compacted away"""
+        scheduler = DeadlineScheduler(Recorder())
+        for i in range(10_000):
+            scheduler.schedule(f"m{i % 10}", 10.0 + i)
+
+        assert len(scheduler) == 10
+        assert len(scheduler._heap) <= 2 * 10 + 64 + 1
+        scheduler.close()
+
+    @pytest.mark.asyncio
+    async def test_failed_callback_is_logged(self, caplog):
+        """Test an exception in a fired callback is reported, not lost"""
+        async def fail(key):
+            raise RuntimeError("boom")
+
+        scheduler = DeadlineScheduler(fail)
+        scheduler.schedule("m1", 0)
+        await asyncio.sleep(0.02)
+
+        assert "Scheduled analysis failed" in caplog.text
@@ -0,0 +1,144 @@
+import numpy as np
+import pytest
+
+from src.models.schemas import DiarizedSegment
+from src.services.segment_store import SegmentStore, TieredSegmentStore
+
+
+def make_segment(text, start_ms, speaker="spk_0", confidence=None):
+    return DiarizedSegment(
+        meeting_id="m1", speaker=speaker, start_ms=start_ms, end_ms=start_ms + 500,
+        text=text, confidence=confidence,
+    )
+
+
+class TestSegmentStore:
+    """Test the columnar segment buffer"""
+
+    def test_append_and_read_rows(self):
+        """Test rows round-trip through the columns"""
+        store = SegmentStore("m1")
+        store.append(make_segment("Hello", 0, confidence=0.5))
+        store.append(make_segment("Grüße", 500, speaker="spk_1"))
+
+        assert len(store) == 2
+        first, second = list(store)
+        assert (first.speaker, first.start_ms, first.end_ms, first.text, first.confidence) == ("spk_0", 0, 500, "Hello", 0.5)
+        assert (second.speaker, second.text, second.confidence) == ("spk_1", "Grüße", None)
+        assert store[-1].text == "Grüße"
+        with pytest.raises(IndexError):
+            store[2]
+
+    def test_maxlen_drops_oldest(self):
+        """Test a bounded store keeps the newest segments across compactions"""
+        store = SegmentStore("m1", maxlen=10)
+        for i in range(500):
+            store.append(make_segment(f"segment {i}", i * 1000))
+
+        assert len(store) == 10
+        assert [row.text for row in store] == [f"segment {i}" for i in range(490, 500)]
+        assert store.start_ms.tolist() == [i * 1000 for i in range(490, 500)]
+
+    def test_vectorized_reads(self):
+        """Test range queries and Gemini dicts"""
+        store = SegmentStore("m1")
+        store.extend([make_segment("b", 2000), make_segment("a", 0, speaker="spk_1"), make_segment("c", 4000)])
+
+        assert store.max_end_ms() == 4500
+        assert store.ending_after(1000).tolist() == [0, 2]
+        assert store.by_start().tolist() == [1, 0, 2]
+        assert store.gemini_segments(np.array([0])) == [
+            {"speaker": "spk_0", "start_ms": 2000, "end_ms": 2500, "text": "b"}
+        ]
+
+    def test_to_models(self):
+        """Test DiarizedSegment models are materialized for the API"""
+        store = SegmentStore("m1")
+        original = make_segment("Hello", 0, confidence=0.9)
+        store.append(original)
+
+        assert store.to_models() == [original]
+
+    def test_clear(self):
+        """Test clearing empties the store"""
+        store = SegmentStore("m1")
+        store.append(make_segment("Hello", 0))
+        store.clear()
+
+        assert len(store) == 0
+        assert store.max_end_ms() is None
+
+    def test_serialization_round_trip(self):
+        """Test rows survive to_bytes/from_bytes, including an empty store"""
+        store = SegmentStore("m1", maxlen=3)
+        for i in range(5):
+            store.append(make_segment(f"seg {i}", i * 1000, speaker=f"spk_{i % 2}", confidence=0.5))
+
+        restored = SegmentStore.from_bytes("m1", store.to_bytes())
+        assert restored.to_models() == store.to_models()
+        assert len(SegmentStore.from_bytes("m1", SegmentStore("m1").to_bytes())) == 0
+
+    def test_concat_reinterns_speakers(self):
+        """Test concatenated stores keep each row's speaker"""
+        a, b = SegmentStore("m1"), SegmentStore("m1")
+        a.append(make_segment("one", 0, speaker="spk_0"))
+        b.append(make_segment("two", 500, speaker="spk_1"))
+        b.append(make_segment("three", 1000, speaker="spk_0"))
+
+        merged = SegmentStore.concat("m1", [a, b])
+        assert merged.speakers() == ["spk_0", "spk_1", "spk_0"]
+        assert merged.texts() == ["one", "two", "three"]
+
+
+class TestTieredSegmentStore:
+    """Test hot/cold segment retention"""
+
+    def make_store(self, count, hot_limit=10):
+        store = TieredSegmentStore("m1", hot_limit=hot_limit)
+        store.extend(make_segment(f"segment {i}", i * 1000) for i in range(count))
+        return store
+
+    def test_overflow_moves_to_cold(self):
+        """Test the hot tier stays bounded and nothing is dropped"""
+        store = self.make_store(100)
+
+        assert len(store.hot) <= 10
+        assert store.cold_count + len(store.hot) == len(store) == 100
+        assert [row.text for row in store] == [f"segment {i}" for i in range(100)]
+        assert store[0].text == "segment 0"
+        assert store[57].start_ms == 57000
+        assert store[-1].text == "segment 99"
+
+    def test_range_reads_span_tiers(self):
+        """Test range queries read from cold chunks and the hot tier"""
+        store = self.make_store(100)
+
+        assert store.between(2400, 5000).texts() == ["segment 2", "segment 3", "segment 4"]
+        assert store.ending_after(94000).texts() == [f"segment {i}" for i in range(94, 100)]
+        assert store.ending_after(10000).start_ms.tolist() == [i * 1000 for i in range(10, 100)]
+        assert len(store.history()) == 100
+        assert store.max_end_ms() == 99500
+
+    def test_hot_ending_after_skips_cold_chunks(self):
+        """Test the hot-only read reports cold segments it left out, without thawing them"""
+        store = self.make_store(100)
+
+        rows, skipped = store.hot_ending_after(10000)
+
+        assert rows.texts() == [row.text for row in store.hot]
+        assert skipped == store.cold_count - 10
+        assert store.hot_ending_after(99000)[1] == 0
+
+    def test_cold_tier_is_compressed(self):
+        """Test cold chunks take less memory than the raw columns"""
+        store = self.make_store(5000, hot_limit=300)
+        assert store.nbytes() < store.history().nbytes()
+
+    def test_clear(self):
+        """Test clearing empties both tiers"""
+        store = self.make_store(50)
+        store.clear()
+
+        assert len(store) == 0
+        assert store.max_end_ms() is None
+        assert list(store) == []
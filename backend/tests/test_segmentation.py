@@ -0,0 +1,194 @@
+import json
+from types import SimpleNamespace
+
+import numpy as np
+
+from src.services.audio_preprocess import SpeechTimeline
+from src.services.elevenlabs_service import transform_elevenlabs_transcription_to_segments
+from src.services.segmentation import (
+    SPACING,
+    WORD,
+    OTHER,
+    SegmentationPolicy,
+    columns_from_word_dicts,
+    segment_boundaries,
+    segment_words,
+)
+
+
+def word(text, start, end, speaker="speaker_0"):
+    return {"text": text, "start": start, "end": end, "type": "word", "speaker_id": speaker, "logprob": 0.0}
+
+
+def spacing(start, speaker="speaker_0"):
+    return {"text": " ", "start": start, "end": start, "type": "spacing", "speaker_id": speaker, "logprob": 0.0}
+
+
+def event(text, start, end, speaker="speaker_0"):
+    return {"text": text, "start": start, "end": end, "type": "audio_event", "speaker_id": speaker, "logprob": 0.0}
+
+
+class TestWordColumns:
+    """Test extraction of parallel arrays from word dicts"""
+
+    def test_columns_from_word_dicts(self):
+        """Test fields are extracted and speakers interned"""
+        words = [word("Hi", 0.0, 0.5), spacing(0.5), word("there", 0.6, 1.0, "speaker_1")]
+
+        columns = columns_from_word_dicts(words)
+
+        assert len(columns) == 3
+        assert columns.text == ["Hi", " ", "there"]
+        assert columns.kind.tolist() == [WORD, SPACING, WORD]
+        assert columns.speakers == ["speaker_0", "speaker_1"]
+        assert columns.speaker.tolist() == [0, -1, 1]
+        np.testing.assert_allclose(columns.start, [0.0, 0.0, 0.6])
+
+    def test_missing_fields_use_defaults(self):
+        """Test words missing optional fields are still accepted"""
+        words = [{"text": "Hi", "type": "word", "start": 0.0, "end": 0.5}, {"type": "audio_event"}]
+
+        columns = columns_from_word_dicts(words)
+
+        assert columns.text == ["Hi", ""]
+        assert columns.kind.tolist() == [WORD, OTHER]
+        assert columns.speakers == [None]
+
+    def test_boundaries_on_speaker_change(self):
+        """Test segments start at each speaker change, skipping spacing"""
+        words = [
+            spacing(0.0),
+            word("a", 0.0, 0.1),
+            spacing(0.1),
+            word("b", 0.2, 0.3),
+            spacing(0.3, "speaker_1"),
+            word("c", 0.4, 0.5, "speaker_1"),
+        ]
+
+        starts = segment_boundaries(columns_from_word_dicts(words))
+
+        assert starts.tolist() == [1, 5]
+
+
+class TestSegmentationPolicy:
+    """Test pause, duration and sentence splitting within a speaker turn"""
+
+    def monologue(self, count, step=1.0, sentence_every=0):
+        words = []
+        for i in range(count):
+            text = f"w{i}." if sentence_every and (i + 1) % sentence_every == 0 else f"w{i}"
+            words += [word(text, i * step, i * step + 0.5), spacing(i * step + 0.5)]
+        return columns_from_word_dicts(words)
+
+    def test_speaker_only_by_default(self):
+        """Test the default policy keeps a speaker turn whole"""
+        starts = segment_boundaries(self.monologue(100))
+
+        assert starts.tolist() == [0]
+
+    def test_split_on_pause(self):
+        """Test a long enough gap between words starts a new segment"""
+        words = [word("a", 0.0, 0.5), spacing(0.5), word("b", 0.6, 1.0), spacing(1.0), word("c", 3.5, 4.0)]
+
+        starts = segment_boundaries(columns_from_word_dicts(words), SegmentationPolicy(pause_seconds=2.0))
+
+        assert starts.tolist() == [0, 4]
+
+    def test_split_on_max_duration(self):
+        """Test no segment runs longer than the maximum duration"""
+        policy = SegmentationPolicy(max_duration_seconds=10.0, sentence_boundaries=False)
+
+        segments = segment_words(self.monologue(35), "m1", policy=policy)
+
+        assert [s.text.split()[0] for s in segments] == ["w0", "w10", "w20", "w30"]
+        assert all(s.end_ms - s.start_ms <= 10_000 for s in segments)
+
+    def test_duration_split_prefers_sentence_end(self):
+        """Test duration cuts fall after the last complete sentence"""
+        policy = SegmentationPolicy(max_duration_seconds=10.0)
+
+        segments = segment_words(self.monologue(20, sentence_every=4), "m1", policy=policy)
+
+        assert [s.text.split()[-1] for s in segments] == ["w7.", "w15.", "w19."]
+
+    def test_single_long_word_is_kept(self):
+        """Test a word longer than the limit still forms its own segment"""
+        words = [word("a", 0.0, 20.0), spacing(20.0), word("b", 20.0, 20.5)]
+        policy = SegmentationPolicy(max_duration_seconds=10.0)
+
+        segments = segment_words(columns_from_word_dicts(words), "m1", policy=policy)
+
+        assert [s.text for s in segments] == ["a", "b"]
+
+
+class TestTransform:
+    """Test conversion of ElevenLabs transcripts into DiarizedSegments"""
+
+    def test_segments_by_speaker(self):
+        """Test words are grouped into one segment per speaker turn"""
+        data = {
+            "language_probability": 0.9,
+            "words": [
+                word("Hello", 0.0, 0.5), spacing(0.5), word("all", 0.6, 1.0), spacing(1.0),
+                word("Hi", 1.2, 1.5, "speaker_1"),
+            ],
+        }
+
+        segments = transform_elevenlabs_transcription_to_segments(data, "m1")
+
+        assert [(s.speaker, s.start_ms, s.end_ms, s.text) for s in segments] == [
+            ("spk_0", 0, 1000, "Hello all"),
+            ("spk_1", 1200, 1500, "Hi"),
+        ]
+        assert all(s.meeting_id == "m1" and s.confidence == 0.9 for s in segments)
+
+    def test_audio_events_kept_in_text_but_not_timing(self):
+        """Test audio events contribute text but not timing"""
+        data = {"words": [event("(laughs)", 0.0, 3.0), spacing(3.0), word("ok", 3.1, 3.4)]}
+
+        segments = transform_elevenlabs_transcription_to_segments(data, "m1")
+
+        assert len(segments) == 1
+        assert segments[0].text == "(laughs) ok"
+        assert (segments[0].start_ms, segments[0].end_ms) == (3100, 3400)
+
+    def test_event_only_segments_dropped(self):
+        """Test a speaker turn without any spoken words produces no segment"""
+        data = {"words": [word("Yes", 0.0, 0.4), event("(cough)", 0.5, 0.8, "speaker_1")]}
+
+        segments = transform_elevenlabs_transcription_to_segments(data, "m1")
+
+        assert [s.text for s in segments] == ["Yes"]
+
+    def test_empty_transcript(self):
+        """Test an empty word list yields no segments"""
+        assert transform_elevenlabs_transcription_to_segments({"words": []}, "m1") == []
+        assert transform_elevenlabs_transcription_to_segments({"words": [spacing(0.0)]}, "m1") == []
+
+    def test_raw_json_body(self):
+        """Test the undecoded response body is accepted"""
+        data = {"language_probability": 0.5, "words": [word("Hi", 0.0, 0.5), spacing(0.5), word("all", 0.6, 0.9)]}
+
+        segments = transform_elevenlabs_transcription_to_segments(json.dumps(data).encode(), "m1")
+
+        assert [(s.text, s.confidence) for s in segments] == [("Hi all", 0.5)]
+
+    def test_sdk_objects(self):
+        """Test words are read from SDK response objects without model_dump"""
+        words = [SimpleNamespace(**w) for w in (word("Hi", 0.0, 0.5), spacing(0.5), word("yo", 0.6, 0.9, "speaker_1"))]
+        response = SimpleNamespace(words=words, language_probability=1.0)
+
+        segments = transform_elevenlabs_transcription_to_segments(response, "m1")
+
+        assert [(s.speaker, s.text) for s in segments] == [("spk_0", "Hi"), ("spk_1", "yo")]
+
+    def test_timeline_remaps_word_times(self):
+        """Test word times from trimmed audio are mapped back to the original recording"""
+        timeline = SpeechTimeline(np.array([0.0, 65.0]), np.array([5.0, 100.0]))
+        data = {"words": [word("Hi", 1.0, 1.5), spacing(1.5), word("again", 6.0, 6.5)]}
+
+        segments = transform_elevenlabs_transcription_to_segments(
+            data, "m1", policy=SegmentationPolicy(pause_seconds=2.0), timeline=timeline
+        )
+
+        assert [(s.text, s.start_ms, s.end_ms) for s in segments] == [("Hi", 1000, 1500), ("again", 66000, 66500)]
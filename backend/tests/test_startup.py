@@ -0,0 +1,72 @@
+import os
+import subprocess
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Imported on first use, never at startup
+LAZY_MODULES = ("google.genai", "elevenlabs")
+# Generous bound on `import src.main`, to catch large regressions rather than noise
+MAX_IMPORT_SECONDS = 3.0
+
+
+def import_times(module: str) -> dict:
+    """Cumulative import time in seconds per module, from `python -X importtime`."""
+    env = {k: v for k, v in os.environ.items() if k not in ("GEMINI_API_KEY", "ELEVENLABS_API_KEY")}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative) / 1e6
+    return times
+
+
+class TestStartup:
+    """Test app import cost and startup validation"""
+
+    def test_import_without_api_keys(self):
+        """Test the app imports without credentials and without the SDKs"""
+        times = import_times("src.main")
+
+        loaded = [m for m in times if m.startswith(LAZY_MODULES)]
+        assert loaded == []
+        assert times["src.main"] < MAX_IMPORT_SECONDS, f"import src.main took {times['src.main']:.2f}s"
+
+    def test_startup_requires_gemini_key(self, monkeypatch):
+        """Test missing settings fail at startup instead of at import"""
+        from src.main import app
+        from src.services.config import settings
+        monkeypatch.setattr(settings, "gemini_api_key", "")
+
+        with pytest.raises(RuntimeError, match="GEMINI_API_KEY"):
+            with TestClient(app):
+                pass
+
+    def test_startup_imports_gemini_sdk_in_a_thread(self, monkeypatch):
+        """Test the SDK import is started at startup, in the loop's default executor"""
+        import threading
+        from unittest.mock import patch
+        from src.main import app
+        from src.services.config import settings
+        monkeypatch.setattr(settings, "gemini_api_key", "test")
+        threads = []
+
+        with patch('src.main.warm_sdk', side_effect=lambda: threads.append(threading.current_thread())):
+            with TestClient(app):
+                pass
+
+        assert len(threads) == 1
+        assert threads[0].name.startswith("asyncio_")
@@ -0,0 +1,166 @@
+import pytest
+from unittest.mock import patch, AsyncMock
+
+from src.models.schemas import DiarizedSegment
+from src.services.streaming import ElevenLabsChunkTranscriber, ElevenLabsRealtimeTranscriber, ReplayTranscriber
+
+
+def make_segment(text, start_ms, end_ms, meeting_id="m1"):
+    return DiarizedSegment(meeting_id=meeting_id, speaker="spk_0", start_ms=start_ms, end_ms=end_ms, text=text)
+
+
+class TestReplayTranscriber:
+    """Test the scripted stand-in transcriber"""
+
+    @pytest.mark.asyncio
+    async def test_replays_one_segment_per_frame(self):
+        """Test each frame releases the next scripted segment and close flushes the rest"""
+        transcriber = ReplayTranscriber("m1", [make_segment("a", 0, 1), make_segment("b", 1, 2), make_segment("c", 2, 3)])
+
+        assert [s.text for s in await transcriber.feed(b"x")] == ["a"]
+        assert [s.text for s in await transcriber.close()] == ["b", "c"]
+        assert await transcriber.feed(b"x") == []
+
+
+class TestElevenLabsChunkTranscriber:
+    """Test chunked transcription of a live stream"""
+
+    @pytest.mark.asyncio
+    async def test_chunks_are_shifted_onto_meeting_timeline(self):
+        """Test each committed chunk is transcribed and offset by the previous chunk's end"""
+        transcribe = AsyncMock(side_effect=[
+            [make_segment("first", 0, 1500)],
+            [make_segment("second", 200, 900)],
+        ])
+        transcriber = ElevenLabsChunkTranscriber("m1")
+
+        with patch('src.services.streaming.transcribe_audio_file', transcribe):
+            assert await transcriber.feed(b"ab") == []
+            await transcriber.feed(b"cd")
+            first = await transcriber.commit(end_ms=2000)
+            await transcriber.feed(b"ef")
+            second = await transcriber.commit()
+
+        assert transcribe.await_args_list[0].kwargs["audio_data"] == b"abcd"
+        assert [(s.start_ms, s.end_ms) for s in first] == [(0, 1500)]
+        assert [(s.start_ms, s.end_ms) for s in second] == [(2200, 2900)]
+
+    @pytest.mark.asyncio
+    async def test_each_chunk_has_its_own_speakers(self):
+        """Test "spk_0" in two separately diarized chunks is not merged into one speaker"""
+        transcribe = AsyncMock(side_effect=[[make_segment("first", 0, 1500)], [make_segment("second", 0, 900)]])
+        transcriber = ElevenLabsChunkTranscriber("m1")
+
+        with patch('src.services.streaming.transcribe_audio_file', transcribe):
+            await transcriber.feed(b"ab")
+            first = await transcriber.commit(end_ms=2000)
+            await transcriber.feed(b"cd")
+            second = await transcriber.commit(end_ms=4000)
+
+        assert [s.speaker for s in first + second] == ["spk_0_c0", "spk_0_c1"]
+
+    @pytest.mark.asyncio
+    async def test_empty_commit_skips_transcription(self):
+        """Test committing without audio does not call ElevenLabs"""
+        transcribe = AsyncMock()
+        transcriber = ElevenLabsChunkTranscriber("m1")
+
+        with patch('src.services.streaming.transcribe_audio_file', transcribe):
+            assert await transcriber.commit(end_ms=1000) == []
+
+        transcribe.assert_not_awaited()
+
+
+class FakeRealtimeConnection:
+    """Realtime session that replies to each sent frame with scripted events."""
+
+    def __init__(self, replies, on_commit=()):
+        self.handlers = {}
+        self.replies = list(replies)
+        self.on_commit = list(on_commit)
+        self.sent = []
+        self.closed = False
+
+    def on(self, event, callback):
+        self.handlers[event] = callback
+
+    def emit(self, events):
+        for event, data in events:
+            self.handlers[event](data)
+
+    async def send(self, message):
+        self.sent.append(message)
+        self.emit(self.replies.pop(0) if self.replies else [])
+
+    async def commit(self):
+        self.emit(self.on_commit)
+
+    async def close(self):
+        self.closed = True
+
+
+def words(*entries):
+    result = []
+    for text, start, end in entries:
+        if result:
+            result.append({"text": " ", "start": result[-1]["end"], "end": start, "type": "spacing"})
+        result.append({"text": text, "start": start, "end": end, "type": "word", "speaker_id": "speaker_1"})
+    return result
+
+
+class TestElevenLabsRealtimeTranscriber:
+    """Test realtime transcription of a live stream"""
+
+    def make_transcriber(self, connection):
+        transcriber = ElevenLabsRealtimeTranscriber("m1")
+        transcriber._open_session = AsyncMock(return_value=connection)
+        return transcriber
+
+    @pytest.mark.asyncio
+    async def test_partials_then_committed_words(self):
+        """Test partial transcripts are emitted as they arrive and committed words become final segments"""
+        second = 32000  # bytes of 16 kHz 16-bit PCM
+        connection = FakeRealtimeConnection([
+            [("partial_transcript", {"text": "hello"})],
+            [("partial_transcript", {"text": "hello the"}), ("partial_transcript", {"text": "hello there"})],
+            [("committed_transcript_with_timestamps", {
+                "text": "hello there", "words": words(("hello", 0.1, 0.5), ("there", 0.6, 1.2)),
+            })],
+        ])
+        transcriber = self.make_transcriber(connection)
+
+        first = await transcriber.feed(b"\0" * second)
+        latest = await transcriber.feed(b"\0" * second)
+        final = await transcriber.feed(b"\0" * second)
+
+        assert [(s.text, s.is_final, s.start_ms, s.end_ms) for s in first] == [("hello", False, 0, 1000)]
+        assert [(s.text, s.is_final) for s in latest] == [("hello there", False)]
+        assert [(s.text, s.is_final, s.speaker, s.start_ms, s.end_ms) for s in final] == [
+            ("hello there", True, "spk_1", 100, 1200),
+        ]
+        assert transcriber._open_session.await_count == 1
+        assert len(connection.sent) == 3
+
+    @pytest.mark.asyncio
+    async def test_close_commits_remaining_audio(self):
+        """Test closing the stream commits the last utterance and closes the session"""
+        connection = FakeRealtimeConnection(
+            [[("partial_transcript", {"text": "bye"})]],
+            on_commit=[("committed_transcript_with_timestamps", {"text": "bye", "words": words(("bye", 0.2, 0.4))})],
+        )
+        transcriber = self.make_transcriber(connection)
+
+        await transcriber.feed(b"\0" * 32000)
+        segments = await transcriber.close()
+
+        assert [(s.text, s.is_final) for s in segments] == [("bye", True)]
+        assert connection.closed
+
+    @pytest.mark.asyncio
+    async def test_error_event_raises(self):
+        """Test an error from the realtime session is surfaced to the stream"""
+        connection = FakeRealtimeConnection([[("error", {"error": "quota exceeded"})]])
+        transcriber = self.make_transcriber(connection)
+
+        with pytest.raises(RuntimeError, match="quota exceeded"):
+            await transcriber.feed(b"\0" * 320)
@@ -0,0 +1,192 @@
+import json
+import os
+
+import httpx
+import pytest
+from unittest.mock import patch
+
+from src.services.audio_preprocess import PreparedAudio
+from src.services.elevenlabs_service import transcribe_audio_file
+from src.services.transcript_checkpoint import TranscriptCheckpoint, chunk_key
+
+
+def response_body(*words):
+    entries = []
+    for text, start, speaker in words:
+        entries.append({"text": text, "start": start, "end": start + 0.5, "type": "word", "speaker_id": speaker})
+        entries.append({"text": " ", "start": start + 0.5, "end": start + 0.5, "type": "spacing", "speaker_id": speaker})
+    return json.dumps({"language_probability": 0.9, "words": entries}).encode()
+
+
+def http_error(status):
+    request = httpx.Request("POST", "https://api.elevenlabs.io/v1/speech-to-text")
+    return httpx.HTTPStatusError("error", request=request, response=httpx.Response(status, request=request))
+
+
+@pytest.fixture
+def transcription_env(tmp_path, monkeypatch):
+    """API key, a fresh checkpoint directory and no backoff delay"""
+    from src.services.config import settings
+    monkeypatch.setenv("ELEVENLABS_API_KEY", "test")
+    monkeypatch.setattr(settings, "transcription_checkpoint_dir", str(tmp_path))
+    monkeypatch.setattr(settings, "transcription_retry_base_seconds", 0.0)
+    return tmp_path
+
+
+def _async(fn):
+    async def wrapper(*args, **kwargs):
+        return fn(*args, **kwargs)
+    return wrapper
+
+
+def two_chunks(*args, **kwargs):
+    return PreparedAudio([b"chunk-a", b"chunk-b"], [0.0, 100.0])
+
+
+class TestTranscriptCheckpoint:
+    """Test on-disk chunk checkpoints"""
+
+    def test_round_trip(self, tmp_path):
+        """Test a stored body is returned for the same key"""
+        checkpoint = TranscriptCheckpoint(str(tmp_path / "nested"))
+        key = chunk_key(b"audio", "params")
+
+        assert checkpoint.get(key) is None
+        checkpoint.put(key, b"{}")
+        assert checkpoint.get(key) == b"{}"
+
+    def test_expire_removes_stale_entries(self, tmp_path):
+        """Test entries older than the TTL are removed and fresh ones kept"""
+        checkpoint = TranscriptCheckpoint(str(tmp_path))
+        checkpoint.put("old", b"{}")
+        checkpoint.put("new", b"{}")
+        os.utime(tmp_path / "old.json", (0, 0))
+
+        assert checkpoint.expire(3600) == 1
+        assert checkpoint.get("old") is None
+        assert checkpoint.get("new") == b"{}"
+        assert TranscriptCheckpoint(str(tmp_path / "missing")).expire(3600) == 0
+
+    def test_key_depends_on_params(self):
+        """Test the same audio with other request parameters gets another key"""
+        assert chunk_key(b"audio", "diarize=true") != chunk_key(b"audio", "diarize=false")
+
+
+class TestChunkedTranscription:
+    """Test chunked transcription with retries and resume"""
+
+    @pytest.mark.asyncio
+    async def test_chunks_are_merged_on_one_timeline(self, transcription_env):
+        """Test later chunks are shifted by their offset and keep their own speakers"""
+        bodies = {
+            b"chunk-a": response_body(("Hello", 1.0, "speaker_0")),
+            b"chunk-b": response_body(("Again", 2.0, "speaker_0")),
+        }
+        with patch('src.services.elevenlabs_service.preprocess_audio', side_effect=_async(two_chunks)), \
+             patch('src.services.elevenlabs_service._convert_raw', side_effect=lambda key, chunk: bodies[chunk]):
+            segments = await transcribe_audio_file(b"audio", "m1")
+
+        # Chunks are diarized separately, so speaker_0 in each is not assumed to be one person
+        assert [(s.text, s.start_ms, s.speaker) for s in segments] == [
+            ("Hello", 1000, "spk_0_c0"),
+            ("Again", 102000, "spk_0_c1"),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_transient_errors_are_retried(self, transcription_env):
+        """Test a 503 is retried and then succeeds"""
+        calls = []
+
+        def convert(key, chunk):
+            calls.append(chunk)
+            if len(calls) == 1:
+                raise http_error(503)
+            return response_body(("Hi", 0.0, "speaker_0"))
+
+        with patch('src.services.elevenlabs_service.preprocess_audio', side_effect=_async(lambda a: PreparedAudio.unchanged(a))), \
+             patch('src.services.elevenlabs_service._convert_raw', side_effect=convert):
+            segments = await transcribe_audio_file(b"audio", "m1")
+
+        assert len(calls) == 2
+        assert [s.text for s in segments] == ["Hi"]
+
+    @pytest.mark.asyncio
+    async def test_client_errors_are_not_retried(self, transcription_env):
+        """Test a 401 fails immediately"""
+        with patch('src.services.elevenlabs_service.preprocess_audio', side_effect=_async(lambda a: PreparedAudio.unchanged(a))), \
+             patch('src.services.elevenlabs_service._convert_raw', side_effect=http_error(401)) as convert:
+            with pytest.raises(httpx.HTTPStatusError):
+                await transcribe_audio_file(b"audio", "m1")
+
+        assert convert.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_resume_skips_checkpointed_chunks(self, transcription_env):
+        """Test a resubmitted upload only transcribes chunks that failed before"""
+        def fail_second(key, chunk):
+            if chunk == b"chunk-b":
+                raise http_error(400)
+            return response_body(("Hello", 1.0, "speaker_0"))
+
+        with patch('src.services.elevenlabs_service.preprocess_audio', side_effect=_async(two_chunks)):
+            with patch('src.services.elevenlabs_service._convert_raw', side_effect=fail_second):
+                with pytest.raises(httpx.HTTPStatusError):
+                    await transcribe_audio_file(b"audio", "m1")
+
+            with patch('src.services.elevenlabs_service._convert_raw',
+                       side_effect=lambda key, chunk: response_body(("Again", 2.0, "speaker_1"))) as convert:
+                segments = await transcribe_audio_file(b"audio", "m1")
+
+        assert [call.args[1] for call in convert.call_args_list] == [b"chunk-b"]
+        assert [s.text for s in segments] == ["Hello", "Again"]
+        # Both chunks are done, so nothing is left on disk
+        assert list(transcription_env.iterdir()) == []
+
+    @pytest.mark.asyncio
+    async def test_checkpointing_is_opt_in(self, transcription_env, monkeypatch):
+        """Test nothing is written without a checkpoint directory"""
+        from src.services.config import settings
+        monkeypatch.setattr(settings, "transcription_checkpoint_dir", None)
+
+        with patch('src.services.elevenlabs_service.preprocess_audio', side_effect=_async(two_chunks)), \
+             patch('src.services.elevenlabs_service.TranscriptCheckpoint') as checkpoint, \
+             patch('src.services.elevenlabs_service._convert_raw',
+                   side_effect=lambda key, chunk: response_body(("Hi", 0.0, "speaker_0"))):
+            await transcribe_audio_file(b"audio", "m1")
+
+        checkpoint.assert_not_called()
+
+
+class TestSharedClient:
+    """Test the process-wide ElevenLabs HTTP client"""
+
+    def test_client_is_reused_and_configured(self, monkeypatch):
+        """Test one pooled client is shared and built from settings"""
+        from src.services import elevenlabs_service
+        from src.services.config import settings
+        monkeypatch.setattr(settings, "elevenlabs_base_url", "http://stub:1234/")
+        monkeypatch.setattr(settings, "elevenlabs_max_concurrency", 2)
+        elevenlabs_service.close_client()
+
+        try:
+            client = elevenlabs_service.get_http_client()
+
+            assert elevenlabs_service.get_http_client() is client
+            assert str(client.base_url) == "http://stub:1234"
+            assert client.timeout.connect == settings.elevenlabs_connect_timeout_seconds
+            assert elevenlabs_service._get_request_pool()._max_workers == 2
+        finally:
+            elevenlabs_service.close_client()
+
+    def test_lifespan_starts_and_closes_client(self, monkeypatch):
+        """Test the app creates the client at startup and closes it at shutdown"""
+        from fastapi.testclient import TestClient
+        from src.main import app
+        from src.services import elevenlabs_service
+        from src.services.config import settings
+        monkeypatch.setattr(settings, "gemini_api_key", "test")
+
+        with TestClient(app):
+            assert elevenlabs_service._http_client is not None
+
+        assert elevenlabs_service._http_client is None
@@ -0,0 +1,141 @@
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+from src.models.schemas import DiarizedSegment
+from src.services.config import settings
+from src.services.meeting import MEETINGS, analyze, get_meeting, ingest, pause_triggers
+from src.services.trigger_policy import TriggerPolicy, TriggerState
+from tests.test_meeting import make_output
+
+
+@pytest.fixture
+def clear_meetings():
+    MEETINGS.clear()
+    yield
+    pause_triggers.close()
+    MEETINGS.clear()
+
+
+class TestTriggerPolicy:
+    """Test when a meeting is analyzed"""
+
+    policy = TriggerPolicy(debounce_seconds=1.5, max_wait_seconds=10.0, min_new_words=3)
+
+    def test_nothing_pending(self):
+        """Test no run is scheduled without new segments"""
+        assert self.policy.delay(TriggerState(), now=100.0) is None
+
+    def test_debounce(self):
+        """Test a pause after enough words triggers after the debounce"""
+        trigger = TriggerState()
+        trigger.add(5, now=100.0)
+        assert self.policy.delay(trigger, now=100.0) == 1.5
+
+    def test_max_wait_caps_continuous_speech(self):
+        """Test segments arriving faster than the debounce cannot postpone the run forever"""
+        trigger = TriggerState()
+        trigger.add(5, now=100.0)
+        trigger.add(5, now=109.0)
+        assert self.policy.delay(trigger, now=109.0) == pytest.approx(1.0)
+        assert self.policy.delay(trigger, now=112.0) == 0.0
+
+    def test_min_new_words(self):
+        """Test a short remainder waits for max_wait instead of the debounce"""
+        trigger = TriggerState()
+        trigger.add(1, now=100.0)
+        assert self.policy.delay(trigger, now=100.0) == 10.0
+
+    def test_spaced_by_gemini_latency(self):
+        """Test runs are not scheduled closer together than the recent latency"""
+        trigger = TriggerState()
+        trigger.finished(4.0, now=100.0)
+        trigger.finished(2.0, now=100.0)
+        assert trigger.latency == pytest.approx(3.4)
+
+        trigger.add(5, now=100.5)
+        assert self.policy.delay(trigger, now=100.5) == pytest.approx(2.9)
+
+    def test_take_and_restore(self):
+        """Test work from a failed run is put back"""
+        trigger = TriggerState()
+        trigger.add(4, now=100.0)
+        taken = trigger.take()
+        assert trigger.pending_since is None
+
+        trigger.add(2, now=103.0)
+        trigger.restore(taken)
+        assert (trigger.pending_since, trigger.pending_words) == (100.0, 6)
+
+    def test_failed_runs_back_off(self):
+        """Test retries after failed runs double from the debounce up to max_wait"""
+        trigger = TriggerState()
+        trigger.add(5, now=100.0)
+        trigger.failed(now=100.0)
+        assert self.policy.delay(trigger, now=100.0) == 1.5
+
+        trigger.failed(now=102.0)
+        trigger.failed(now=105.0)
+        assert self.policy.delay(trigger, now=105.0) == 6.0
+
+        trigger.finished(0.0, now=106.0)
+        assert self.policy.delay(trigger, now=106.0) == 1.5
+
+
+class TestTriggerScheduling:
+    """Test the policy drives live analysis"""
+
+    @pytest.mark.asyncio
+    @patch("src.services.meeting.call_gemini")
+    async def test_continuous_speech_is_analyzed(self, mock_gemini, clear_meetings, monkeypatch):
+        """Test analysis runs within max_wait even though no pause ever occurs"""
+        mock_gemini.return_value = {"summary": "s", "decisions": [], "action_items": []}
+        monkeypatch.setattr(settings, "pause_trigger_seconds", 0.2)
+        monkeypatch.setattr(settings, "trigger_max_wait_seconds", 0.3)
+
+        for i in range(10):
+            await ingest(DiarizedSegment(
+                meeting_id="live", speaker="spk_0", start_ms=i * 1000, end_ms=i * 1000 + 900,
+                text="we keep talking without pause",
+            ))
+            await asyncio.sleep(0.05)
+        await asyncio.sleep(0.35)
+
+        state = get_meeting("live")
+        assert mock_gemini.call_count >= 1
+        assert state.last_cutoff == 9900
+        assert state.trigger.pending_since is None
+
+    @pytest.mark.asyncio
+    @patch("src.services.meeting.call_gemini")
+    async def test_failed_run_is_retried(self, mock_gemini, clear_meetings, monkeypatch):
+        """Test a failed analysis re-arms itself without waiting for another segment"""
+        mock_gemini.side_effect = [RuntimeError("Gemini unavailable"), make_output()]
+        monkeypatch.setattr(settings, "pause_trigger_seconds", 0.05)
+        monkeypatch.setattr(settings, "trigger_max_wait_seconds", 0.3)
+
+        await ingest(DiarizedSegment(
+            meeting_id="live", speaker="spk_0", start_ms=0, end_ms=900, text="the last words of the meeting",
+        ))
+        await asyncio.sleep(0.4)
+
+        state = get_meeting("live")
+        assert mock_gemini.call_count == 2
+        assert state.last_cutoff == 900
+        assert state.trigger.pending_since is None
+        assert state.trigger.failures == 0
+
+    @pytest.mark.asyncio
+    @patch("src.services.meeting.call_gemini")
+    async def test_failure_keeps_unanalyzed_segments_pending(self, mock_gemini, clear_meetings):
+        """Test a failed run schedules a retry while segments past the cutoff remain, whatever was taken"""
+        mock_gemini.side_effect = RuntimeError("Gemini unavailable")
+        state = get_meeting("live")
+        state.append(DiarizedSegment(meeting_id="live", speaker="spk_0", start_ms=0, end_ms=900, text="unanalyzed"))
+
+        with pytest.raises(RuntimeError):
+            await analyze(state)
+
+        assert state.trigger.pending_since is not None
+        assert pause_triggers.deadline("live") is not None
@@ -0,0 +1,64 @@
+import numpy as np
+
+from src.services.vad import frame_levels_db, speech_regions
+
+RATE = 16000
+
+
+def tone(seconds, amplitude=8000):
+    t = np.arange(int(seconds * RATE)) / RATE
+    return (amplitude * np.sin(2 * np.pi * 220 * t)).astype(np.int16)
+
+
+def silence(seconds):
+    return np.zeros(int(seconds * RATE), dtype=np.int16)
+
+
+class TestFrameLevels:
+    """Test per-frame level computation"""
+
+    def test_levels(self):
+        """Test silence is far below a loud tone"""
+        levels = frame_levels_db(np.concatenate([silence(0.3), tone(0.3)]), RATE)
+
+        assert len(levels) == 20
+        assert levels[:10].max() < -100
+        assert levels[10:].min() > -20
+
+    def test_short_input(self):
+        """Test input shorter than a frame has no levels"""
+        assert frame_levels_db(silence(0.01), RATE).size == 0
+
+
+class TestSpeechRegions:
+    """Test speech region detection"""
+
+    def detect(self, pcm, min_silence=2.0, padding=0.0):
+        return speech_regions(pcm, RATE, threshold_db=-40, min_silence_seconds=min_silence, padding_seconds=padding)
+
+    def test_long_silence_separates_regions(self):
+        """Test speech either side of a long silence forms two regions"""
+        starts, ends = self.detect(np.concatenate([silence(1.5), tone(3), silence(5), tone(2)]))
+
+        np.testing.assert_allclose(starts, [1.5, 9.5], atol=0.03)
+        np.testing.assert_allclose(ends, [4.5, 11.5], atol=0.03)
+
+    def test_short_pauses_are_merged(self):
+        """Test pauses shorter than the minimum silence stay inside one region"""
+        starts, ends = self.detect(np.concatenate([tone(1), silence(1), tone(1)]))
+
+        np.testing.assert_allclose(starts, [0.0], atol=0.03)
+        np.testing.assert_allclose(ends, [3.0], atol=0.03)
+
+    def test_padding_is_clamped(self):
+        """Test padding extends regions without leaving the recording"""
+        starts, ends = self.detect(np.concatenate([tone(1), silence(5)]), padding=0.5)
+
+        np.testing.assert_allclose(starts, [0.0], atol=0.03)
+        np.testing.assert_allclose(ends, [1.5], atol=0.03)
+
+    def test_no_speech(self):
+        """Test pure silence has no regions"""
+        starts, ends = self.detect(silence(3))
+
+        assert starts.size == 0 and ends.size == 0
@@ -9,10 +9,12 @@ export async function POST(request: NextRequest) {
 
     // Forward to backend
     const backendUrl = process.env.NODE_ENV === "development" ? "http://localhost:8000/meetings/demo" : "http://levelus-backend:8000/meetings/demo";
+    // Pass view=/fields= through so the backend only serializes what the client asked for
+    const url = backendUrl + request.nextUrl.search;
 
-    console.log('📤 Forwarding to backend:', backendUrl);
+    console.log('📤 Forwarding to backend:', url);
 
-    const response = await fetch(backendUrl, {
+    const response = await fetch(url, {
       method: 'POST',
       body: formData,
       // Don't set Content-Type - let fetch handle it for FormData
@@ -29,13 +31,18 @@ export async function POST(request: NextRequest) {
     const text = await response.text();
     console.log('Response text length:', text.length);
 
+    // fetch has already decompressed the body, so drop the backend's encoding headers
+    const headers = Object.fromEntries(response.headers.entries());
+    delete headers['content-encoding'];
+    delete headers['content-length'];
+
     // Return the response with proper headers
     return new NextResponse(text, {
       status: response.status,
       statusText: response.statusText,
       headers: {
         'Content-Type': response.headers.get('Content-Type') || 'application/json',
-        ...Object.fromEntries(response.headers.entries()),
+        ...headers,
       },
     });
   } catch (error: any) {
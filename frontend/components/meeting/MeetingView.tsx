@@ -65,7 +65,8 @@ export default function MeetingView() {
     formData.append("meeting_audio", selectedAudioFile);
     setIsUploading(true);
     try {
-      const resp = await fetch('/api/meetings/demo', {
+      // Only what this view renders: the transcript comes from gemini_output.full_transcript
+      const resp = await fetch('/api/meetings/demo?fields=meeting_id,gemini_output', {
         method: 'POST',
         body: formData,
       });